@@ -0,0 +1,123 @@
+import numpy as np
+
+from column import as_column
+from schema import get_ancestors
+
+AGGREGATES = ("count", "sum", "avg", "min", "max")
+
+
+def _segment_ids(column, scope):
+    """
+    Returns the number of instances of @scope (records if None) and the
+    instance holding each non-null value of @column.
+
+    An instance of a repeated field at repetition level k starts at each triple
+    with r <= k, unless the field itself is missing there (d lower than its
+    definition level), in which case the triple does not belong to any.
+    """
+    repetition_levels, definition_levels = column.levels_to_numpy()
+    if scope is None:
+        starts = repetition_levels == 0
+    else:
+        starts = repetition_levels <= scope.max_repetition_level
+        # Triples where the scope is missing only hold nulls, drop them
+        starts &= definition_levels >= scope.max_definition_level
+    segment_ids = np.cumsum(starts) - 1
+    is_value = definition_levels == column.max_definition_level
+    return int(np.count_nonzero(starts)), segment_ids[is_value]
+
+
+def _check_scope(column, scope):
+    if scope is None:
+        return
+    if not scope.is_repeated:
+        raise ValueError(f"Scope {scope.full_path} is not a repeated field")
+    if scope not in get_ancestors(column.parent):
+        raise ValueError(f"Scope {scope.full_path} is not an ancestor of the column")
+
+
+def _aggregate(values, segment_ids, num_segments, aggregate):
+    if aggregate not in AGGREGATES:
+        raise ValueError(
+            f"Unknown aggregate {aggregate!r}, expected one of {AGGREGATES}"
+        )
+
+    counts = np.bincount(segment_ids, minlength=num_segments)
+    if aggregate == "count":
+        return counts
+    if values.kind not in ("int", "float"):
+        raise TypeError(f"Can not compute {aggregate} of {values.kind} values")
+
+    array = values.to_numpy()
+    if aggregate in ("sum", "avg"):
+        sums = np.zeros(num_segments, dtype=array.dtype)
+        np.add.at(sums, segment_ids, array)
+        if aggregate == "sum":
+            return sums
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return sums / counts
+
+    # NOTE: empty segments are set to NaN, so the result is always float
+    result = np.full(num_segments, np.inf if aggregate == "min" else -np.inf)
+    ufunc = np.minimum if aggregate == "min" else np.maximum
+    ufunc.at(result, segment_ids, array)
+    result[counts == 0] = np.nan
+    return result
+
+
+def aggregate_within(column_data, column, aggregate, scope=None):
+    """
+    Computes @aggregate ("count", "sum", "avg", "min" or "max") of the values
+    of the leaf @column within each record, or within each instance of its
+    repeated ancestor @scope (e.g. per Name rather than per record), directly
+    on the column without assembling records.
+
+    Returns a NumPy array with an entry per record or scope instance, in order.
+    Counts only count non-null values, and empty records or instances have a
+    count and sum of 0 and an avg, min and max of NaN.
+    """
+    _check_scope(column, scope)
+    data = as_column(column, column_data[column])
+    num_segments, segment_ids = _segment_ids(data, scope)
+    return _aggregate(data.values, segment_ids, num_segments, aggregate)
+
+
+def aggregate_by(column_data, key_column, column, aggregate):
+    """
+    Computes @aggregate (see aggregate_within) of the values of the leaf
+    @column over all the records sharing the same value of @key_column, which
+    must not be repeated, e.g. COUNT(Name.Language.Code) GROUP BY DocId.
+
+    Returns a dict mapping each key to its aggregate. Records without a key are
+    grouped under None.
+    """
+    if key_column.max_repetition_level != 0:
+        raise ValueError(f"Key column {key_column.full_path} is repeated")
+
+    keys = as_column(key_column, column_data[key_column])
+    _, definition_levels = keys.levels_to_numpy()
+    num_records = len(definition_levels)
+    # Group id of each record, with records without a key in the last group
+    key_values = keys.values.to_numpy()
+    unique_keys, key_groups = np.unique(key_values, return_inverse=True)
+    record_groups = np.full(num_records, len(unique_keys))
+    record_groups[definition_levels == keys.max_definition_level] = key_groups
+
+    data = as_column(column, column_data[column])
+    num_segments, segment_ids = _segment_ids(data, None)
+    if num_segments != num_records:
+        raise ValueError(
+            f"Column {column.full_path} holds {num_segments} records, expected "
+            f"{num_records}"
+        )
+    result = _aggregate(
+        data.values, record_groups[segment_ids], len(unique_keys) + 1, aggregate
+    )
+
+    groups = unique_keys.tolist() + [None]
+    has_records = np.bincount(record_groups, minlength=len(groups)) > 0
+    return {
+        key: value
+        for key, value, present in zip(groups, result.tolist(), has_records)
+        if present
+    }
@@ -0,0 +1,116 @@
+import unittest
+
+import numpy as np
+
+from aggregate import aggregate_by, aggregate_within
+from paper_schema import PaperSchema
+from schema import parse_schema
+from shred import shred_records
+from test_utils import get_desc
+
+
+class TestAggregateWithin(unittest.TestCase):
+    def setUp(self):
+        self.s = PaperSchema()
+        self.records = self.s.records + [{"DocId": 30}]
+        self.shredded = shred_records(self.s.root, self.records)
+
+    def test_within_record(self):
+        s = self.s
+
+        def within(column, aggregate):
+            return aggregate_within(self.shredded, column, aggregate).tolist()
+
+        self.assertEqual(within(s.name_language_code, "count"), [3, 0, 0])
+        self.assertEqual(within(s.links_forward, "count"), [3, 1, 0])
+        self.assertEqual(within(s.links_forward, "sum"), [120, 80, 0])
+        self.assertEqual(within(s.links_backward, "min")[1], 10)
+        self.assertEqual(within(s.links_backward, "max")[1], 30)
+        np.testing.assert_array_equal(
+            aggregate_within(self.shredded, s.links_forward, "avg"), [40, 80, np.nan]
+        )
+        np.testing.assert_array_equal(
+            aggregate_within(self.shredded, s.links_backward, "min"),
+            [np.nan, 10, np.nan],
+        )
+
+    def test_within_scope(self):
+        s = self.s
+        self.assertEqual(
+            aggregate_within(
+                self.shredded, s.name_language_code, "count", scope=s.name_url.parent
+            ).tolist(),
+            [2, 0, 1, 0],
+        )
+        self.assertEqual(
+            aggregate_within(
+                self.shredded,
+                s.name_language_country,
+                "count",
+                scope=s.name_language_code.parent,
+            ).tolist(),
+            [1, 0, 1],
+        )
+
+    def test_matches_assembled_records(self):
+        schema = parse_schema(["a[*].b[*]", "a[*].c"])
+        records = [
+            {"a": [{"b": list(range(i % 4)), "c": i} for _ in range(i % 3)]}
+            for i in range(50)
+        ]
+        shredded = shred_records(schema, records)
+        b = get_desc(schema, "a[*].b[*]")
+
+        self.assertEqual(
+            aggregate_within(shredded, b, "sum").tolist(),
+            [sum(sum(a["b"]) for a in r["a"]) for r in records],
+        )
+        self.assertEqual(
+            aggregate_within(
+                shredded, b, "count", scope=get_desc(schema, "a[*]")
+            ).tolist(),
+            [len(a["b"]) for r in records for a in r["a"]],
+        )
+
+    def test_errors(self):
+        s = self.s
+        with self.assertRaises(ValueError):
+            aggregate_within(self.shredded, s.doc_id, "median")
+        with self.assertRaises(TypeError):
+            aggregate_within(self.shredded, s.name_url, "sum")
+        with self.assertRaises(ValueError):
+            aggregate_within(self.shredded, s.doc_id, "count", scope=s.name_url.parent)
+        with self.assertRaises(ValueError):
+            aggregate_within(
+                self.shredded, s.links_forward, "count", scope=s.links_forward.parent
+            )
+
+
+class TestAggregateBy(unittest.TestCase):
+    def test_group_by(self):
+        s = PaperSchema()
+        records = s.records * 2 + [{"Links": {"Forward": [1]}}]
+        shredded = shred_records(s.root, records, dictionary_encoding=[s.doc_id])
+
+        self.assertEqual(
+            aggregate_by(shredded, s.doc_id, s.name_language_code, "count"),
+            {10: 6, 20: 0, None: 0},
+        )
+        self.assertEqual(
+            aggregate_by(shredded, s.doc_id, s.links_forward, "sum"),
+            {10: 240, 20: 160, None: 1},
+        )
+        self.assertEqual(
+            aggregate_by(shredded, s.doc_id, s.links_forward, "max"),
+            {10: 60.0, 20: 80.0, None: 1.0},
+        )
+
+    def test_repeated_key(self):
+        s = PaperSchema()
+        shredded = shred_records(s.root, s.records)
+        with self.assertRaises(ValueError):
+            aggregate_by(shredded, s.links_forward, s.doc_id, "count")
+
+
+if __name__ == "__main__":
+    unittest.main()
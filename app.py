@@ -89,10 +89,10 @@ try:
 
     for desc in sorted_descriptors:
         data = shredded_data[desc]
-        # data is list of (value, r, d)
+        # data is a Column of (value, r, d)
 
         # Create a nice dataframe for display
-        df = pd.DataFrame(data, columns=["Value", "R", "D"])
+        df = pd.DataFrame(data.to_tuples(), columns=["Value", "R", "D"])
         shredded_df_data.append({"Descriptor": desc, "Data": df})
 
     # Display in a grid or tabs
@@ -1,28 +1,129 @@
 import abc
+import functools
+import multiprocessing
+import time
 
+from column import Column
 from fsm import END, make_fsm
-from schema import common_ancestor, get_all_nodes, get_ancestors, get_leaves
+from schema import (
+    common_ancestor,
+    get_all_nodes,
+    get_leaves,
+    get_schema_index,
+    project_schema,
+)
+from stats import timed
 
 
 class ColumnReader:
+    """
+    Reads the (value, r, d) triples of a column one at a time. @data can be a
+    Column or any iterable of triples, which is then copied into a Column.
+    """
+
     def __init__(self, descriptor, data):
         self.descriptor = descriptor
         self.data = data
-        self.pos = 0
+        if not isinstance(data, Column):
+            data = Column.from_tuples(descriptor, data)
+        self._column = data
+        self._max_definition_level = data.max_definition_level
+
+        self._levels = data.iter_levels()
+        self._next_levels = next(self._levels, None)
+        # Position of the next non-null value in the column's values
+        self._value_position = 0
+        self._values = data.values.iter_from(0)
+
+    @property
+    def num_records(self):
+        return self.record_index.num_records
+
+    @property
+    def record_index(self):
+        """
+        The RecordIndex of the column, built on first use if the column does
+        not have one.
+        """
+        if self._column.record_index is None:
+            self._column.build_record_index()
+        return self._column.record_index
+
+    @property
+    def has_record_index(self):
+        """
+        Whether the column has a RecordIndex, that seek() does not need to
+        build.
+        """
+        return self._column.record_index is not None
+
+    def seek(self, record_id):
+        """
+        Positions the reader at the first triple of record @record_id, or at
+        the end if there are not that many records.
+
+        Uses the record index of the column, which is built on first use if the
+        column does not have one, and then only reads the records between the
+        closest indexed one and @record_id.
+        """
+        level_position, value_position, skipped = self.record_index.locate(record_id)
+        self._levels = self._column.iter_levels(level_position)
+        self._next_levels = next(self._levels, None)
+        self._value_position = value_position
+        self._values = self._column.values.iter_from(value_position)
+        self.skip_records(skipped)
 
     def has_next(self):
-        return self.pos < len(self.data)
+        return self._next_levels is not None
 
-    def peek(self):
-        if self.has_next():
-            return self.data[self.pos]
-        return None
+    def peek_levels(self):
+        """
+        Returns the (r, d) levels of the next triple, or None at the end.
+        """
+        return self._next_levels
+
+    def next_repetition_level(self):
+        """
+        Returns the repetition level of the next triple, or 0 at the end, which
+        is the level to transition on after reading the current one.
+        """
+        return self._next_levels[0] if self._next_levels is not None else 0
 
     def next(self):
         assert self.has_next()
-        result = self.data[self.pos]
-        self.pos += 1
-        return result
+        r, d = self._next_levels
+        self._next_levels = next(self._levels, None)
+        if d == self._max_definition_level:
+            self._value_position += 1
+            return (next(self._values), r, d)
+        return (None, r, d)
+
+    def skip_records(self, count):
+        """
+        Skips the triples of the next @count records without reading their
+        values. Records start at triples with repetition level 0.
+        """
+        max_definition_level = self._max_definition_level
+        levels = self._levels
+        next_levels = self._next_levels
+        skipped_values = 0
+        while count and next_levels is not None:
+            # Consume the first triple of the record and all repeated ones
+            while True:
+                skipped_values += next_levels[1] == max_definition_level
+                next_levels = next(levels, None)
+                if next_levels is None or next_levels[0] == 0:
+                    break
+            count -= 1
+
+        self._next_levels = next_levels
+        if skipped_values:
+            self._value_position += skipped_values
+            self._values = self._column.values.iter_from(self._value_position)
+
+
+# Records assembled by a worker of assemble_records_parallel per task
+DEFAULT_SLICE_RECORDS = 1024
 
 
 def _calculate_is_first_in_repetition(column_descriptor):
@@ -72,6 +173,14 @@ class ColumnAssembler(abc.ABC):
         pass
 
 
+def _is_empty_item(buffer):
+    """
+    Whether the item @buffer of a repeated group holds nothing but (nested)
+    empty groups.
+    """
+    return isinstance(buffer, dict) and all(map(_is_empty_item, buffer.values()))
+
+
 class JsonColumnAssembler(ColumnAssembler):
     def __init__(self, column_descriptor):
         super().__init__(column_descriptor)
@@ -119,12 +228,17 @@ class JsonColumnAssembler(ColumnAssembler):
 
     def end(self, assembler):
         if self.is_last_in_repetition:
-            # If the buffer is empty, we know that it was created when setting
-            # up scopes for NULL values. So we can remove them from the built
-            # record.
-            if isinstance(assembler.buffer, dict) and len(assembler.buffer) == 0:
-                assembler.repeated_buffer.pop()
-            assembler.buffer = assembler.repeated_buffer
+            # If the item holds no value, we know that it was created when
+            # setting up scopes for NULL values. So we can remove it from the
+            # built record. NOTE: @last_buffer is the item, which may hold
+            # the empty groups begun for the NULL values.
+            #
+            # NOTE: we resume from the repeated buffer saved in begin() rather
+            # than from the assembler's, as the latter has already been
+            # restored by our own children when this field is a repeated group.
+            if _is_empty_item(self.last_buffer):
+                self.last_repeated_buffer.pop()
+            assembler.buffer = self.last_repeated_buffer
         else:
             assembler.buffer = self.last_buffer
 
@@ -151,123 +265,632 @@ class TextColumnAssembler(ColumnAssembler):
 
 
 class Assembler:
-    def __init__(self, root_descriptor, descriptor_to_assembler):
-        self.root_descriptor = root_descriptor
-        self.current_descriptor = root_descriptor
-        self.descriptor_to_assembler = descriptor_to_assembler
+    """
+    Holds the state of the record being assembled. ColumnAssemblers read and
+    update the buffers as scopes are entered and left.
+    """
 
+    def __init__(self):
         self.buffer = {}
         # Buffer set up by a repeated non-leaf field for its last child to
         # resume from
         self.repeated_buffer = None
 
-        self.descriptor_orders = {
-            desc: i for i, desc in enumerate(get_all_nodes(root_descriptor))
-        }
 
-    def move_to_level(self, new_level, next_descriptor):
-        ancestor = common_ancestor(self.current_descriptor, next_descriptor)
+END_STATE = -1
+
+
+class AssemblyPlan:
+    """
+    Integer-indexed form of the assembly FSM.
+
+    Nodes of the (projected) schema are numbered in pre-order and leaves in
+    schema order. The FSM becomes a table of leaf id x repetition level -> leaf
+    id, and for every transition we precompute the node ids whose scopes have
+    to be ended and begun, so that assembling a value only indexes into lists.
+    """
+
+    def __init__(self, root_descriptor, columns=None):
+        source_leaves = list(get_leaves(root_descriptor))
+        if columns is not None:
+            selection = set(columns)
+            unknown = selection.difference(source_leaves)
+            if unknown:
+                raise ValueError(
+                    f"Columns {[c.full_path for c in unknown]} are not leaves of "
+                    "the schema"
+                )
+            source_leaves = [leaf for leaf in source_leaves if leaf in selection]
+            # Assemble against the projected schema so that group scopes (e.g.
+            # the first and last child of a repeated group) only account for
+            # the projected fields.
+            root_descriptor = project_schema(root_descriptor, source_leaves)
 
-        self.return_to_level(ancestor.max_definition_level)
+        self.root_descriptor = root_descriptor
+        # Leaves of the original schema, used to look up the column data
+        self.source_leaves = source_leaves
+        self.nodes = list(get_all_nodes(root_descriptor))
+        self.leaves = list(get_leaves(root_descriptor))
+
+        # NOTE: index by id() to avoid hashing descriptors
+        node_ids = {id(node): i for i, node in enumerate(self.nodes)}
+        leaf_ids = {id(leaf): i for i, leaf in enumerate(self.leaves)}
+        leaf_ids[id(END)] = END_STATE
+
+        self.leaf_nodes = [node_ids[id(leaf)] for leaf in self.leaves]
+        self.max_definition_levels = [leaf.max_definition_level for leaf in self.leaves]
+
+        def root_path(node):
+            return [node_ids[id(n)] for n in node.root_path]
+
+        # Scopes to begin when starting a record, i.e. from the root to the
+        # first leaf
+        self.initial_begins = tuple(root_path(self.leaves[0])[1:])
+
+        fsm = make_fsm(root_descriptor)
+
+        self.transitions = []
+        # For each transition, a pair of (node ids to end, node ids to begin)
+        self.scope_changes = []
+        for leaf_id, leaf in enumerate(self.leaves):
+            leaf_path = root_path(leaf)
+            transitions = []
+            scope_changes = []
+            for level in range(leaf.max_repetition_level + 1):
+                next_leaf = fsm[leaf][level]
+                transitions.append(leaf_ids[id(next_leaf)])
+
+                if next_leaf is END:
+                    scope_changes.append((tuple(reversed(leaf_path[1:])), ()))
+                    continue
+
+                target_level = common_ancestor(leaf, next_leaf).max_definition_level
+                if leaf_id >= leaf_ids[id(next_leaf)]:
+                    # Repeating: finish the scopes up to the repeated field
+                    target_level = min(target_level, leaf.full_repetition_level(level))
+
+                next_path = root_path(next_leaf)
+                scope_changes.append(
+                    (
+                        tuple(reversed(leaf_path[target_level + 1 :])),
+                        tuple(next_path[target_level + 1 :]),
+                    )
+                )
+            self.transitions.append(transitions)
+            self.scope_changes.append(scope_changes)
+
+
+def get_assembly_plan(root_descriptor, columns=None):
+    """
+    Returns the AssemblyPlan of the schema rooted at @root_descriptor projected
+    to @columns. Plans are cached and reused across calls until the schema is
+    modified (see SchemaIndex.cached).
+    """
+    columns = tuple(columns) if columns is not None else None
+    return get_schema_index(root_descriptor).cached(
+        ("assembly_plan", root_descriptor, columns),
+        lambda: AssemblyPlan(root_descriptor, columns),
+    )
 
-        path_to_root = list(get_ancestors(next_descriptor))[::-1]
 
-        while self.current_descriptor.max_definition_level < new_level:
-            self.current_descriptor = path_to_root[
-                self.current_descriptor.max_definition_level + 1
-            ]
-            assembler = self.descriptor_to_assembler[self.current_descriptor]
-            assembler.begin(self)
+def _assemble_record(plan, readers, column_assemblers, leaf_assemblers):
+    assembler = Assembler()
 
-    def return_to_level(self, new_level):
-        while self.current_descriptor.max_definition_level > new_level:
-            assembler = self.descriptor_to_assembler[self.current_descriptor]
-            assembler.end(self)
-            self.current_descriptor = self.current_descriptor.parent
+    for node in plan.initial_begins:
+        column_assemblers[node].begin(assembler)
 
-    def is_repeating(self, from_desc, to_desc):
-        return self.descriptor_orders[from_desc] >= self.descriptor_orders[to_desc]
+    leaf = 0
+    while leaf != END_STATE:
+        reader = readers[leaf]
+        (value, r, d) = reader.next()
 
+        if d == plan.max_definition_levels[leaf]:
+            leaf_assemblers[leaf].add(value, assembler)
 
-def _assemble_record(
-    fsm, root_descriptor, descriptors, descriptor_to_reader, descriptor_to_assembler
-):
-    descriptor = descriptors[0]
-    assembler = Assembler(root_descriptor, descriptor_to_assembler)
+        next_repetition_level = reader.next_repetition_level()
 
-    while descriptor != END:
-        # NOTE: we can not simply move this line to within the null guard below
+        # NOTE: scopes are changed regardless of whether the value was null,
         # otherwise we may pack unrelated values into the same record.
-        assembler.move_to_level(descriptor.max_definition_level, descriptor)
+        ends, begins = plan.scope_changes[leaf][next_repetition_level]
+        for node in ends:
+            column_assemblers[node].end(assembler)
+        for node in begins:
+            column_assemblers[node].begin(assembler)
 
-        reader = descriptor_to_reader[descriptor]
+        leaf = plan.transitions[leaf][next_repetition_level]
+
+    return assembler.buffer
+
+
+def _assemble_record_with_stats(
+    plan, readers, column_assemblers, leaf_assemblers, stats, node_paths, leaf_paths
+):
+    """
+    Same as _assemble_record, but counts the triples read, transitions taken
+    and scopes begun and ended into @stats, keyed by the full paths of the
+    nodes and leaves of the plan, and times the "assemble" phase.
+    """
+    start = time.perf_counter()
+    assembler = Assembler()
+
+    for node in plan.initial_begins:
+        column_assemblers[node].begin(assembler)
+        stats.begins[node_paths[node]] += 1
+
+    leaf = 0
+    while leaf != END_STATE:
+        reader = readers[leaf]
         (value, r, d) = reader.next()
+        stats.values_read[leaf_paths[leaf]] += 1
+
+        if d == plan.max_definition_levels[leaf]:
+            leaf_assemblers[leaf].add(value, assembler)
+
+        next_repetition_level = reader.next_repetition_level()
+
+        ends, begins = plan.scope_changes[leaf][next_repetition_level]
+        for node in ends:
+            column_assemblers[node].end(assembler)
+            stats.ends[node_paths[node]] += 1
+        for node in begins:
+            column_assemblers[node].begin(assembler)
+            stats.begins[node_paths[node]] += 1
+
+        next_leaf = plan.transitions[leaf][next_repetition_level]
+        stats.transitions[
+            (
+                leaf_paths[leaf],
+                leaf_paths[next_leaf] if next_leaf != END_STATE else None,
+                next_repetition_level,
+            )
+        ] += 1
+        leaf = next_leaf
 
-        has_non_null_value = d == descriptor.max_definition_level
+    stats.records_assembled += 1
+    stats.phase_times["assemble"] += time.perf_counter() - start
+    return assembler.buffer
+
+
+def _level_test(levels):
+    if len(levels) == 1:
+        return f"== {levels[0]}"
+    return f"in {tuple(levels)}"
 
-        if has_non_null_value:
-            column_assembler = descriptor_to_assembler[descriptor]
-            column_assembler.add(value, assembler)
 
-        next_repetition_level = reader.peek()[1] if reader.has_next() else 0
+class _AssemblerCompiler:
+    """
+    Generates the source of a function assembling one JSON record out of the
+    ColumnReaders of an AssemblyPlan, see compile_assembler.
+    """
 
-        next_descriptor = fsm[descriptor][next_repetition_level]
+    def __init__(self, plan):
+        self.lines = []
+        self.plan = plan
+        num_leaves = len(plan.leaves)
 
-        if next_descriptor is not END and assembler.is_repeating(
-            descriptor, next_descriptor
-        ):
-            assembler.return_to_level(
-                descriptor.full_repetition_level(next_repetition_level)
+        self.emit(0, "def assemble_record(readers):")
+        self.emit(
+            1, f"({', '.join(f'reader{i}' for i in range(num_leaves))},) = readers"
+        )
+        # The state of the readers is kept in locals and written back at the
+        # end, see ColumnReader.next()
+        for i in range(num_leaves):
+            self.emit(1, f"levels{i} = reader{i}._levels")
+            self.emit(1, f"next{i} = reader{i}._next_levels")
+            self.emit(1, f"values{i} = reader{i}._values")
+            self.emit(1, f"position{i} = reader{i}._value_position")
+        self.emit(1, "buffer = {}")
+        self.emit(1, "repeated_buffer = None")
+        for node in plan.initial_begins:
+            self.emit_begin(node, 1)
+
+        # States are emitted in leaf order, so that transitions to the next
+        # leaf fall through. Other transitions jump back to the first leaf of
+        # a repeated scope by restarting the loop, which dispatches on the
+        # state with a binary search over these jump targets.
+        self.jump_targets = sorted(
+            {0}.union(
+                next_leaf
+                for leaf_id, transitions in enumerate(plan.transitions)
+                for next_leaf in transitions
+                if next_leaf not in (END_STATE, leaf_id, leaf_id + 1)
+            )
+        )
+        self.jump_targets.append(num_leaves)
+        self.emit(1, "state = 0")
+        self.emit(1, "while True:")
+        self.emit_states(0, len(self.jump_targets) - 1, 2)
+
+        for i in range(num_leaves):
+            self.emit(1, f"reader{i}._next_levels = next{i}")
+            self.emit(1, f"reader{i}._value_position = position{i}")
+        self.emit(1, "return buffer")
+
+    def emit(self, indent, line):
+        self.lines.append("    " * indent + line)
+
+    def emit_begin(self, node_id, indent):
+        # Inlined JsonColumnAssembler.begin()
+        node = self.plan.nodes[node_id]
+        name = repr(node.path)
+        self.emit(indent, f"last_repeated_buffer{node_id} = repeated_buffer")
+        if _calculate_is_first_in_repetition(node):
+            self.emit(indent, "item = {}")
+            self.emit(indent, "buffer.append(item)")
+            self.emit(indent, "buffer = item")
+        self.emit(indent, f"last_buffer{node_id} = buffer")
+        if node.is_repeated:
+            self.emit(indent, "item = []")
+        elif not node.is_leaf:
+            self.emit(indent, "item = {}")
+        if node.is_repeated or not node.is_leaf:
+            self.emit(indent, f"buffer[{name}] = item")
+            self.emit(indent, "buffer = item")
+        if node.is_repeated and not node.is_leaf:
+            self.emit(indent, "repeated_buffer = item")
+
+    def emit_end(self, node_id, indent):
+        # Inlined JsonColumnAssembler.end()
+        node = self.plan.nodes[node_id]
+        if _calculate_is_last_in_repetition(node):
+            last_buffer = f"last_buffer{node_id}"
+            self.emit(
+                indent,
+                f"if _is_empty_item({last_buffer}):",
             )
+            self.emit(indent + 1, f"last_repeated_buffer{node_id}.pop()")
+            self.emit(indent, f"buffer = last_repeated_buffer{node_id}")
+        else:
+            self.emit(indent, f"buffer = last_buffer{node_id}")
+        self.emit(indent, f"repeated_buffer = last_repeated_buffer{node_id}")
+
+    def emit_states(self, start, stop, indent):
+        """
+        Emits the states from jump target @start to jump target @stop
+        (excluded), entered with the state set to one of these targets.
+        """
+        if stop - start == 1:
+            for leaf_id in range(self.jump_targets[start], self.jump_targets[stop]):
+                self.emit_state(leaf_id, indent)
+            return
+        middle = (start + stop) // 2
+        self.emit(indent, f"if state < {self.jump_targets[middle]}:")
+        self.emit_states(start, middle, indent + 1)
+        # Fall through to the first state of the second half
+        self.emit(indent + 1, f"state = {self.jump_targets[middle]}")
+        self.emit_states(middle, stop, indent)
+
+    def emit_state(self, leaf_id, indent):
+        """
+        Emits the code reading the next triple of leaf @leaf_id, adding its
+        value to the record and transitioning on the next repetition level.
+        """
+        plan = self.plan
+        leaf = plan.leaves[leaf_id]
+        i = leaf_id
+        # Levels with the same transition share a branch. Transitions to the
+        # leaf itself loop on the read.
+        loop_branches = {}
+        branches = {}
+        for level, next_leaf in enumerate(plan.transitions[i]):
+            scope_changes = plan.scope_changes[i][level]
+            (loop_branches if next_leaf == i else branches).setdefault(
+                (next_leaf, scope_changes), []
+            ).append(level)
+
+        read_indent = indent
+        if loop_branches:
+            self.emit(indent, "while True:")
+            read_indent += 1
+
+        self.emit(read_indent, f"d = next{i}[1]")
+        self.emit(read_indent, f"next{i} = next(levels{i}, None)")
+        self.emit(read_indent, f"if d == {plan.max_definition_levels[i]}:")
+        if leaf.is_repeated:
+            self.emit(read_indent + 1, f"buffer.append(next(values{i}))")
+        else:
+            self.emit(read_indent + 1, f"buffer[{leaf.path!r}] = next(values{i})")
+        self.emit(read_indent + 1, f"position{i} += 1")
+        if loop_branches or len(branches) > 1:
+            self.emit(read_indent, f"level = next{i}[0] if next{i} is not None else 0")
+
+        for (_, scope_changes), levels in loop_branches.items():
+            self.emit(read_indent, f"if level {_level_test(levels)}:")
+            self.emit_scope_changes(scope_changes, read_indent + 1)
+            self.emit(read_indent + 1, "continue")
+        if loop_branches:
+            self.emit(read_indent, "break")
+
+        for index, ((next_leaf, scope_changes), levels) in enumerate(branches.items()):
+            branch_indent = indent
+            if len(branches) > 1:
+                if index == len(branches) - 1:
+                    self.emit(indent, "else:")
+                else:
+                    self.emit(
+                        indent,
+                        f"{'if' if index == 0 else 'elif'} level {_level_test(levels)}:",
+                    )
+                branch_indent += 1
+            self.emit_scope_changes(scope_changes, branch_indent)
+            if next_leaf == END_STATE:
+                self.emit(branch_indent, "break")
+            elif next_leaf != i + 1:
+                self.emit(branch_indent, f"state = {next_leaf}")
+                self.emit(branch_indent, "continue")
+            elif branch_indent > indent and not any(scope_changes):
+                # Fall through to the next leaf
+                self.emit(branch_indent, "pass")
+
+    def emit_scope_changes(self, scope_changes, indent):
+        ends, begins = scope_changes
+        for node_id in ends:
+            self.emit_end(node_id, indent)
+        for node_id in begins:
+            self.emit_begin(node_id, indent)
+
+    def source(self):
+        return "\n".join(self.lines) + "\n"
+
+
+def _compile_assembler(root_descriptor, columns):
+    plan = get_assembly_plan(root_descriptor, columns)
+    source = _AssemblerCompiler(plan).source()
+    namespace = {"_is_empty_item": _is_empty_item}
+    try:
+        exec(
+            compile(source, f"<assembler {root_descriptor.full_path}>", "exec"),
+            namespace,
+        )
+    except (SyntaxError, RecursionError):
+        # e.g. "too many statically nested blocks"
+        return None
+    assemble_record = namespace["assemble_record"]
+    assemble_record.source = source
+    return assemble_record
 
-        descriptor = next_descriptor
 
-    assembler.return_to_level(0)
+def compile_assembler(root_descriptor, columns=None):
+    """
+    Returns a function assembling one record with the JsonColumnAssembler out
+    of the schema rooted at @root_descriptor projected to @columns, generated
+    from its AssemblyPlan: the FSM becomes straight-line code reading the
+    leaves in order, with the begin(), add() and end() calls of the
+    transitions inlined as buffer manipulations. Transitions to the next leaf
+    fall through, repeated leaves loop on their reads, and back edges restart
+    a while loop dispatching on the leaf to jump to in O(log(leaves)).
+
+    The function is called as assemble_record(readers) with the ColumnReader
+    of each leaf of the plan, which it advances like ColumnReader.next().
+    Returns None if the schema can not be compiled. Assemblers are cached per
+    schema and projection, like AssemblyPlans.
+    """
+    columns = tuple(columns) if columns is not None else None
+    return get_schema_index(root_descriptor).cached(
+        ("assembler", root_descriptor, columns),
+        lambda: _compile_assembler(root_descriptor, columns),
+    )
+
+
+def iter_assemble_records(
+    root_descriptor,
+    column_data,
+    assembler_factory=JsonColumnAssembler,
+    columns=None,
+    offset=0,
+    limit=None,
+    record_ids=None,
+    compiled=True,
+    stats=None,
+):
+    """
+    Lazily assembles records from columnar data, yielding them one at a time.
+
+    Takes the same arguments as assemble_records (@record_ids can not be
+    combined with the following ones), plus:
+        offset: The number of records to skip. Skipped records are never
+            assembled: readers seek past them using the record index of the
+            columns that have one (see ColumnReader.seek), and skip their
+            levels otherwise.
+        limit: The maximum number of records to yield, if set.
+    """
+    with timed(stats, "plan"):
+        plan = get_assembly_plan(root_descriptor, columns)
+
+    readers = [
+        ColumnReader(leaf, column_data[source])
+        for leaf, source in zip(plan.leaves, plan.source_leaves)
+    ]
+
+    assemble_record = None
+    if compiled and stats is None and assembler_factory is JsonColumnAssembler:
+        assemble_record = compile_assembler(root_descriptor, columns)
+    if assemble_record is None:
+        column_assemblers = [assembler_factory(node) for node in plan.nodes]
+        leaf_assemblers = [column_assemblers[node] for node in plan.leaf_nodes]
+        if stats is None:
+            assemble_record = functools.partial(
+                _assemble_record,
+                plan,
+                column_assemblers=column_assemblers,
+                leaf_assemblers=leaf_assemblers,
+            )
+        else:
+            assemble_record = functools.partial(
+                _assemble_record_with_stats,
+                plan,
+                column_assemblers=column_assemblers,
+                leaf_assemblers=leaf_assemblers,
+                stats=stats,
+                node_paths=[node.full_path for node in plan.nodes],
+                leaf_paths=[leaf.full_path for leaf in plan.leaves],
+            )
 
-    return assembler.buffer
+    first_reader = readers[0]
+
+    if record_ids is not None:
+        if offset or limit is not None:
+            raise ValueError("record_ids can not be combined with offset or limit")
+        num_records = first_reader.num_records
+        interval = first_reader.record_index.interval
+        # Record the readers are positioned at
+        position = 0
+        for record_id in record_ids:
+            if not 0 <= record_id < num_records:
+                raise IndexError(f"Record {record_id} out of range")
+            # Records close ahead are skipped rather than sought, so that
+            # increasing ids are read in a single pass
+            skipped = record_id - position
+            with timed(stats, "seek"):
+                for reader in readers:
+                    if 0 <= skipped < interval:
+                        reader.skip_records(skipped)
+                    else:
+                        reader.seek(record_id)
+            yield assemble_record(readers)
+            position = record_id + 1
+        return
+
+    if offset:
+        with timed(stats, "seek"):
+            for reader in readers:
+                # Building a record index would read the whole column
+                if reader.has_record_index and offset >= reader.record_index.interval:
+                    reader.seek(offset)
+                else:
+                    reader.skip_records(offset)
+
+    num_records = 0
+    while first_reader.has_next() and (limit is None or num_records < limit):
+        yield assemble_record(readers)
+        num_records += 1
 
 
 def assemble_records(
-    root_descriptor, column_data, assembler_factory=JsonColumnAssembler
+    root_descriptor,
+    column_data,
+    assembler_factory=JsonColumnAssembler,
+    columns=None,
+    record_ids=None,
+    compiled=True,
+    stats=None,
 ):
     """
     Assembles records from columnar data using the Dremel assembly algorithm.
 
     Args:
         root_descriptor: The root ColumnDescriptor of the schema.
-        column_data: A dictionary mapping ColumnDescriptor objects to lists of
-            (value, r, d) tuples.
+        column_data: A dictionary mapping ColumnDescriptor objects to Columns
+            (or lists) of (value, r, d) tuples.
         assembler_factory: A callable that takes a ColumnDescriptor and returns
             a ColumnAssembler.
+        columns: An optional list of leaf ColumnDescriptors to project. When
+            set, only these columns are read from @column_data and the
+            assembled records only contain the projected fields.
+        record_ids: An optional iterable of record ids (positions) to assemble,
+            in order. Readers seek to each record using the record index of
+            the columns, so only the requested records are read.
+        compiled: Whether to assemble records with the function generated by
+            compile_assembler when @assembler_factory is JsonColumnAssembler,
+            rather than interpreting the assembly FSM.
+        stats: An optional Stats object to which the triples read per column,
+            FSM transitions taken, scopes begun and ended, and the time spent
+            getting the plan ("plan"), seeking ("seek") and assembling
+            ("assemble") are added. Records are then assembled by the
+            interpreted FSM, which is only instrumented in that case.
 
     Returns:
         A list of assembled records (dicts).
     """
-    fsm = make_fsm(root_descriptor)
+    return list(
+        iter_assemble_records(
+            root_descriptor,
+            column_data,
+            assembler_factory,
+            columns=columns,
+            record_ids=record_ids,
+            compiled=compiled,
+            stats=stats,
+        )
+    )
 
-    all_descriptors = list(get_all_nodes(root_descriptor))
 
-    leaf_descriptors = list(get_leaves(root_descriptor))
+# (root descriptor, projected columns, assembler factory) of an
+# assemble_records_parallel worker process
+_worker_args = None
 
-    descriptor_to_reader = {
-        desc: ColumnReader(desc, column_data[desc]) for desc in leaf_descriptors
-    }
 
-    descriptor_to_assembler = {
-        desc: assembler_factory(desc) for desc in all_descriptors
-    }
+def _init_worker(root_descriptor, columns, assembler_factory):
+    global _worker_args
+    _worker_args = (root_descriptor, columns, assembler_factory)
 
-    first_reader = descriptor_to_reader[leaf_descriptors[0]]
 
-    records = []
-    while first_reader.has_next():
-        record = _assemble_record(
-            fsm,
-            root_descriptor,
-            leaf_descriptors,
-            descriptor_to_reader,
-            descriptor_to_assembler,
-        )
-        records.append(record)
+def _assemble_slice(column_slices):
+    root_descriptor, columns, assembler_factory = _worker_args
+    plan = get_assembly_plan(root_descriptor, columns)
+    # Slices are sent in projected leaf order, as the descriptors of the worker
+    # are copies of the ones of the caller
+    column_data = dict(zip(plan.source_leaves, column_slices))
+    return assemble_records(root_descriptor, column_data, assembler_factory, columns)
 
-    return records
+
+def split_columns(root_descriptor, column_data, slice_records, columns=None):
+    """
+    Splits the (projected) leaf columns of @column_data at record boundaries,
+    returning lists of Columns in leaf order that each hold the same
+    @slice_records records (fewer for the last one) and can be assembled on
+    their own.
+    """
+    plan = get_assembly_plan(root_descriptor, columns)
+    split = []
+    num_records = None
+    for source in plan.source_leaves:
+        data = column_data[source]
+        if not isinstance(data, Column):
+            data = Column.from_tuples(source, data)
+        record_starts = data.record_starts()
+        if num_records is None:
+            num_records = len(record_starts)
+        elif len(record_starts) != num_records:
+            raise ValueError(
+                f"Column {source.full_path} holds {len(record_starts)} records, "
+                f"expected {num_records}"
+            )
+        positions = list(record_starts[::slice_records]) + [len(data)]
+        split.append(data.split(positions))
+    return list(zip(*split))
+
+
+def assemble_records_parallel(
+    root_descriptor,
+    column_data,
+    assembler_factory=JsonColumnAssembler,
+    columns=None,
+    processes=None,
+    slice_records=DEFAULT_SLICE_RECORDS,
+):
+    """
+    Same as assemble_records, but assembles slices of @slice_records records
+    in a pool of @processes worker processes (defaults to the number of CPUs).
+
+    Columns are first split at their record boundaries (triples with r == 0)
+    into aligned slices, see split_columns. The records of all slices are then
+    concatenated in order. @assembler_factory and the assembled records must be
+    picklable.
+    """
+    if slice_records < 1:
+        raise ValueError("slice_records must be at least 1")
+    if columns is not None:
+        columns = tuple(columns)
+
+    slices = split_columns(root_descriptor, column_data, slice_records, columns)
+    with multiprocessing.Pool(
+        processes,
+        initializer=_init_worker,
+        initargs=(root_descriptor, columns, assembler_factory),
+    ) as pool:
+        return [
+            record
+            for records in pool.imap(_assemble_slice, slices)
+            for record in records
+        ]
@@ -1,9 +1,19 @@
 import unittest
 
-from assembly import assemble_records
+from assembly import (
+    END_STATE,
+    ColumnReader,
+    assemble_records,
+    assemble_records_parallel,
+    compile_assembler,
+    get_assembly_plan,
+    iter_assemble_records,
+    split_columns,
+)
 from paper_schema import PaperSchema
 from schema import parse_schema
 from shred import shred_records
+from test_utils import get_desc
 
 
 class TestAssembly(unittest.TestCase):
@@ -107,6 +117,368 @@ class TestAssembly(unittest.TestCase):
             ],
         )
 
+    def test_nested_repeated_group_as_last_child(self):
+        # Regression test for a bug where ending a repeated group that is the
+        # last child of another repeated group resumed from the wrong buffer.
+        schema = parse_schema(["Name[*].Language[*].Country"])
+        records = [
+            {
+                "Name": [
+                    {"Language": [{"Country": "us"}]},
+                    {},
+                    {"Language": [{"Country": "gb"}]},
+                ]
+            }
+        ]
+
+        shredded = shred_records(schema, records)
+        assembled = assemble_records(schema, shredded)
+
+        self.assertEqual(
+            assembled,
+            [
+                {
+                    "Name": [
+                        {"Language": [{"Country": "us"}]},
+                        {"Language": []},
+                        {"Language": [{"Country": "gb"}]},
+                    ]
+                }
+            ],
+        )
+
+    def test_nested_group_as_last_child(self):
+        # Regression test for a bug where an item of a repeated group whose last
+        # child is a group was kept when it held nothing but that empty group.
+        schema = parse_schema(["a[*].b", "a[*].c.d"])
+        records = [{}, {"a": [{"b": 1}, {"c": {"d": 2}}]}]
+        shredded = shred_records(schema, records)
+
+        for compiled in [True, False]:
+            self.assertEqual(
+                assemble_records(schema, shredded, compiled=compiled),
+                [{"a": []}, {"a": [{"b": 1, "c": {}}, {"c": {"d": 2}}]}],
+            )
+
+    def test_dictionary_encoded_columns(self):
+        s = PaperSchema()
+        shredded = shred_records(s.root, s.records)
+        encoded = shred_records(s.root, s.records, dictionary_encoding=True)
+
+        self.assertEqual(
+            assemble_records(s.root, encoded), assemble_records(s.root, shredded)
+        )
+
+    def test_column_projection(self):
+        s = PaperSchema()
+        shredded = shred_records(s.root, s.records)
+
+        columns = [s.doc_id, s.name_language_country]
+        # Only hand over the projected columns so that reading any other
+        # column would fail
+        projected = {desc: shredded[desc] for desc in columns}
+        assembled = assemble_records(s.root, projected, columns=columns)
+
+        self.assertEqual(
+            assembled,
+            [
+                {
+                    "DocId": 10,
+                    "Name": [
+                        {"Language": [{"Country": "us"}]},
+                        {"Language": []},
+                        {"Language": [{"Country": "gb"}]},
+                    ],
+                },
+                {"DocId": 20, "Name": [{"Language": []}]},
+            ],
+        )
+
+    def test_column_projection_repeated_leaf(self):
+        s = PaperSchema()
+        shredded = shred_records(s.root, s.records)
+
+        assembled = assemble_records(s.root, shredded, columns=[s.links_forward])
+
+        self.assertEqual(
+            assembled,
+            [{"Links": {"Forward": [20, 40, 60]}}, {"Links": {"Forward": [80]}}],
+        )
+
+    def test_column_projection_unknown_column(self):
+        s = PaperSchema()
+        shredded = shred_records(s.root, s.records)
+        other = parse_schema(["Other"])
+
+        with self.assertRaises(ValueError):
+            assemble_records(s.root, shredded, columns=list(other.children.values()))
+
+    def test_assembly_plan(self):
+        s = PaperSchema()
+        plan = get_assembly_plan(s.root)
+
+        self.assertEqual(
+            plan.leaves,
+            [
+                s.doc_id,
+                s.links_backward,
+                s.links_forward,
+                s.name_language_code,
+                s.name_language_country,
+                s.name_url,
+            ],
+        )
+        self.assertEqual(
+            plan.transitions,
+            [[1], [2, 1], [3, 2], [4, 4, 4], [5, 5, 3], [END_STATE, 3]],
+        )
+
+        def paths(node_ids):
+            return [plan.nodes[node].full_path for node in node_ids]
+
+        # Name.Language.Country -> Name.Language.Code on a new Language
+        ends, begins = plan.scope_changes[4][2]
+        self.assertEqual(paths(ends), ["Name.Language.Country"])
+        self.assertEqual(paths(begins), ["Name.Language.Code"])
+
+        # Name.Url -> Name.Language.Code on a new Name
+        ends, begins = plan.scope_changes[5][1]
+        self.assertEqual(paths(ends), ["Name.Url"])
+        self.assertEqual(paths(begins), ["Name.Language", "Name.Language.Code"])
+
+        # Name.Url -> END
+        ends, begins = plan.scope_changes[5][0]
+        self.assertEqual(paths(ends), ["Name.Url", "Name"])
+        self.assertEqual(begins, ())
+
+    def test_assembly_plan_is_cached(self):
+        s = PaperSchema()
+
+        self.assertIs(get_assembly_plan(s.root), get_assembly_plan(s.root))
+        self.assertIs(
+            get_assembly_plan(s.root, [s.doc_id]),
+            get_assembly_plan(s.root, [s.doc_id]),
+        )
+        self.assertIsNot(
+            get_assembly_plan(s.root), get_assembly_plan(s.root, [s.doc_id])
+        )
+
+    def test_compiled_assembler(self):
+        s = PaperSchema()
+        records = s.records * 3 + [{}, {"Name": [{}, {"Language": [{}]}]}]
+        shredded = shred_records(s.root, records)
+        schema = parse_schema(["a[*].b[*].c", "a[*].b[*].d[*]", "a[*].e", "f.g[*]"])
+        nested_records = [
+            {"a": [{"b": [{"c": 1, "d": [1, 2]}, {}]}, {"e": "x"}]},
+            {"a": [{}, {"b": []}, {"b": [{"d": []}]}], "f": {"g": [1, 2]}},
+            {"f": {}},
+        ]
+        nested = shred_records(schema, nested_records)
+
+        for root, column_data, columns in [
+            (s.root, shredded, None),
+            (s.root, shredded, [s.name_language_code, s.links_backward]),
+            (schema, nested, None),
+            (schema, nested, [get_desc(schema, "a[*].b[*].d[*]")]),
+        ]:
+            expected = assemble_records(
+                root, column_data, columns=columns, compiled=False
+            )
+            self.assertEqual(
+                assemble_records(root, column_data, columns=columns), expected
+            )
+            self.assertEqual(
+                assemble_records(
+                    root, column_data, columns=columns, record_ids=[2, 1, 2]
+                ),
+                [expected[2], expected[1], expected[2]],
+            )
+
+    def test_compiled_assembler_wide_schema(self):
+        paths = [f"f{i}" for i in range(3000)] + ["g[*].h[*]", "g[*].i"]
+        schema = parse_schema(paths)
+        records = [
+            {"f0": 1, "f2999": 2, "g": [{"h": [1, 2]}, {"i": 3}, {"h": [4]}]},
+            {},
+        ]
+        shredded = shred_records(schema, records)
+
+        # Fields are read in order without dispatching on the state but for the
+        # back edges of g
+        assemble_record = compile_assembler(schema)
+        self.assertIsNotNone(assemble_record)
+        self.assertEqual(assemble_record.source.count("state <"), 1)
+        self.assertEqual(
+            assemble_records(schema, shredded),
+            assemble_records(schema, shredded, compiled=False),
+        )
+
+    def test_compiled_assembler_is_cached(self):
+        s = PaperSchema()
+
+        assemble_record = compile_assembler(s.root)
+        self.assertIs(compile_assembler(s.root), assemble_record)
+        self.assertIn("while True:", assemble_record.source)
+        self.assertIsNot(compile_assembler(s.root, [s.doc_id]), assemble_record)
+
+    def test_schema_modified_after_assembly(self):
+        schema = parse_schema(["a", "b[*].c"])
+        records = [{"a": 1, "b": [{"c": 2}]}]
+        assemble_records(schema, shred_records(schema, records, vectorized=False))
+
+        schema.children["b"].add_child("d")
+        schema.add_child("e")
+        schema.compute_levels()
+        records = [{"a": 1, "b": [{"c": 2, "d": 3}], "e": 4}, {"a": 5}]
+        shredded = shred_records(schema, records, vectorized=False)
+
+        self.assertEqual(len(shredded), 4)
+        for compiled in [True, False]:
+            self.assertEqual(
+                assemble_records(schema, shredded, compiled=compiled),
+                [{"a": 1, "b": [{"c": 2, "d": 3}], "e": 4}, {"a": 5, "b": []}],
+            )
+
+    def test_iter_assemble_records(self):
+        s = PaperSchema()
+        records = s.records + [{"DocId": 30}, {"DocId": 40}]
+        shredded = shred_records(s.root, records)
+        assembled = assemble_records(s.root, shredded)
+
+        self.assertEqual(list(iter_assemble_records(s.root, shredded)), assembled)
+        self.assertEqual(
+            list(iter_assemble_records(s.root, shredded, offset=1)), assembled[1:]
+        )
+        self.assertEqual(
+            list(iter_assemble_records(s.root, shredded, offset=1, limit=2)),
+            assembled[1:3],
+        )
+        self.assertEqual(list(iter_assemble_records(s.root, shredded, offset=10)), [])
+        self.assertEqual(list(iter_assemble_records(s.root, shredded, limit=0)), [])
+
+    def test_offset_without_record_index(self):
+        schema = parse_schema(["a[*]", "b"])
+        records = [{"a": list(range(i % 3)), "b": i} for i in range(100)]
+        shredded = shred_records(schema, records)
+        indexed = shred_records(schema, records, record_index_interval=8)
+        for column in shredded.values():
+            column.record_index = None
+
+        for offset in [1, 50]:
+            self.assertEqual(
+                list(iter_assemble_records(schema, shredded, offset=offset)),
+                list(iter_assemble_records(schema, indexed, offset=offset)),
+            )
+        for column in shredded.values():
+            self.assertIsNone(column.record_index)
+
+    def test_iter_assemble_records_is_lazy(self):
+        s = PaperSchema()
+        shredded = shred_records(s.root, s.records)
+
+        records = iter_assemble_records(s.root, shredded)
+        self.assertEqual(next(records)["DocId"], 10)
+        self.assertEqual(next(records)["DocId"], 20)
+        with self.assertRaises(StopIteration):
+            next(records)
+
+    def test_skip_records(self):
+        s = PaperSchema()
+        shredded = shred_records(s.root, s.records + [{}])
+        reader = ColumnReader(s.name_language_code, shredded[s.name_language_code])
+
+        reader.skip_records(1)
+        self.assertEqual(reader.next(), (None, 0, 1))
+        self.assertEqual(reader.next(), (None, 0, 0))
+        self.assertFalse(reader.has_next())
+
+        reader = ColumnReader(s.links_forward, shredded[s.links_forward])
+        reader.skip_records(1)
+        self.assertEqual(reader.next(), (80, 0, 2))
+
+    def test_seek(self):
+        schema = parse_schema(["a[*]", "b"])
+        records = [{"a": list(range(i % 3)), "b": i} for i in range(100)]
+        shredded = shred_records(schema, records, record_index_interval=8)
+        a, b = shredded
+
+        reader = ColumnReader(a, shredded[a])
+        self.assertEqual(reader.num_records, 100)
+        reader.seek(42)
+        self.assertEqual(reader.next(), (None, 0, 0))
+        reader.seek(41)
+        self.assertEqual(reader.next(), (0, 0, 1))
+        self.assertEqual(reader.next(), (1, 1, 1))
+        reader.seek(0)
+        self.assertEqual(reader.next(), (None, 0, 0))
+
+        reader = ColumnReader(b, shredded[b])
+        reader.seek(99)
+        self.assertEqual(reader.next(), (99, 0, 1))
+        reader.seek(100)
+        self.assertFalse(reader.has_next())
+
+    def test_record_ids(self):
+        s = PaperSchema()
+        records = s.records * 50
+        shredded = shred_records(s.root, records)
+        assembled = assemble_records(s.root, shredded)
+
+        self.assertEqual(
+            assemble_records(s.root, shredded, record_ids=[99, 0, 31, 31]),
+            [assembled[99], assembled[0], assembled[31], assembled[31]],
+        )
+        self.assertEqual(
+            assemble_records(
+                s.root, shredded, columns=[s.name_language_code], record_ids=[3]
+            ),
+            assemble_records(s.root, shredded, columns=[s.name_language_code])[3:4],
+        )
+        with self.assertRaises(IndexError):
+            assemble_records(s.root, shredded, record_ids=[100])
+        with self.assertRaises(ValueError):
+            list(iter_assemble_records(s.root, shredded, offset=1, record_ids=[0]))
+
+    def test_split_columns(self):
+        s = PaperSchema()
+        records = s.records * 3
+        shredded = shred_records(s.root, records)
+
+        slices = split_columns(s.root, shredded, 4)
+        self.assertEqual(len(slices), 2)
+        self.assertEqual([len(column.record_starts()) for column in slices[1]], [2] * 6)
+        self.assertEqual(
+            assemble_records(s.root, dict(zip(shredded, slices[0]))),
+            assemble_records(s.root, shredded)[:4],
+        )
+
+    def test_split_columns_misaligned(self):
+        s = PaperSchema()
+        shredded = shred_records(s.root, s.records)
+        shredded[s.doc_id] = shredded[s.doc_id][:1]
+
+        with self.assertRaises(ValueError):
+            split_columns(s.root, shredded, 1)
+
+    def test_assemble_records_parallel(self):
+        s = PaperSchema()
+        shredded = shred_records(s.root, s.records * 5)
+        projection = [s.doc_id, s.name_language_code]
+
+        for slice_records in [1, 3, 100]:
+            self.assertEqual(
+                assemble_records_parallel(
+                    s.root, shredded, processes=2, slice_records=slice_records
+                ),
+                assemble_records(s.root, shredded),
+            )
+        self.assertEqual(
+            assemble_records_parallel(
+                s.root, shredded, columns=projection, processes=2, slice_records=3
+            ),
+            assemble_records(s.root, shredded, columns=projection),
+        )
+
     def test_debugging_assembler(self):
         from assembly import StringBuilder, TextColumnAssembler
 
@@ -0,0 +1,220 @@
+"""
+Benchmarks of shredding and assembly throughput on synthetic records.
+
+Usage:
+    python benchmark.py [--records N] [--repeat N] [--output results.json]
+        [--baseline baseline.json] [--tolerance 0.1]
+
+Runs every shape of BENCHMARKS, prints the results as JSON (or writes them to
+--output), and when --baseline is set, compares them to the results saved
+there, exiting with status 1 if any metric regressed by more than --tolerance.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+from assembly import assemble_records
+from fsm import build_fsm
+from schema import parse_schema
+from shred import shred_records
+
+# Shapes of the synthetic records, see generate_schema and generate_records
+BENCHMARKS = [
+    {"name": "flat", "depth": 1, "fan_out": 1, "sparsity": 0.0, "leaf_count": 8},
+    {
+        "name": "flat_sparse",
+        "depth": 1,
+        "fan_out": 1,
+        "sparsity": 0.8,
+        "leaf_count": 32,
+    },
+    {"name": "nested", "depth": 3, "fan_out": 1, "sparsity": 0.2, "leaf_count": 8},
+    {"name": "repeated", "depth": 3, "fan_out": 3, "sparsity": 0.2, "leaf_count": 8},
+    {"name": "deep", "depth": 6, "fan_out": 2, "sparsity": 0.3, "leaf_count": 12},
+]
+
+# Whether a higher value of each metric is better, used to find regressions
+METRICS = {
+    "shred_records_per_sec": True,
+    "shred_compiled_records_per_sec": True,
+    "shred_interpreted_records_per_sec": True,
+    "assemble_records_per_sec": True,
+    "make_fsm_per_sec": True,
+    "bytes_per_value": False,
+}
+
+
+def generate_schema(depth, fan_out, leaf_count):
+    """
+    Returns the schema paths of a chain of @depth - 1 nested groups, with the
+    @leaf_count leaves spread round-robin over the root and the groups (so
+    that the deepest ones are at nesting level @depth).
+
+    Groups are repeated if @fan_out is more than 1, and so is every other
+    leaf.
+    """
+    repeated = "[*]" if fan_out > 1 else ""
+    paths = []
+    for i in range(leaf_count):
+        level = i % depth
+        groups = [f"g{k}{repeated}" for k in range(1, level + 1)]
+        leaf = f"f{i}" + (repeated if i % 2 else "")
+        paths.append(".".join(groups + [leaf]))
+    return paths
+
+
+def generate_records(root_descriptor, num_records, fan_out, sparsity, seed=0):
+    """
+    Returns @num_records random records of the schema rooted at
+    @root_descriptor. Repeated fields hold @fan_out items, and each field is
+    missing (or null, for non-repeated leaves) with probability @sparsity.
+
+    Even leaves hold ints and odd ones strings. Records are deterministic for a
+    given @seed.
+    """
+    rng = random.Random(seed)
+
+    def generate_value(node, i):
+        if node.is_leaf:
+            index = int(node.path[1:])
+            return rng.randrange(1000) if index % 2 == 0 else f"value{i}"
+        return generate_group(node)
+
+    def generate_group(node):
+        group = {}
+        for name, child in node.children.items():
+            if rng.random() < sparsity:
+                if child.is_leaf and not child.is_repeated and rng.random() < 0.5:
+                    group[name] = None
+                continue
+            if child.is_repeated:
+                group[name] = [generate_value(child, i) for i in range(fan_out)]
+            else:
+                group[name] = generate_value(child, 0)
+        return group
+
+    return [generate_group(root_descriptor) for _ in range(num_records)]
+
+
+def _best_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_benchmark(
+    name, depth, fan_out, sparsity, leaf_count, num_records=2000, repeat=3
+):
+    """
+    Measures shred_records, make_fsm (without its cache, see build_fsm) and
+    assemble_records on @num_records records of the given shape, taking the
+    best of @repeat runs. shred_records is also measured record by record
+    (vectorized=False), with and without the compiled shredder.
+
+    Returns a dict of the parameters and the metrics of METRICS: throughputs
+    in records (or FSMs) per second, and the bytes taken by the shredded
+    columns (levels and values) per (value, r, d) triple.
+    """
+    schema = parse_schema(generate_schema(depth, fan_out, leaf_count))
+    records = generate_records(schema, num_records, fan_out, sparsity)
+
+    columns = shred_records(schema, records)
+    shred_time = _best_time(lambda: shred_records(schema, records), repeat)
+    shred_compiled_time = _best_time(
+        lambda: shred_records(schema, records, vectorized=False, compiled=True),
+        repeat,
+    )
+    shred_interpreted_time = _best_time(
+        lambda: shred_records(schema, records, vectorized=False, compiled=False),
+        repeat,
+    )
+    assemble_time = _best_time(lambda: assemble_records(schema, columns), repeat)
+    make_fsm_time = _best_time(lambda: build_fsm(schema), repeat)
+
+    num_values = sum(len(column) for column in columns.values())
+    nbytes = sum(column.nbytes for column in columns.values())
+    return {
+        "name": name,
+        "depth": depth,
+        "fan_out": fan_out,
+        "sparsity": sparsity,
+        "leaf_count": leaf_count,
+        "num_records": num_records,
+        "num_values": num_values,
+        "shred_records_per_sec": num_records / shred_time,
+        "shred_compiled_records_per_sec": num_records / shred_compiled_time,
+        "shred_interpreted_records_per_sec": num_records / shred_interpreted_time,
+        "assemble_records_per_sec": num_records / assemble_time,
+        "make_fsm_per_sec": 1 / make_fsm_time,
+        "bytes_per_value": nbytes / num_values,
+    }
+
+
+def run_benchmarks(benchmarks=BENCHMARKS, num_records=2000, repeat=3):
+    return [
+        run_benchmark(**benchmark, num_records=num_records, repeat=repeat)
+        for benchmark in benchmarks
+    ]
+
+
+def compare_results(results, baseline, tolerance=0.1):
+    """
+    Compares @results to @baseline (both as returned by run_benchmarks),
+    matching benchmarks by name.
+
+    Returns a list of (name, metric, baseline value, value) for the metrics
+    that are more than @tolerance (relative) worse than in the baseline.
+    """
+    baseline = {result["name"]: result for result in baseline}
+    regressions = []
+    for result in results:
+        base = baseline.get(result["name"])
+        if base is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in base:
+                continue
+            change = (result[metric] - base[metric]) / base[metric]
+            if (change if higher_is_better else -change) < -tolerance:
+                regressions.append(
+                    (result["name"], metric, base[metric], result[metric])
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="File to write the results to")
+    parser.add_argument("--baseline", help="Results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(num_records=args.records, repeat=args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.tolerance)
+        for name, metric, base, value in regressions:
+            print(f"{name}: {metric} regressed from {base:.6g} to {value:.6g}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+import json
+import os
+import tempfile
+import unittest
+
+from benchmark import (
+    METRICS,
+    compare_results,
+    generate_records,
+    generate_schema,
+    main,
+    run_benchmark,
+)
+from schema import get_leaves, parse_schema
+from shred import shred_records
+
+
+class TestGenerator(unittest.TestCase):
+    def test_generate_schema(self):
+        self.assertEqual(
+            generate_schema(depth=3, fan_out=2, leaf_count=4),
+            ["f0", "g1[*].f1[*]", "g1[*].g2[*].f2", "f3[*]"],
+        )
+        self.assertEqual(
+            generate_schema(depth=2, fan_out=1, leaf_count=3),
+            ["f0", "g1.f1", "f2"],
+        )
+
+    def test_generate_records(self):
+        schema = parse_schema(generate_schema(depth=3, fan_out=2, leaf_count=6))
+        records = generate_records(schema, 10, fan_out=2, sparsity=0.0)
+
+        self.assertEqual(records, generate_records(schema, 10, 2, 0.0))
+        self.assertEqual(len(records[0]["g1"]), 2)
+        self.assertEqual(len(records[0]["g1"][0]["g2"][0]["f5"]), 2)
+        # All fields are present, so every leaf holds a value per instance
+        columns = shred_records(schema, records)
+        for leaf in get_leaves(schema):
+            self.assertNotIn(None, [value for value, _, _ in columns[leaf]])
+
+        for record in generate_records(schema, 10, 2, sparsity=1.0):
+            self.assertTrue(all(value is None for value in record.values()))
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_run_benchmark(self):
+        result = run_benchmark(
+            "test", depth=2, fan_out=2, sparsity=0.5, leaf_count=4, num_records=10
+        )
+
+        self.assertEqual(result["name"], "test")
+        self.assertEqual(result["num_records"], 10)
+        for metric in METRICS:
+            self.assertGreater(result[metric], 0)
+
+    def test_compare_results(self):
+        baseline = [
+            {"name": "a", "shred_records_per_sec": 100, "bytes_per_value": 10},
+            {"name": "b", "shred_records_per_sec": 100},
+        ]
+        results = [
+            {"name": "a", "shred_records_per_sec": 95, "bytes_per_value": 12},
+            {"name": "b", "shred_records_per_sec": 80},
+            {"name": "c", "shred_records_per_sec": 1},
+        ]
+
+        self.assertEqual(
+            compare_results(results, baseline),
+            [("a", "bytes_per_value", 10, 12), ("b", "shred_records_per_sec", 100, 80)],
+        )
+        self.assertEqual(compare_results(results, baseline, tolerance=0.5), [])
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.json")
+            args = ["--records", "5", "--repeat", "1", "--output", output]
+            self.assertEqual(main(args), 0)
+            with open(output) as f:
+                results = json.load(f)
+
+            baseline = os.path.join(directory, "baseline.json")
+            for result in results:
+                result["shred_records_per_sec"] *= 100
+            with open(baseline, "w") as f:
+                json.dump(results, f)
+            self.assertEqual(main(args + ["--baseline", baseline]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,861 @@
+import array
+import collections.abc
+import itertools
+import sys
+
+import numpy as np
+
+from encoding import EncodedLevels
+
+_INT64_MIN = -(2**63)
+_INT64_MAX = 2**63 - 1
+
+# Dictionary encoded columns fall back to plain encoding past this many
+# distinct values
+DEFAULT_MAX_DICTIONARY_SIZE = 2**10
+# Record indexes hold the start of every this many records
+DEFAULT_RECORD_INDEX_INTERVAL = 64
+
+
+def _value_kind(value):
+    # NOTE: bool is a subclass of int, we intentionally keep it as an object so
+    # that it is handed back as a bool
+    value_type = type(value)
+    if value_type is int and _INT64_MIN <= value <= _INT64_MAX:
+        return "int"
+    if value_type is float:
+        return "float"
+    if value_type is str:
+        return "str"
+    return "object"
+
+
+def _object_nbytes(value):
+    # Size of the object plus the pointer to it in the list
+    return sys.getsizeof(value) + 8
+
+
+def as_column(descriptor, data):
+    """
+    Returns @data as a Column, copying it if it is another sequence of
+    (value, r, d) triples.
+    """
+    if isinstance(data, Column):
+        return data
+    return Column.from_tuples(descriptor, data)
+
+
+class ValueBuffer:
+    """
+    Typed storage for the non-null values of a column.
+
+    The kind of the buffer is decided by the first value appended: ints and
+    floats are stored in int64/float64 arrays, strings as utf-8 bytes plus an
+    array of offsets, and anything else (or a mix of kinds) in a list.
+    """
+
+    encoding = "plain"
+
+    def __init__(self):
+        self.kind = None
+        self.data = None
+        # Only used for strings: data[offsets[i]:offsets[i + 1]] is value i
+        self.offsets = None
+        # Only used for objects, kept up to date so that nbytes is O(1)
+        self._object_nbytes = 0
+        # Number of values of a view, see view
+        self._length = None
+
+    def append(self, value):
+        kind = _value_kind(value)
+        if self.kind is None:
+            self._init_kind(kind)
+        elif kind != self.kind and self.kind != "object":
+            self._convert_to_objects()
+
+        if self.kind == "str":
+            self.data += value.encode("utf-8")
+            self.offsets.append(len(self.data))
+        else:
+            self.data.append(value)
+            if self.kind == "object":
+                self._object_nbytes += _object_nbytes(value)
+
+    @classmethod
+    def from_list(cls, values):
+        """
+        Returns a ValueBuffer holding the list @values, converted in bulk when
+        they are all ints, floats or strings.
+        """
+        buffer = cls()
+        types = set(map(type, values))
+        try:
+            if types == {int}:
+                buffer.data = array.array("q", values)
+                buffer.kind = "int"
+                return buffer
+        except OverflowError:
+            pass
+        if types == {float}:
+            buffer.data = array.array("d", values)
+            buffer.kind = "float"
+            return buffer
+        if types == {str}:
+            encoded = [value.encode("utf-8") for value in values]
+            buffer.data = bytearray(b"".join(encoded))
+            buffer.offsets = array.array("q", [0])
+            buffer.offsets.extend(itertools.accumulate(map(len, encoded)))
+            buffer.kind = "str"
+            return buffer
+
+        for value in values:
+            buffer.append(value)
+        return buffer
+
+    def extend(self, values):
+        """
+        Appends all the values of another ValueBuffer or DictionaryValueBuffer,
+        copying typed buffers of the same kind in bulk.
+        """
+        if values.encoding != "plain" or values.kind is None:
+            for value in values:
+                self.append(value)
+            return
+        if self.kind is None:
+            self._init_kind(values.kind)
+        elif values.kind != self.kind and self.kind != "object":
+            self._convert_to_objects()
+
+        count = len(values)
+        if self.kind != values.kind:
+            for value in values:
+                self.append(value)
+        elif self.kind in ("int", "float"):
+            data, _ = values.buffers()
+            self.data.frombytes(memoryview(data).cast("B"))
+        elif self.kind == "str":
+            start = values.offsets[0]
+            shift = len(self.data) - start
+            self.data += values.data[start : values.offsets[count]]
+            self.offsets.extend(
+                offset + shift for offset in values.offsets[1 : count + 1]
+            )
+        else:
+            self.data.extend(values.data[:count])
+            self._object_nbytes += values._object_nbytes
+
+    def slice(self, start, stop):
+        """
+        Returns a new ValueBuffer holding a copy of the values from position
+        @start to @stop.
+        """
+        if self.kind is None:
+            return ValueBuffer()
+        if self.kind == "str":
+            begin = self.offsets[start]
+            offsets = array.array("q")
+            offsets.frombytes(
+                (
+                    np.frombuffer(self.offsets, dtype=np.int64)[start : stop + 1]
+                    - begin
+                ).tobytes()
+            )
+            data = bytearray(self.data[begin : offsets[-1] + begin])
+            return ValueBuffer.from_buffers("str", data, offsets)
+        if self.kind == "object":
+            return ValueBuffer.from_buffers("object", list(self.data[start:stop]))
+        if isinstance(self.data, array.array):
+            # NOTE: slicing copies without exporting the buffer, which could
+            # be shared with views (see view) and appended to meanwhile
+            return ValueBuffer.from_buffers(self.kind, self.data[start:stop])
+        data = array.array("q" if self.kind == "int" else "d")
+        data.frombytes(memoryview(self.data)[start:stop].cast("B"))
+        return ValueBuffer.from_buffers(self.kind, data)
+
+    @classmethod
+    def from_buffers(cls, kind, data, offsets=None):
+        """
+        Returns a read-only ValueBuffer over existing buffers, e.g. memoryviews
+        of a mapped file.
+        """
+        values = cls()
+        values.kind = kind
+        values.data = data
+        values.offsets = offsets
+        if kind == "object":
+            values._object_nbytes = sum(_object_nbytes(value) for value in data)
+        return values
+
+    def view(self):
+        """
+        Returns a read-only ValueBuffer over the values appended so far, sharing
+        the buffers of this one, which can still be appended to, in O(1).
+        """
+        values = ValueBuffer()
+        values.kind = self.kind
+        values.data = self.data
+        values.offsets = self.offsets
+        values._object_nbytes = self._object_nbytes
+        values._length = len(self)
+        return values
+
+    def buffers(self):
+        """
+        Returns the data and offsets of the values, copied for views so that
+        they only hold the values of the view.
+        """
+        if self._length is None:
+            return self.data, self.offsets
+        if self.kind == "str":
+            offsets = self.offsets[: self._length + 1]
+            return self.data[: offsets[-1]], offsets
+        return self.data[: self._length], None
+
+    def _init_kind(self, kind):
+        self.kind = kind
+        if kind == "int":
+            self.data = array.array("q")
+        elif kind == "float":
+            self.data = array.array("d")
+        elif kind == "str":
+            self.data = bytearray()
+            self.offsets = array.array("q", [0])
+        else:
+            self.data = []
+
+    def _convert_to_objects(self):
+        values = list(self)
+        self.kind = "object"
+        self.data = values
+        self.offsets = None
+        self._object_nbytes = sum(_object_nbytes(value) for value in values)
+
+    def __len__(self):
+        if self._length is not None:
+            return self._length
+        if self.kind is None:
+            return 0
+        if self.kind == "str":
+            return len(self.offsets) - 1
+        return len(self.data)
+
+    def __getitem__(self, index):
+        if self.kind == "str":
+            return bytes(
+                self.data[self.offsets[index] : self.offsets[index + 1]]
+            ).decode("utf-8")
+        return self.data[index]
+
+    def __iter__(self):
+        return self.iter_from(0)
+
+    def iter_from(self, start):
+        """
+        Returns an iterator over the values from position @start on, without
+        going through the values before it.
+        """
+        if self.kind is None:
+            return iter(())
+        if self.kind == "str":
+            return self._iter_strings(start)
+        return map(self.data.__getitem__, range(start, len(self)))
+
+    def _iter_strings(self, start):
+        data = self.data
+        offsets = self.offsets
+        for i in range(start, len(self)):
+            yield bytes(data[offsets[i] : offsets[i + 1]]).decode("utf-8")
+
+    def to_numpy(self):
+        """
+        Returns the values as a NumPy array. Numeric values are returned as a
+        view over the buffer, which must then not be appended to while the view
+        is alive, except for views (see view), which return a copy.
+        """
+        if self.kind in ("int", "float"):
+            data, _ = self.buffers()
+            return np.frombuffer(
+                data, dtype=np.int64 if self.kind == "int" else np.float64
+            )
+        return np.array(list(self), dtype=object)
+
+    @property
+    def nbytes(self):
+        if self.kind is None:
+            return 0
+        if self.kind in ("int", "float"):
+            return len(self) * self.data.itemsize
+        if self.kind == "str":
+            num_bytes = self.offsets[len(self)] - self.offsets[0]
+            return num_bytes + (len(self) + 1) * self.offsets.itemsize
+        return self._object_nbytes
+
+
+class DictionaryValueBuffer:
+    """
+    Dictionary encoded storage for the non-null values of a column: each
+    distinct value is stored once in a ValueBuffer, the dictionary, and values
+    are stored as their integer codes in it.
+
+    Values are decoded lazily as they are read, and predicates can be evaluated
+    against the dictionary and then compared on codes.
+    """
+
+    encoding = "dictionary"
+
+    def __init__(self, max_dictionary_size=DEFAULT_MAX_DICTIONARY_SIZE):
+        self.max_dictionary_size = max_dictionary_size
+        self.dictionary = ValueBuffer()
+        # NOTE: the code of the value making the dictionary full is appended
+        # before it is converted, so codes go up to max_dictionary_size
+        self.codes = array.array("H" if max_dictionary_size < 2**16 else "I")
+        # Maps values to their code, built on first lookup for read-only
+        # buffers. NOTE: keyed by type as well so that e.g. 1, 1.0 and True get
+        # distinct codes.
+        self._codes_by_value = {}
+        # Decoded dictionary, computed on first read
+        self._decoded_dictionary = None
+        # Number of values of a view, see view
+        self._length = None
+
+    @classmethod
+    def from_buffers(cls, dictionary, codes):
+        """
+        Returns a read-only DictionaryValueBuffer over an existing dictionary
+        ValueBuffer and buffer of codes.
+        """
+        values = cls()
+        values.dictionary = dictionary
+        values.codes = codes
+        values._codes_by_value = None
+        return values
+
+    def view(self):
+        """
+        Returns a read-only DictionaryValueBuffer over the values appended so
+        far, like ValueBuffer.view.
+        """
+        values = DictionaryValueBuffer.from_buffers(self.dictionary.view(), self.codes)
+        values.max_dictionary_size = self.max_dictionary_size
+        values._length = len(self)
+        return values
+
+    def buffers(self):
+        """
+        Returns the codes of the values, copied for views like
+        ValueBuffer.buffers.
+        """
+        if self._length is None:
+            return self.codes
+        return self.codes[: self._length]
+
+    @property
+    def kind(self):
+        return self.dictionary.kind
+
+    @property
+    def is_full(self):
+        """
+        Whether the dictionary outgrew max_dictionary_size, in which case the
+        values should be converted to plain encoding.
+        """
+        return len(self.dictionary) > self.max_dictionary_size
+
+    def append(self, value):
+        self.codes.append(self._get_code(value))
+
+    def _get_code(self, value):
+        key = (type(value), value)
+        code = self._codes_by_value.get(key)
+        if code is None:
+            code = len(self.dictionary)
+            self._codes_by_value[key] = code
+            self.dictionary.append(value)
+            self._decoded_dictionary = None
+        return code
+
+    def extend(self, values):
+        """
+        Appends all the values of another DictionaryValueBuffer by remapping its
+        codes to the ones of this dictionary, without decoding the values.
+        """
+        remap = [self._get_code(value) for value in values.decoded_dictionary]
+        if len(self.dictionary) > 2**16 and self.codes.typecode == "H":
+            self.codes = array.array("I", self.codes)
+        remap = np.array(remap, dtype=f"u{self.codes.itemsize}")
+        self.codes.frombytes(remap[values.codes_to_numpy()].tobytes())
+
+    def lookup(self, value):
+        """
+        Returns the code of @value, or None if it is not in the dictionary.
+        """
+        if self._codes_by_value is None:
+            self._codes_by_value = {
+                (type(dictionary_value), dictionary_value): code
+                for code, dictionary_value in enumerate(self.decoded_dictionary)
+            }
+        try:
+            return self._codes_by_value.get((type(value), value))
+        except TypeError:
+            # Unhashable values are never in the dictionary
+            return None
+
+    @property
+    def decoded_dictionary(self):
+        if self._decoded_dictionary is None:
+            self._decoded_dictionary = list(self.dictionary)
+        return self._decoded_dictionary
+
+    def to_plain(self):
+        values = ValueBuffer()
+        for value in self:
+            values.append(value)
+        return values
+
+    def __len__(self):
+        if self._length is not None:
+            return self._length
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        return self.decoded_dictionary[self.codes[index]]
+
+    def __iter__(self):
+        return self.iter_from(0)
+
+    def iter_from(self, start):
+        codes = self.codes
+        return map(
+            self.decoded_dictionary.__getitem__,
+            map(codes.__getitem__, range(start, len(self))),
+        )
+
+    def slice(self, start, stop):
+        """
+        Returns a new DictionaryValueBuffer holding a copy of the codes from
+        position @start to @stop, along with a copy of the whole dictionary.
+        """
+        codes = self.codes_to_numpy()[start:stop]
+        sliced_codes = array.array(codes.dtype.char)
+        sliced_codes.frombytes(codes.tobytes())
+        dictionary = self.dictionary.slice(0, len(self.dictionary))
+        values = DictionaryValueBuffer.from_buffers(dictionary, sliced_codes)
+        values.max_dictionary_size = self.max_dictionary_size
+        return values
+
+    def codes_to_numpy(self):
+        return np.frombuffer(self.buffers(), dtype=f"u{self.codes.itemsize}")
+
+    def to_numpy(self):
+        return self.dictionary.to_numpy()[self.codes_to_numpy()]
+
+    @property
+    def nbytes(self):
+        return self.dictionary.nbytes + len(self) * self.codes.itemsize
+
+
+class ColumnStatistics:
+    """
+    Statistics of the values of a column (chunk): the number of non-null values
+    and of nulls (triples with d < max_definition_level), the number of
+    distinct values and the min and max values.
+
+    min_value and max_value are None when there are no values or when they are
+    not comparable, e.g. for a mix of kinds. NaNs are counted as values but
+    left out of them. distinct_count is exact, or None for values of the
+    "object" kind that are not all hashable (e.g. dicts).
+    """
+
+    def __init__(self, value_count, null_count, distinct_count, min_value, max_value):
+        self.value_count = value_count
+        self.null_count = null_count
+        self.distinct_count = distinct_count
+        self.min_value = min_value
+        self.max_value = max_value
+
+    @classmethod
+    def compute(cls, column):
+        values = column.values
+        value_count = len(values)
+        null_count = len(column) - value_count
+        if value_count == 0:
+            return cls(0, null_count, 0, None, None)
+
+        if values.encoding == "dictionary":
+            distinct_values = values.decoded_dictionary
+        elif values.kind in ("int", "float"):
+            distinct_values = np.unique(values.to_numpy()).tolist()
+        elif values.kind == "str":
+            distinct_values = set(values)
+        else:
+            distinct_values = list(values)
+        distinct_count = len(distinct_values)
+        if values.encoding != "dictionary" and values.kind == "object":
+            # NOTE: keyed by type too, like dictionary encoding, so that e.g.
+            # True and 1 are distinct
+            try:
+                distinct_count = len({(type(value), value) for value in values})
+            except TypeError:
+                # Unhashable values
+                distinct_count = None
+
+        # NOTE: NaNs compare False to everything, so they are left out of the
+        # bounds of the other values
+        try:
+            ordered_values = [value for value in distinct_values if value == value]
+            min_value = min(ordered_values, default=None)
+            max_value = max(ordered_values, default=None)
+        except (TypeError, ValueError):
+            min_value = max_value = None
+        return cls(value_count, null_count, distinct_count, min_value, max_value)
+
+    def to_dict(self):
+        return {
+            "value_count": self.value_count,
+            "null_count": self.null_count,
+            "distinct_count": self.distinct_count,
+            "min_value": self.min_value,
+            "max_value": self.max_value,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def __repr__(self):
+        return f"ColumnStatistics({self.to_dict()})"
+
+
+class RecordIndex:
+    """
+    Index of the records of a column: the positions of the triple and of the
+    value at which every @interval-th record starts.
+
+    Seeking to a record then costs at most @interval - 1 records of reading,
+    instead of reading all the records before it.
+    """
+
+    def __init__(self, interval, num_records, level_positions, value_positions):
+        self.interval = interval
+        self.num_records = num_records
+        self.level_positions = level_positions
+        self.value_positions = value_positions
+
+    @classmethod
+    def build(cls, column, interval=DEFAULT_RECORD_INDEX_INTERVAL):
+        if interval < 1:
+            raise ValueError("interval must be at least 1")
+        repetition_levels, definition_levels = column.levels_to_numpy()
+        record_starts = np.flatnonzero(repetition_levels == 0)
+        # Number of values before each position
+        value_positions = np.concatenate(
+            ([0], np.cumsum(definition_levels == column.max_definition_level))
+        )
+        level_positions = record_starts[::interval]
+        return cls(
+            interval,
+            len(record_starts),
+            level_positions,
+            value_positions[level_positions],
+        )
+
+    def locate(self, record_id):
+        """
+        Returns the (triple position, value position) of the indexed record
+        preceding @record_id, and the number of records between the two.
+        Positions past the last record locate the end of the column.
+        """
+        if record_id < 0:
+            raise IndexError("Record ids must not be negative")
+        block = min(record_id // self.interval, len(self.level_positions) - 1)
+        if block < 0:
+            return 0, 0, 0
+        return (
+            int(self.level_positions[block]),
+            int(self.value_positions[block]),
+            record_id - block * self.interval,
+        )
+
+
+class Column(collections.abc.Sequence):
+    """
+    Compact storage for the (value, r, d) triples of a leaf column.
+
+    Repetition and definition levels are buffered as they are appended and RLE /
+    bit-packing encoded in bulk (see encoding.EncodedLevels), and only non-null values (i.e.
+    d == max_definition_level) are stored, in a typed ValueBuffer. With
+    @dictionary_encoding, values are stored in a DictionaryValueBuffer until it
+    holds more than @max_dictionary_size distinct values, and then converted to
+    a ValueBuffer.
+
+    Indexing and iterating yield (value, r, d) tuples and a Column compares
+    equal to the list of its tuples, so it can be used wherever such a list
+    was. to_tuples() materializes that list.
+    """
+
+    def __init__(
+        self,
+        max_repetition_level,
+        max_definition_level,
+        dictionary_encoding=False,
+        max_dictionary_size=DEFAULT_MAX_DICTIONARY_SIZE,
+    ):
+        self.max_repetition_level = max_repetition_level
+        self.max_definition_level = max_definition_level
+        self.repetition_levels = EncodedLevels(max_repetition_level)
+        self.definition_levels = EncodedLevels(max_definition_level)
+        self.values = (
+            DictionaryValueBuffer(max_dictionary_size)
+            if dictionary_encoding
+            else ValueBuffer()
+        )
+        # Decoded levels and number of values before each position, computed on
+        # first random access
+        self._decoded = None
+        # Optional RecordIndex, see build_record_index
+        self.record_index = None
+        # Optional ColumnStatistics, see compute_statistics
+        self.statistics = None
+
+    @classmethod
+    def for_descriptor(cls, descriptor, **kwargs):
+        return cls(
+            descriptor.max_repetition_level, descriptor.max_definition_level, **kwargs
+        )
+
+    @classmethod
+    def from_buffers(
+        cls,
+        max_repetition_level,
+        max_definition_level,
+        repetition_levels,
+        definition_levels,
+        values,
+    ):
+        """
+        Returns a read-only Column over existing EncodedLevels and value buffer,
+        e.g. viewing a mapped file.
+        """
+        column = cls(max_repetition_level, max_definition_level)
+        column.repetition_levels = repetition_levels
+        column.definition_levels = definition_levels
+        column.values = values
+        return column
+
+    @classmethod
+    def from_tuples(cls, descriptor, data):
+        column = cls.for_descriptor(descriptor)
+        for value, r, d in data:
+            column.append(value, r, d)
+        return column
+
+    def append(self, value, r, d):
+        self.repetition_levels.append(r)
+        self.definition_levels.append(d)
+        if d == self.max_definition_level:
+            if self.values.encoding == "dictionary":
+                self._append_dictionary_value(value)
+            else:
+                self.values.append(value)
+        self._decoded = None
+        self.record_index = None
+        self.statistics = None
+
+    @classmethod
+    def concat(cls, columns):
+        """
+        Returns a new Column holding the triples of @columns one after the
+        other, e.g. to merge chunks shredded separately. Levels are re-encoded
+        and dictionaries merged; values of dictionary encoded columns stay
+        dictionary encoded if all of @columns are and the merged dictionary is
+        not full.
+        """
+        first = columns[0]
+        is_dictionary = first.values.encoding == "dictionary"
+        column = cls(
+            first.max_repetition_level,
+            first.max_definition_level,
+            dictionary_encoding=is_dictionary,
+            max_dictionary_size=(
+                first.values.max_dictionary_size
+                if is_dictionary
+                else DEFAULT_MAX_DICTIONARY_SIZE
+            ),
+        )
+        for part in columns:
+            column.extend(part)
+        return column
+
+    def extend(self, other):
+        """
+        Appends the triples of the Column @other, copying its levels and values
+        in bulk. Dictionary encoded values stay dictionary
+        encoded if those of @other are too and the merged dictionary is not
+        full.
+        """
+        self.repetition_levels.extend(other.repetition_levels)
+        self.definition_levels.extend(other.definition_levels)
+        if self.values.encoding == "dictionary":
+            if other.values.encoding == "dictionary":
+                self.values.extend(other.values)
+                if self.values.is_full:
+                    self.values = self.values.to_plain()
+            else:
+                self.values = self.values.to_plain()
+                self.values.extend(other.values)
+        else:
+            self.values.extend(other.values)
+        self._decoded = None
+        self.record_index = None
+        self.statistics = None
+
+    def view(self):
+        """
+        Returns a read-only Column over the triples appended so far, in O(1).
+        It shares the buffers of this Column, which can still be appended to
+        as they are append-only, and only reads up to their current lengths.
+        """
+        return Column.from_buffers(
+            self.max_repetition_level,
+            self.max_definition_level,
+            self.repetition_levels.view(),
+            self.definition_levels.view(),
+            self.values.view(),
+        )
+
+    def _append_dictionary_value(self, value):
+        try:
+            self.values.append(value)
+        except TypeError:
+            # Unhashable values can not be dictionary encoded
+            self.values = self.values.to_plain()
+            self.values.append(value)
+            return
+        if self.values.is_full:
+            self.values = self.values.to_plain()
+
+    def __len__(self):
+        return len(self.definition_levels)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Column index out of range")
+
+        if self._decoded is None:
+            repetition_levels, definition_levels = self.levels_to_numpy()
+            is_value = definition_levels == self.max_definition_level
+            self._decoded = (
+                repetition_levels,
+                definition_levels,
+                np.cumsum(is_value) - is_value,
+            )
+
+        repetition_levels, definition_levels, value_positions = self._decoded
+        r = int(repetition_levels[index])
+        d = int(definition_levels[index])
+        if d != self.max_definition_level:
+            return (None, r, d)
+        return (self.values[int(value_positions[index])], r, d)
+
+    def __iter__(self):
+        values = iter(self.values)
+        max_definition_level = self.max_definition_level
+        for r, d in self.iter_levels():
+            yield (next(values) if d == max_definition_level else None, r, d)
+
+    def record_starts(self):
+        """
+        Returns the positions of the triples starting a record, i.e. with
+        r == 0, as a NumPy array.
+        """
+        return np.flatnonzero(self.repetition_levels.to_numpy() == 0)
+
+    def split(self, positions):
+        """
+        Returns new Columns holding copies of the triples between consecutive
+        @positions, e.g. record starts. Levels are only decoded once.
+        """
+        repetition_levels, definition_levels = self.levels_to_numpy()
+        # Number of values before each position
+        value_positions = np.concatenate(
+            ([0], np.cumsum(definition_levels == self.max_definition_level))
+        )
+        parts = []
+        for start, stop in zip(positions[:-1], positions[1:]):
+            parts.append(
+                Column.from_buffers(
+                    self.max_repetition_level,
+                    self.max_definition_level,
+                    EncodedLevels.from_numpy(
+                        self.max_repetition_level, repetition_levels[start:stop]
+                    ),
+                    EncodedLevels.from_numpy(
+                        self.max_definition_level, definition_levels[start:stop]
+                    ),
+                    self.values.slice(
+                        int(value_positions[start]), int(value_positions[stop])
+                    ),
+                )
+            )
+        return parts
+
+    def iter_levels(self, start=0):
+        """
+        Returns an iterator over the (r, d) levels of the column, from position
+        @start on.
+        """
+        return zip(
+            self.repetition_levels.iter_from(start),
+            self.definition_levels.iter_from(start),
+        )
+
+    def compute_statistics(self):
+        """
+        Computes, sets and returns the ColumnStatistics of the column. They are
+        dropped when appending to the column.
+        """
+        self.statistics = ColumnStatistics.compute(self)
+        return self.statistics
+
+    def build_record_index(self, interval=DEFAULT_RECORD_INDEX_INTERVAL):
+        """
+        Builds, sets and returns the RecordIndex of the column. The index is
+        dropped when appending to the column.
+        """
+        self.record_index = RecordIndex.build(self, interval)
+        return self.record_index
+
+    def __eq__(self, other):
+        if not isinstance(other, collections.abc.Sequence) or isinstance(
+            other, (str, bytes)
+        ):
+            return NotImplemented
+        return len(self) == len(other) and all(
+            tuple(a) == tuple(b) for a, b in zip(self, other)
+        )
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Column({self.to_tuples()})"
+
+    def to_tuples(self):
+        return list(self)
+
+    def levels_to_numpy(self):
+        """
+        Returns the decoded (repetition, definition) levels as NumPy arrays.
+        """
+        return self.repetition_levels.to_numpy(), self.definition_levels.to_numpy()
+
+    @property
+    def nbytes(self):
+        return (
+            self.repetition_levels.nbytes
+            + self.definition_levels.nbytes
+            + self.values.nbytes
+        )
@@ -0,0 +1,359 @@
+import array
+import unittest
+
+import numpy as np
+
+from column import Column, DictionaryValueBuffer, ValueBuffer
+from paper_schema import PaperSchema
+from schema import parse_schema
+from shred import shred_records
+from test_utils import get_desc
+
+
+class TestValueBuffer(unittest.TestCase):
+    def test_ints(self):
+        values = ValueBuffer()
+        for value in [1, 2, -3]:
+            values.append(value)
+
+        self.assertEqual(values.kind, "int")
+        self.assertEqual(list(values), [1, 2, -3])
+        self.assertEqual(values[2], -3)
+        np.testing.assert_array_equal(values.to_numpy(), np.array([1, 2, -3]))
+        self.assertEqual(values.to_numpy().dtype, np.int64)
+
+    def test_floats(self):
+        values = ValueBuffer()
+        for value in [1.5, 2.0]:
+            values.append(value)
+
+        self.assertEqual(values.kind, "float")
+        self.assertEqual(list(values), [1.5, 2.0])
+        self.assertEqual(values.to_numpy().dtype, np.float64)
+
+    def test_strings(self):
+        values = ValueBuffer()
+        for value in ["en-us", "", "日本"]:
+            values.append(value)
+
+        self.assertEqual(values.kind, "str")
+        self.assertEqual(list(values), ["en-us", "", "日本"])
+        self.assertEqual(values[2], "日本")
+        self.assertEqual(len(values), 3)
+
+    def test_mixed_kinds_fall_back_to_objects(self):
+        values = ValueBuffer()
+        for value in [1, "a", True, 2**70]:
+            values.append(value)
+
+        self.assertEqual(values.kind, "object")
+        self.assertEqual(list(values), [1, "a", True, 2**70])
+        self.assertIs(values[2], True)
+
+    def test_from_list(self):
+        for values, kind in [
+            ([1, 2, -3], "int"),
+            ([1.5, 2.0], "float"),
+            (["en-us", "", "日本"], "str"),
+            ([1, 2.5], "object"),
+            ([2**70], "object"),
+            ([True], "object"),
+            ([], None),
+        ]:
+            buffer = ValueBuffer.from_list(values)
+            self.assertEqual(buffer.kind, kind)
+            self.assertEqual(list(buffer), values)
+            buffer.append(values[0] if values else 1)
+            self.assertEqual(len(buffer), len(values) + 1)
+
+
+class TestDictionaryValueBuffer(unittest.TestCase):
+    def test_codes(self):
+        values = DictionaryValueBuffer()
+        for value in ["us", "gb", "us", "us", "gb"]:
+            values.append(value)
+
+        self.assertEqual(values.kind, "str")
+        self.assertEqual(list(values.dictionary), ["us", "gb"])
+        self.assertEqual(list(values.codes), [0, 1, 0, 0, 1])
+        self.assertEqual(list(values), ["us", "gb", "us", "us", "gb"])
+        self.assertEqual(list(values.iter_from(3)), ["us", "gb"])
+        self.assertEqual(values[1], "gb")
+        self.assertEqual(values.lookup("gb"), 1)
+        self.assertIsNone(values.lookup("fr"))
+        np.testing.assert_array_equal(values.codes_to_numpy(), [0, 1, 0, 0, 1])
+
+    def test_values_of_different_types_get_different_codes(self):
+        values = DictionaryValueBuffer()
+        for value in [1, 1.0, True]:
+            values.append(value)
+
+        self.assertEqual(list(values.codes), [0, 1, 2])
+        self.assertIs(values[2], True)
+        self.assertEqual(values.lookup(1.0), 1)
+        self.assertIsNone(values.lookup([1]))
+
+    def test_lookup_read_only(self):
+        values = DictionaryValueBuffer.from_buffers(
+            ValueBuffer.from_list(["us", "gb"]), array.array("H", [1, 0])
+        )
+        self.assertEqual(values.lookup("gb"), 1)
+        self.assertIsNone(values.lookup("fr"))
+
+    def test_max_dictionary_size(self):
+        for max_dictionary_size in [2**16 - 1, 2**16]:
+            values = DictionaryValueBuffer(max_dictionary_size)
+            for value in range(max_dictionary_size + 1):
+                values.append(value)
+            self.assertTrue(values.is_full)
+            self.assertEqual(values[-1], max_dictionary_size)
+
+        values = DictionaryValueBuffer(2**16 - 1)
+        other = DictionaryValueBuffer(2**16 - 1)
+        for value in range(40000):
+            values.append(value)
+            other.append(-value - 1)
+        values.extend(other)
+        self.assertTrue(values.is_full)
+        self.assertEqual(values[-1], -40000)
+
+
+class TestColumn(unittest.TestCase):
+    def test_compatibility_view(self):
+        s = PaperSchema()
+        data = [("en-us", 0, 3), ("en", 2, 3), (None, 1, 1), ("en-gb", 1, 3)]
+        column = Column.from_tuples(s.name_language_code, data)
+
+        self.assertEqual(column, data)
+        self.assertEqual(column.to_tuples(), data)
+        self.assertEqual(list(column), data)
+        self.assertEqual(len(column), 4)
+        self.assertEqual(column[1], ("en", 2, 3))
+        self.assertEqual(column[2], (None, 1, 1))
+        self.assertEqual(column[-1], ("en-gb", 1, 3))
+        self.assertEqual(column[1:3], data[1:3])
+        with self.assertRaises(IndexError):
+            column[4]
+
+    def test_only_non_null_values_are_stored(self):
+        s = PaperSchema()
+        column = Column.from_tuples(
+            s.links_backward, [(None, 0, 1), (10, 0, 2), (30, 1, 2)]
+        )
+
+        self.assertEqual(list(column.values), [10, 30])
+        repetition_levels, definition_levels = column.levels_to_numpy()
+        self.assertEqual(repetition_levels.dtype, np.uint8)
+        np.testing.assert_array_equal(repetition_levels, [0, 0, 1])
+        np.testing.assert_array_equal(definition_levels, [1, 2, 2])
+
+    def test_shred_records_produces_columns(self):
+        schema = parse_schema(["a[*].b", "c"])
+        records = [{"a": [{"b": i} for i in range(100)], "c": "x"}] * 10
+        result = shred_records(schema, records)
+
+        column = result[get_desc(schema, "a[*].b")]
+        self.assertIsInstance(column, Column)
+        self.assertEqual(column.values.kind, "int")
+        # 8 bytes per value, while the runs of levels take a few bytes per record
+        self.assertEqual(column.values.nbytes, 1000 * 8)
+        self.assertEqual(len(column.repetition_levels.data), 10 * 5)
+        self.assertEqual(len(column.definition_levels.data), 3)
+
+    def test_dictionary_encoding(self):
+        s = PaperSchema()
+        data = [("us", 0, 3), (None, 2, 2), (None, 1, 1), ("gb", 1, 3), ("us", 0, 3)]
+        column = Column.from_tuples(s.name_language_country, data)
+        encoded = Column.for_descriptor(
+            s.name_language_country, dictionary_encoding=True
+        )
+        for value, r, d in data:
+            encoded.append(value, r, d)
+
+        self.assertEqual(encoded.values.encoding, "dictionary")
+        self.assertEqual(encoded, data)
+        self.assertEqual(encoded[4], ("us", 0, 3))
+        self.assertEqual(list(encoded.values.codes), [0, 1, 0])
+        self.assertEqual(column.values.encoding, "plain")
+
+    def test_dictionary_encoding_fallback(self):
+        s = PaperSchema()
+        column = Column.for_descriptor(
+            s.doc_id, dictionary_encoding=True, max_dictionary_size=2
+        )
+        for value in [1, 2, 1, 2]:
+            column.append(value, 0, 1)
+        self.assertEqual(column.values.encoding, "dictionary")
+
+        column.append(3, 0, 1)
+        self.assertEqual(column.values.encoding, "plain")
+        self.assertEqual(column.values.kind, "int")
+        self.assertEqual([v for v, _, _ in column], [1, 2, 1, 2, 3])
+
+    def test_dictionary_encoding_unhashable_values(self):
+        s = PaperSchema()
+        column = Column.for_descriptor(s.doc_id, dictionary_encoding=True)
+        column.append("a", 0, 1)
+        column.append({"b": 1}, 0, 1)
+
+        self.assertEqual(column.values.encoding, "plain")
+        self.assertEqual(column, [("a", 0, 1), ({"b": 1}, 0, 1)])
+
+    def test_concat(self):
+        s = PaperSchema()
+        a = [("en-us", 0, 3), ("en", 2, 3), (None, 1, 1)]
+        b = [("en-gb", 0, 3), (None, 0, 1)]
+
+        for dictionary_encoding in [False, True]:
+            parts = []
+            for data in [a, [], b]:
+                part = Column.for_descriptor(
+                    s.name_language_code, dictionary_encoding=dictionary_encoding
+                )
+                for value, r, d in data:
+                    part.append(value, r, d)
+                parts.append(part)
+
+            column = Column.concat(parts)
+            self.assertEqual(column, a + b)
+            self.assertEqual(column.values.encoding, parts[0].values.encoding)
+
+    def test_concat_mixed_kinds(self):
+        s = PaperSchema()
+        ints = Column.from_tuples(s.doc_id, [(1, 0, 1), (2, 0, 1)])
+        strings = Column.from_tuples(s.doc_id, [("a", 0, 1)])
+        dictionary = Column.for_descriptor(s.doc_id, dictionary_encoding=True)
+        dictionary.append(1.5, 0, 1)
+
+        column = Column.concat([ints, strings, dictionary])
+        self.assertEqual(column.values.encoding, "plain")
+        self.assertEqual(column.values.kind, "object")
+        self.assertEqual(column, [(1, 0, 1), (2, 0, 1), ("a", 0, 1), (1.5, 0, 1)])
+
+    def test_split(self):
+        s = PaperSchema()
+        data = [("en-us", 0, 3), ("en", 2, 3), (None, 1, 1), ("en-gb", 1, 3)]
+        data += [(None, 0, 1), ("fr", 0, 3), ("de", 1, 3)]
+
+        for dictionary_encoding in [False, True]:
+            column = Column.for_descriptor(
+                s.name_language_code, dictionary_encoding=dictionary_encoding
+            )
+            for value, r, d in data:
+                column.append(value, r, d)
+
+            record_starts = column.record_starts()
+            np.testing.assert_array_equal(record_starts, [0, 4, 5])
+            parts = column.split([0, 4, 5, 7])
+            self.assertEqual(
+                [part.to_tuples() for part in parts],
+                [
+                    data[:4],
+                    data[4:5],
+                    data[5:],
+                ],
+            )
+            self.assertEqual(parts[2].values.encoding, column.values.encoding)
+
+    def test_view(self):
+        s = PaperSchema()
+        for values in [[1, 2], [1.5, 2.5], ["en", "fr"], [True, 1]]:
+            for dictionary_encoding in [False, True]:
+                column = Column.for_descriptor(
+                    s.name_language_code, dictionary_encoding=dictionary_encoding
+                )
+                column.append(values[0], 0, 3)
+                column.append(None, 1, 1)
+                expected = column.to_tuples()
+                view = column.view()
+                # Arrays of the view do not prevent appending to the column
+                numpy_values = view.values.to_numpy()
+                levels = view.levels_to_numpy()
+                column.append(values[1], 0, 3)
+                column.append(None, 0, 0)
+
+                self.assertEqual(view, expected)
+                self.assertEqual(list(numpy_values), values[:1])
+                np.testing.assert_array_equal(levels, [[0, 1], [3, 1]])
+                self.assertEqual(view.values.encoding, column.values.encoding)
+                copy = Column.concat([view])
+                self.assertEqual(copy, expected)
+                self.assertEqual(view.values.nbytes, copy.values.nbytes)
+                self.assertEqual(Column.concat([view, view]), expected * 2)
+
+    def test_record_index(self):
+        schema = parse_schema(["a[*]"])
+        records = [{"a": list(range(i % 4))} for i in range(10)]
+        column = shred_records(schema, records)[get_desc(schema, "a[*]")]
+
+        index = column.build_record_index(interval=3)
+        self.assertIs(column.record_index, index)
+        self.assertEqual(index.num_records, 10)
+        # Records 0, 3, 6 and 9 start at these triples and values
+        self.assertEqual(list(index.level_positions), [0, 4, 9, 15])
+        self.assertEqual(list(index.value_positions), [0, 3, 7, 12])
+        self.assertEqual(index.locate(4), (4, 3, 1))
+        self.assertEqual(index.locate(12), (15, 12, 3))
+
+        column.append(1, 0, 1)
+        self.assertIsNone(column.record_index)
+
+    def test_statistics(self):
+        s = PaperSchema()
+        shredded = shred_records(s.root, s.records)
+
+        statistics = shredded[s.name_language_code].compute_statistics()
+        self.assertIs(shredded[s.name_language_code].statistics, statistics)
+        self.assertEqual(
+            statistics.to_dict(),
+            {
+                "value_count": 3,
+                "null_count": 2,
+                "distinct_count": 3,
+                "min_value": "en",
+                "max_value": "en-us",
+            },
+        )
+        self.assertEqual(
+            shredded[s.links_backward].compute_statistics().to_dict(),
+            {
+                "value_count": 2,
+                "null_count": 1,
+                "distinct_count": 2,
+                "min_value": 10,
+                "max_value": 30,
+            },
+        )
+
+    def test_statistics_edge_cases(self):
+        s = PaperSchema()
+        nulls = Column.from_tuples(s.doc_id, [(None, 0, 0)])
+        self.assertEqual(nulls.compute_statistics().value_count, 0)
+        self.assertIsNone(nulls.statistics.min_value)
+
+        mixed = Column.from_tuples(s.doc_id, [(1, 0, 1), ("a", 0, 1), (1, 0, 1)])
+        statistics = mixed.compute_statistics()
+        self.assertIsNone(statistics.min_value)
+        self.assertEqual(statistics.distinct_count, 2)
+
+        objects = Column.from_tuples(
+            s.doc_id, [(True, 0, 1), (1, 0, 1), (True, 0, 1), (False, 0, 1)]
+        )
+        self.assertEqual(objects.compute_statistics().distinct_count, 3)
+        objects.append({"a": 1}, 0, 1)
+        self.assertIsNone(objects.compute_statistics().distinct_count)
+
+        encoded = Column.for_descriptor(s.doc_id, dictionary_encoding=True)
+        for value in [3, 1, 3]:
+            encoded.append(value, 0, 1)
+        statistics = encoded.compute_statistics()
+        self.assertEqual(
+            (statistics.distinct_count, statistics.min_value, statistics.max_value),
+            (2, 1, 3),
+        )
+        encoded.append(4, 0, 1)
+        self.assertIsNone(encoded.statistics)
+
+
+if __name__ == "__main__":
+    unittest.main()
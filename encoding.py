@@ -0,0 +1,398 @@
+import array
+import itertools
+
+import numpy as np
+
+# Runs shorter than this are bit-packed along with their neighbours
+MIN_RLE_RUN = 8
+# Bit-packed values are flushed in groups of 8, and at the latest once this
+# many are pending
+MAX_PENDING_LITERALS = 512
+
+
+def bit_width(max_level):
+    """
+    Returns the number of bits needed for levels in [0, @max_level].
+    """
+    return max_level.bit_length()
+
+
+def _write_varint(buffer, value):
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _pack(values, width):
+    """
+    Bit-packs @values (a multiple of 8 of them), least significant bit first.
+    """
+    if width == 0:
+        return b""
+    values = np.asarray(values, dtype=np.uint16)
+    bits = (values[:, None] >> np.arange(width, dtype=np.uint16)) & 1
+    return np.packbits(bits.astype(np.uint8).ravel(), bitorder="little").tobytes()
+
+
+def _unpack(data, width, count):
+    if width == 0:
+        return np.zeros(count, dtype=np.uint16)
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), bitorder="little")
+    weights = np.left_shift(1, np.arange(width, dtype=np.uint16), dtype=np.uint16)
+    return bits[: count * width].reshape(count, width).astype(np.uint16) @ weights
+
+
+class LevelEncoder:
+    """
+    Incrementally encodes levels with the RLE / bit-packing hybrid of Parquet.
+
+    The output is a sequence of runs, each starting with a ULEB128 header:
+    - `count << 1` for a run of @count repeated values, followed by the value
+      in ceil(bit_width / 8) little endian bytes
+    - `groups << 1 | 1` for @groups groups of 8 bit-packed values, each taking
+      bit_width bytes
+
+    The last bit-packed group is padded with zeros, so decoders need the number
+    of encoded values.
+    """
+
+    def __init__(self, bit_width):
+        self.bit_width = bit_width
+        self.count = 0
+        self._buffer = bytearray()
+        self._literals = []
+        self._run_value = None
+        self._run_length = 0
+
+    def append(self, level):
+        self.count += 1
+        if level == self._run_value:
+            self._run_length += 1
+            return
+        self._end_run(self._buffer, self._literals, final=False)
+        self._run_value = level
+        self._run_length = 1
+
+    def extend(self, levels):
+        for level in levels:
+            self.append(level)
+
+    def append_run(self, level, length):
+        """
+        Appends @length times @level.
+        """
+        if length == 0:
+            return
+        self.count += length
+        if level == self._run_value:
+            self._run_length += length
+            return
+        self._end_run(self._buffer, self._literals, final=False)
+        self._run_value = level
+        self._run_length = length
+
+    def _end_run(self, buffer, literals, final):
+        value = self._run_value
+        length = self._run_length
+        if length >= MIN_RLE_RUN:
+            # Bit-packed runs must hold whole groups of 8 values, borrow from
+            # the run to complete the pending ones
+            borrowed = -len(literals) % 8
+            if length - borrowed >= MIN_RLE_RUN:
+                literals.extend([value] * borrowed)
+                self._flush_literals(buffer, literals, pad=False)
+                _write_varint(buffer, (length - borrowed) << 1)
+                buffer += int(value).to_bytes((self.bit_width + 7) // 8, "little")
+                return
+        literals.extend([value] * length)
+        if final or len(literals) >= MAX_PENDING_LITERALS:
+            self._flush_literals(buffer, literals, pad=final)
+
+    def _flush_literals(self, buffer, literals, pad):
+        """
+        Writes the pending literals in whole groups of 8, padding the last one
+        with zeros if @pad is set and keeping the remaining ones otherwise.
+        """
+        if pad:
+            literals.extend([0] * (-len(literals) % 8))
+        flushed = len(literals) - len(literals) % 8
+        if flushed == 0:
+            return
+        _write_varint(buffer, (flushed // 8) << 1 | 1)
+        buffer += _pack(literals[:flushed], self.bit_width)
+        del literals[:flushed]
+
+    @property
+    def nbytes(self):
+        """
+        Returns the size of the levels appended so far, estimating the size of
+        the pending ones without encoding them.
+        """
+        pending = len(self._literals) + min(self._run_length, MIN_RLE_RUN)
+        return len(self._buffer) + (pending * self.bit_width + 7) // 8
+
+    def getvalue(self):
+        """
+        Returns the encoded levels appended so far. The encoder can still be
+        appended to afterwards.
+        """
+        buffer = bytearray(self._buffer)
+        if self._run_length:
+            self._end_run(buffer, list(self._literals), final=True)
+        return bytes(buffer)
+
+
+def _write_literals(buffer, values, bit_width):
+    values = np.concatenate((values, np.zeros(-len(values) % 8, dtype=values.dtype)))
+    # NOTE: split like LevelEncoder does, so that seeking into a bit-packed run
+    # only decodes a bounded number of levels
+    for start in range(0, len(values), MAX_PENDING_LITERALS):
+        literals = values[start : start + MAX_PENDING_LITERALS]
+        _write_varint(buffer, (len(literals) // 8) << 1 | 1)
+        buffer += _pack(literals, bit_width)
+
+
+def encode_levels(levels, bit_width):
+    """
+    Encodes a NumPy array of @levels at once, in the same format as
+    LevelEncoder. Only runs long enough to stay repeated runs after completing
+    the preceding bit-packed group are run length encoded, everything else is
+    bit-packed in bulk.
+    """
+    buffer = bytearray()
+    count = len(levels)
+    if count == 0:
+        return bytes(buffer)
+    run_starts = np.concatenate(([0], np.flatnonzero(np.diff(levels)) + 1))
+    run_lengths = np.diff(run_starts, append=count)
+    long_runs = np.flatnonzero(run_lengths >= MIN_RLE_RUN + 7)
+
+    # Position of the first level not encoded yet
+    pos = 0
+    for start, length in zip(
+        run_starts[long_runs].tolist(), run_lengths[long_runs].tolist()
+    ):
+        # Borrow from the run to complete the last bit-packed group
+        literals_end = start + (pos - start) % 8
+        if literals_end > pos:
+            _write_literals(buffer, levels[pos:literals_end], bit_width)
+        end = start + length
+        _write_varint(buffer, (end - literals_end) << 1)
+        buffer += int(levels[start]).to_bytes((bit_width + 7) // 8, "little")
+        pos = end
+    if pos < count:
+        _write_literals(buffer, levels[pos:], bit_width)
+    return bytes(buffer)
+
+
+def iter_runs(data, bit_width, count, pos=0, start=0):
+    """
+    Yields the runs of encoded levels as (start, length, value) for repeated
+    runs and (start, length, values) for bit-packed ones, where @start is the
+    position of the first level of the run.
+
+    Decoding can resume from the run starting at byte @pos and level @start,
+    see run_directory.
+    """
+    value_width = (bit_width + 7) // 8
+    while start < count:
+        header, pos = _read_varint(data, pos)
+        if header & 1:
+            length = (header >> 1) * 8
+            end = pos + (header >> 1) * bit_width
+            values = _unpack(data[pos:end], bit_width, length)
+            pos = end
+            length = min(length, count - start)
+            yield start, length, values[:length]
+        else:
+            length = min(header >> 1, count - start)
+            value = int.from_bytes(data[pos : pos + value_width], "little")
+            pos += value_width
+            yield start, length, value
+        start += length
+
+
+def run_directory(data, bit_width, count):
+    """
+    Returns the position of the first level of every run and the byte offset of
+    its header, as two NumPy arrays. Only run headers are read.
+    """
+    value_width = (bit_width + 7) // 8
+    starts = []
+    offsets = []
+    pos = 0
+    start = 0
+    while start < count:
+        starts.append(start)
+        offsets.append(pos)
+        header, pos = _read_varint(data, pos)
+        if header & 1:
+            start += (header >> 1) * 8
+            pos += (header >> 1) * bit_width
+        else:
+            start += header >> 1
+            pos += value_width
+    return np.array(starts, dtype=np.int64), np.array(offsets, dtype=np.int64)
+
+
+def iter_levels(data, bit_width, count, pos=0, start=0):
+    """
+    Lazily decodes @count levels from @data, optionally resuming from a run as
+    in iter_runs.
+    """
+    for _, length, value in iter_runs(data, bit_width, count, pos, start):
+        if isinstance(value, int):
+            yield from itertools.repeat(value, length)
+        else:
+            yield from value.tolist()
+
+
+def decode_levels(data, bit_width, count, dtype=np.uint16):
+    """
+    Decodes @count levels from @data into a NumPy array.
+    """
+    result = np.empty(count, dtype=dtype)
+    for start, length, value in iter_runs(data, bit_width, count):
+        result[start : start + length] = value
+    return result
+
+
+class EncodedLevels:
+    """
+    The repetition or definition levels of a column. Appended levels are
+    buffered as they are in a growable array, and encoded in bulk with
+    encode_levels when the encoded bytes are needed (e.g. to write the column
+    or measure its size).
+    """
+
+    def __init__(self, max_level):
+        self.max_level = max_level
+        self.bit_width = bit_width(max_level)
+        self._dtype = np.uint8 if max_level < 2**8 else np.uint16
+        # Raw levels, None until appended to for levels over encoded bytes
+        self._levels = array.array("B" if max_level < 2**8 else "H")
+        self._count = 0
+        # Encoded bytes, cached until the next append
+        self._data = b""
+        # Cached run_directory() of the encoded bytes
+        self._run_directory = None
+
+    @classmethod
+    def from_buffer(cls, max_level, data, count):
+        """
+        Returns levels over already encoded @data. They are decoded on the first
+        append.
+        """
+        levels = cls(max_level)
+        levels._levels = None
+        levels._count = count
+        levels._data = data
+        return levels
+
+    @classmethod
+    def from_numpy(cls, max_level, array):
+        """
+        Returns levels encoding a NumPy @array of levels in bulk, see
+        from_buffer.
+        """
+        return cls.from_buffer(
+            max_level, encode_levels(array, bit_width(max_level)), len(array)
+        )
+
+    def view(self):
+        """
+        Returns read-only levels over the levels appended so far, sharing the
+        buffer of these ones, which can still be appended to, in O(1).
+        """
+        if self._levels is None:
+            return EncodedLevels.from_buffer(self.max_level, self._data, self._count)
+        levels = EncodedLevels(self.max_level)
+        levels._levels = self._levels
+        levels._count = self._count
+        levels._data = self._data
+        return levels
+
+    def _get_levels(self):
+        if self._levels is None:
+            levels = array.array("B" if self.max_level < 2**8 else "H")
+            levels.frombytes(self.to_numpy())
+            self._levels = levels
+        return self._levels
+
+    def append(self, level):
+        if self._levels is None:
+            self._get_levels()
+        self._levels.append(level)
+        self._count += 1
+        self._data = None
+
+    def extend(self, levels):
+        """
+        Appends the levels of another EncodedLevels.
+        """
+        self._get_levels().frombytes(levels.to_numpy().astype(self._dtype, copy=False))
+        self._count += len(levels)
+        self._data = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = encode_levels(self.to_numpy(), self.bit_width)
+            self._run_directory = None
+        return self._data
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return self.iter_from(0)
+
+    def iter_from(self, start):
+        """
+        Returns an iterator over the levels from position @start on, only
+        decoding from the run holding it if the levels are not buffered.
+        """
+        if self._levels is not None:
+            return iter(self._levels[start : self._count])
+        if start == 0:
+            return iter_levels(self._data, self.bit_width, self._count)
+        if start >= self._count:
+            return iter(())
+        if self._run_directory is None:
+            self._run_directory = run_directory(self._data, self.bit_width, self._count)
+        run_starts, run_offsets = self._run_directory
+        run = int(np.searchsorted(run_starts, start, side="right")) - 1
+        run_start = int(run_starts[run])
+        levels = iter_levels(
+            self._data, self.bit_width, self._count, int(run_offsets[run]), run_start
+        )
+        return itertools.islice(levels, start - run_start, None)
+
+    def to_numpy(self):
+        if self._levels is not None:
+            # NOTE: view a copy, exporting the buffer would prevent appends
+            return np.frombuffer(self._levels[: self._count], dtype=self._dtype)
+        return decode_levels(self._data, self.bit_width, self._count, self._dtype)
+
+    @property
+    def nbytes(self):
+        """
+        Returns the size of the encoded levels. Until they are encoded, it is
+        estimated as if they were all bit-packed, without encoding them.
+        """
+        if self._data is None:
+            return (self._count * self.bit_width + 7) // 8
+        return len(self._data)
@@ -0,0 +1,165 @@
+import random
+import unittest
+
+import numpy as np
+
+from encoding import (
+    EncodedLevels,
+    LevelEncoder,
+    bit_width,
+    decode_levels,
+    encode_levels,
+    iter_levels,
+)
+
+
+def encode(levels, width):
+    encoder = LevelEncoder(width)
+    encoder.extend(levels)
+    return encoder.getvalue()
+
+
+class TestLevelEncoding(unittest.TestCase):
+    def test_bit_width(self):
+        self.assertEqual(
+            [bit_width(m) for m in [0, 1, 2, 3, 4, 255, 256]], [0, 1, 2, 2, 3, 8, 9]
+        )
+
+    def test_repeated_run(self):
+        data = encode([3] * 100, 2)
+
+        # Header 100 << 1, then the value in a single byte
+        self.assertEqual(data, bytes([200, 1, 3]))
+        self.assertEqual(list(iter_levels(data, 2, 100)), [3] * 100)
+
+    def test_bit_packed(self):
+        levels = [0, 1, 2, 3, 0, 1]
+        data = encode(levels, 2)
+
+        # One group of 8 values, padded with zeros, 2 bits each
+        self.assertEqual(data, bytes([0b11, 0b11100100, 0b00000100]))
+        self.assertEqual(list(iter_levels(data, 2, 6)), levels)
+
+    def test_bit_packed_then_run(self):
+        levels = [1, 0, 1] + [0] * 20
+        data = encode(levels, 1)
+
+        # The first group of 8 borrows 5 values from the run
+        self.assertEqual(data, bytes([0b11, 0b101, 15 << 1, 0]))
+        self.assertEqual(list(iter_levels(data, 1, len(levels))), levels)
+
+    def test_zero_bit_width(self):
+        data = encode([0] * 10, 0)
+
+        self.assertEqual(data, bytes([20]))
+        self.assertEqual(list(iter_levels(data, 0, 10)), [0] * 10)
+
+    def test_round_trip(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            max_level = rng.choice([0, 1, 3, 7, 300])
+            levels = []
+            while len(levels) < rng.randint(0, 2000):
+                levels.extend([rng.randint(0, max_level)] * rng.choice([1, 2, 9, 50]))
+            width = bit_width(max_level)
+            data = encode(levels, width)
+
+            self.assertEqual(list(iter_levels(data, width, len(levels))), levels)
+            np.testing.assert_array_equal(
+                decode_levels(data, width, len(levels)), levels
+            )
+
+    def test_encode_levels(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            max_level = rng.choice([0, 1, 3, 7, 300])
+            levels = []
+            while len(levels) < rng.randint(0, 2000):
+                levels.extend([rng.randint(0, max_level)] * rng.choice([1, 2, 9, 50]))
+            width = bit_width(max_level)
+            data = encode_levels(np.array(levels, dtype=np.uint16), width)
+
+            self.assertEqual(list(iter_levels(data, width, len(levels))), levels)
+
+    def test_getvalue_does_not_finish_encoding(self):
+        encoder = LevelEncoder(1)
+        encoder.extend([1, 0, 1])
+        encoder.getvalue()
+        encoder.extend([0] * 20)
+
+        self.assertEqual(
+            list(iter_levels(encoder.getvalue(), 1, 23)), [1, 0, 1] + [0] * 20
+        )
+
+
+class TestEncodedLevels(unittest.TestCase):
+    def test_append_and_iterate(self):
+        levels = EncodedLevels(2)
+        for level in [0, 2, 2, 1]:
+            levels.append(level)
+
+        self.assertEqual(len(levels), 4)
+        self.assertEqual(list(levels), [0, 2, 2, 1])
+        levels.append(0)
+        self.assertEqual(list(levels), [0, 2, 2, 1, 0])
+        np.testing.assert_array_equal(levels.to_numpy(), [0, 2, 2, 1, 0])
+
+    def test_from_buffer(self):
+        levels = EncodedLevels.from_buffer(1, memoryview(encode([1] * 16, 1)), 16)
+
+        self.assertEqual(list(levels), [1] * 16)
+
+    def test_append_to_buffer(self):
+        levels = EncodedLevels.from_buffer(3, encode([3] * 10 + [1], 2), 11)
+        iterator = iter(levels)
+        levels.append(2)
+
+        self.assertEqual(list(iterator), [3] * 10 + [1])
+        self.assertEqual(list(levels), [3] * 10 + [1, 2])
+        self.assertEqual(levels.nbytes, 3)
+        self.assertEqual(list(iter_levels(levels.data, 2, 12)), [3] * 10 + [1, 2])
+        self.assertEqual(levels.nbytes, len(levels.data))
+
+    def test_iter_from(self):
+        rng = random.Random(0)
+        levels = []
+        while len(levels) < 3000:
+            levels.extend([rng.randint(0, 3)] * rng.choice([1, 2, 9, 50]))
+        encoded = EncodedLevels(3)
+        for level in levels:
+            encoded.append(level)
+        from_numpy = EncodedLevels.from_numpy(3, np.array(levels))
+
+        for start in [0, 1, 7, 8, 100, 1234, len(levels) - 1, len(levels), 5000]:
+            self.assertEqual(list(encoded.iter_from(start)), levels[start:])
+            self.assertEqual(list(from_numpy.iter_from(start)), levels[start:])
+
+    def test_dense_levels_compress(self):
+        levels = EncodedLevels(3)
+        for _ in range(10000):
+            levels.append(3)
+
+        self.assertEqual(len(levels.data), 4)
+
+    def test_extend(self):
+        rng = random.Random(0)
+        parts = [
+            [0] * 20 + [1, 2] * 5,
+            [],
+            [2] * 3,
+            [rng.randrange(3) for _ in range(99)],
+        ]
+        levels = EncodedLevels(2)
+        for part in parts:
+            other = EncodedLevels(2)
+            for level in part:
+                other.append(level)
+            levels.extend(other)
+
+        expected = [level for part in parts for level in part]
+        self.assertEqual(len(levels), len(expected))
+        self.assertEqual(list(levels), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
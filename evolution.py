@@ -0,0 +1,79 @@
+import numpy as np
+
+from column import Column
+from encoding import EncodedLevels
+from schema import common_ancestor, get_ancestors, get_leaves
+
+
+def null_column(leaf, reference_leaf, reference_column):
+    """
+    Returns the Column of the leaf ColumnDescriptor @leaf for records in which
+    it is always missing, synthesized from the levels of @reference_column, the
+    column of another leaf of the same schema, without the records.
+
+    All the ancestors of @leaf present in the records must be ancestors of
+    @reference_leaf too. @leaf then gets a null at every instance of their
+    common ancestor: a triple for each triple of the reference column that
+    does not repeat below it (r <= its repetition level), with the definition
+    level capped at its own.
+    """
+    ancestor = common_ancestor(leaf, reference_leaf)
+    repetition_levels, definition_levels = reference_column.levels_to_numpy()
+    starts_instance = repetition_levels <= ancestor.max_repetition_level
+
+    column = Column.for_descriptor(leaf)
+    column.repetition_levels = EncodedLevels.from_numpy(
+        leaf.max_repetition_level, repetition_levels[starts_instance]
+    )
+    column.definition_levels = EncodedLevels.from_numpy(
+        leaf.max_definition_level,
+        np.minimum(definition_levels[starts_instance], ancestor.max_definition_level),
+    )
+    return column
+
+
+def add_columns(root_descriptor, column_data):
+    """
+    Returns a dict mapping each leaf ColumnDescriptor of the schema rooted at
+    @root_descriptor to a Column, for records shredded into @column_data with
+    a previous version of the schema, to which leaves were added (e.g.
+    Name[*].Language[*].Script).
+
+    Columns of @column_data are matched to the leaves by schema path and
+    reused as they are. The columns of the added leaves are synthesized by
+    null_column, from the column of the closest existing leaf: the first one
+    under the deepest ancestor of the added leaf that has existing leaves, as
+    the other ancestors were not part of the previous schema.
+    """
+    existing = {
+        descriptor.schema_path: column for descriptor, column in column_data.items()
+    }
+    leaves = list(get_leaves(root_descriptor))
+    removed = set(existing).difference(leaf.schema_path for leaf in leaves)
+    if removed:
+        raise ValueError(f"Columns {sorted(removed)} are not leaves of the schema")
+    if not existing:
+        raise ValueError("At least one existing column is needed")
+
+    # First existing leaf under each node
+    # NOTE: index by id() to avoid hashing descriptors
+    reference_leaves = {}
+    for leaf in leaves:
+        if leaf.schema_path in existing:
+            for node in get_ancestors(leaf):
+                reference_leaves.setdefault(id(node), leaf)
+
+    result = {}
+    for leaf in leaves:
+        column = existing.get(leaf.schema_path)
+        if column is None:
+            reference_leaf = next(
+                reference_leaves[id(node)]
+                for node in get_ancestors(leaf)
+                if id(node) in reference_leaves
+            )
+            column = null_column(
+                leaf, reference_leaf, existing[reference_leaf.schema_path]
+            )
+        result[leaf] = column
+    return result
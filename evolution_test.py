@@ -0,0 +1,64 @@
+import unittest
+
+from evolution import add_columns
+from paper_schema import PaperSchema
+from schema import get_leaves, parse_schema
+from shred import shred_records
+
+PAPER_PATHS = [
+    "DocId",
+    "Links.Backward[*]",
+    "Links.Forward[*]",
+    "Name[*].Language[*].Code",
+    "Name[*].Language[*].Country",
+    "Name[*].Url",
+]
+
+
+class TestAddColumns(unittest.TestCase):
+    def assert_added(self, paths, records):
+        old = parse_schema(PAPER_PATHS)
+        new = parse_schema(paths)
+        column_data = shred_records(old, records)
+        result = add_columns(new, column_data)
+
+        expected = shred_records(new, records)
+        self.assertEqual(list(result), list(get_leaves(new)))
+        for leaf in get_leaves(new):
+            self.assertEqual(result[leaf], expected[leaf].to_tuples(), leaf.path)
+        return column_data, result
+
+    def test_add_leaf(self):
+        s = PaperSchema()
+        column_data, result = self.assert_added(
+            PAPER_PATHS + ["Name[*].Language[*].Script"], s.records
+        )
+
+        # Existing columns are reused untouched
+        by_path = {leaf.schema_path: column for leaf, column in result.items()}
+        for descriptor, column in column_data.items():
+            self.assertIs(by_path[descriptor.schema_path], column)
+
+    def test_add_groups(self):
+        s = PaperSchema()
+        self.assert_added(
+            PAPER_PATHS
+            + [
+                "Name[*].Language[*].Tags[*].Value",
+                "Name[*].Meta.Source",
+                "Links.Extra[*]",
+                "Title",
+            ],
+            s.records + [{}, {"Name": []}],
+        )
+
+    def test_errors(self):
+        column_data = shred_records(parse_schema(PAPER_PATHS), PaperSchema().records)
+        with self.assertRaises(ValueError):
+            add_columns(parse_schema(PAPER_PATHS[1:]), column_data)
+        with self.assertRaises(ValueError):
+            add_columns(parse_schema(["DocId"]), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -25,7 +25,7 @@ records = [
 ]
 
 # 3. Shred Records (Write to Columns)
-# Returns a dict mapping ColumnDescriptor -> list of (value,
+# Returns a dict mapping ColumnDescriptor -> Column of (value,
 # repetition_level, definition_level)
 shredded_columns = shred_records(schema, records)
 for col, values in shredded_columns.items():
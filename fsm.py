@@ -1,11 +1,34 @@
-from collections import defaultdict
-
-from schema import ColumnDescriptor, common_ancestor, get_leaves
+from schema import (
+    ColumnDescriptor,
+    common_ancestor,
+    get_leaves,
+    get_schema_index,
+)
 
 END = "MAGIC"
 
 
 def make_fsm(schema, selection=None):
+    """
+    Returns the assembly FSM of the schema rooted at @schema, restricted to
+    the leaves of @selection if set: a dict mapping each leaf to a dict from
+    the repetition level of its next value to the leaf to read next (END once
+    the record is complete).
+
+    FSMs are cached per (schema, selection) until the schema is modified (see
+    SchemaIndex.cached), so the returned FSM must not be modified.
+    """
+    selection = tuple(selection) if selection is not None else None
+    return get_schema_index(schema).cached(
+        ("fsm", schema, selection), lambda: build_fsm(schema, selection)
+    )
+
+
+def build_fsm(schema, selection=None):
+    """
+    Same as make_fsm, but always builds a new FSM, in O(leaves x max
+    repetition level).
+    """
     assert isinstance(schema, ColumnDescriptor)
     assert schema.path == "$"
 
@@ -15,7 +38,19 @@ def make_fsm(schema, selection=None):
         selection_set = set(selection)
         fields = [f for f in fields if f in selection_set]
 
-    fsm = defaultdict(dict)
+    # Leaves are numbered in schema order, so the leaves of a subtree are
+    # contiguous. Index of the first (selected) leaf of each repeated node.
+    # NOTE: index by id() to avoid hashing descriptors
+    first_leaf = {}
+    # Repeated ancestors of each field (including itself), by repetition level
+    repeated_ancestors = []
+    for index, field in enumerate(fields):
+        ancestors = [node for node in field.root_path if node.is_repeated]
+        for node in ancestors:
+            first_leaf.setdefault(id(node), index)
+        repeated_ancestors.append(ancestors)
+
+    fsm = {}
 
     for index, field in enumerate(fields):
         max_level = field.max_repetition_level
@@ -25,34 +60,40 @@ def make_fsm(schema, selection=None):
             if barrier != END
             else 0
         )
+        transitions = {}
+
+        # Step 1: Add barrier edges
+        # For levels that are at most the barrier level, we have no choice but
+        # to jump to the barrier
+        for level in range(barrier_level + 1):
+            transitions[level] = barrier
 
-        # Step 1: Add back edges
+        # Step 2: Add back edges
         # For fields that are at the end of a repeated message, we may need to
         # jump back to the start of the message, super-message, etc depending
-        # of the repetition level we read
-        for pre_field in reversed(fields[:index]):
-            # For levels that are at most the barrier level, we have no choice
-            # but to jump to the barrier
-            if pre_field.max_repetition_level <= barrier_level:
-                continue
-            # Find jump point based on the common ancestor
-            back_level = common_ancestor(pre_field, field).max_repetition_level
-            fsm[field][back_level] = pre_field
-
-        # Step 2: Fill gaps
+        # of the repetition level we read. The fields before this one sharing
+        # the repeated ancestor at level l (but not the one at level l + 1)
+        # are the ones from the first leaf of the former to the first leaf of
+        # the latter: we jump back to the first of them.
+        ancestors = repeated_ancestors[index]
+        back_edges = {}
+        for level in range(barrier_level + 1, max_level + 1):
+            start = first_leaf[id(ancestors[level - 1])]
+            stop = first_leaf[id(ancestors[level])] if level < max_level else index
+            if start < stop:
+                back_edges[level] = fields[start]
+
+        # Step 3: Fill gaps
         # Consider the following example with common repetition levels
         # annotated w.r.t. D
         # A B C D E
         # 0 1 1 3 1
         # On repetition level 2 and 3 from D, we need to go back to D
         for level in reversed(range(barrier_level + 1, max_level + 1)):
-            if level not in fsm[field]:
-                fsm[field][level] = (
-                    field if level == max_level else fsm[field][level + 1]
-                )
+            transitions[level] = back_edges.get(
+                level, field if level == max_level else transitions[level + 1]
+            )
 
-        # Step 3: Add barrier edges
-        for level in range(barrier_level + 1):
-            fsm[field][level] = barrier
+        fsm[field] = dict(sorted(transitions.items()))
 
     return fsm
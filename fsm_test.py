@@ -1,6 +1,6 @@
 import unittest
 
-from fsm import END, make_fsm
+from fsm import END, build_fsm, make_fsm
 from paper_schema import PaperSchema
 from schema import parse_schema
 from test_utils import get_desc
@@ -70,6 +70,24 @@ class TestFSM(unittest.TestCase):
             },
         )
 
+    def test_back_edges_to_first_field(self):
+        schema = parse_schema(["a"] + [f"b[*].c{i}[*]" for i in range(100)])
+        b_c = [get_desc(schema, f"b[*].c{i}[*]") for i in range(100)]
+
+        fsm = make_fsm(schema)
+        self.assertEqual(fsm[b_c[0]], {0: b_c[1], 1: b_c[1], 2: b_c[0]})
+        self.assertEqual(fsm[b_c[50]], {0: b_c[51], 1: b_c[51], 2: b_c[50]})
+        self.assertEqual(fsm[b_c[99]], {0: END, 1: b_c[0], 2: b_c[99]})
+
+    def test_is_cached(self):
+        s = PaperSchema()
+        selection = [s.doc_id, s.name_url]
+
+        self.assertIs(make_fsm(s.root), make_fsm(s.root))
+        self.assertIs(make_fsm(s.root, selection), make_fsm(s.root, selection))
+        self.assertIsNot(make_fsm(s.root), build_fsm(s.root))
+        self.assertEqual(make_fsm(s.root, selection), build_fsm(s.root, selection))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,264 @@
+import abc
+import operator
+
+import numpy as np
+
+from assembly import JsonColumnAssembler, iter_assemble_records
+from column import as_column
+
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def _value_record_ids(column):
+    """
+    Returns the id of the record holding each (non-null) value of @column.
+    """
+    repetition_levels, definition_levels = column.levels_to_numpy()
+    record_ids = np.cumsum(repetition_levels == 0) - 1
+    return record_ids[definition_levels == column.max_definition_level]
+
+
+def _to_object_array(values):
+    # NOTE: np.array() would build a 2D array out of e.g. tuples
+    return np.fromiter(values, dtype=object, count=len(values))
+
+
+def _column_statistics(column_data, descriptor):
+    # NOTE: ColumnFile reads them from its footer, without reading the column
+    get_statistics = getattr(column_data, "get_statistics", None)
+    if get_statistics is not None:
+        return get_statistics(descriptor)
+    return getattr(column_data[descriptor], "statistics", None)
+
+
+def _num_records(column):
+    return int(np.count_nonzero(column.repetition_levels.to_numpy() == 0))
+
+
+class Predicate(abc.ABC):
+    """
+    A condition on records, evaluated directly on the shredded columns.
+    """
+
+    @abc.abstractmethod
+    def columns(self):
+        """
+        Returns the leaf ColumnDescriptors the predicate reads.
+        """
+
+    @abc.abstractmethod
+    def evaluate(self, column_data, num_records):
+        """
+        Returns a NumPy bool array telling for each record whether it matches.
+        """
+
+    def may_match(self, column_data):
+        """
+        Returns False if the ColumnStatistics of the columns rule out that any
+        record matches, without reading the columns. Columns without statistics
+        may match.
+        """
+        return True
+
+
+class Comparison(Predicate):
+    """
+    Matches the records holding at least one value of the leaf @column for
+    which `value @op @operand` holds, e.g. Comparison(doc_id, ">", 100). Nulls
+    never match.
+
+    The comparison is vectorized over the values of the column. For dictionary
+    encoded columns, it is only evaluated on the dictionary and then looked up
+    by code.
+    """
+
+    def __init__(self, column, op, operand):
+        if op not in OPERATORS:
+            raise ValueError(
+                f"Unknown operator {op!r}, expected one of {list(OPERATORS)}"
+            )
+        self.column = column
+        self.op = op
+        self.operand = operand
+
+    def columns(self):
+        return [self.column]
+
+    def _compare(self, values):
+        # NOTE: comparisons with NaN are False (True for !=) without warnings
+        with np.errstate(invalid="ignore"):
+            result = np.asarray(OPERATORS[self.op](values, self.operand), dtype=bool)
+        return np.broadcast_to(result, values.shape)
+
+    def matching_values(self, values):
+        """
+        Returns a NumPy bool array telling whether each value of the
+        ValueBuffer or DictionaryValueBuffer @values matches.
+        """
+        if values.encoding == "dictionary":
+            dictionary = _to_object_array(values.decoded_dictionary)
+            return self._compare(dictionary)[values.codes_to_numpy()]
+        if values.kind in ("int", "float"):
+            return self._compare(values.to_numpy())
+        return self._compare(_to_object_array(values))
+
+    def evaluate(self, column_data, num_records):
+        column = as_column(self.column, column_data[self.column])
+        result = np.zeros(num_records, dtype=bool)
+        result[_value_record_ids(column)[self.matching_values(column.values)]] = True
+        return result
+
+    def may_match(self, column_data):
+        statistics = _column_statistics(column_data, self.column)
+        if statistics is None:
+            return True
+        if statistics.value_count == 0:
+            return False
+        min_value = statistics.min_value
+        max_value = statistics.max_value
+        if min_value is None:
+            return True
+        operand = self.operand
+        try:
+            if self.op == "==":
+                return min_value <= operand <= max_value
+            if self.op == "!=":
+                # NOTE: NaNs are not part of min_value and max_value, but they
+                # are distinct values which are != to anything
+                return not (
+                    statistics.distinct_count == 1 and min_value == max_value == operand
+                )
+            if self.op in ("<", "<="):
+                return OPERATORS[self.op](min_value, operand)
+            return OPERATORS[self.op](max_value, operand)
+        except TypeError:
+            return True
+
+    def __repr__(self):
+        return f"Comparison({self.column.full_path} {self.op} {self.operand!r})"
+
+
+class And(Predicate):
+    def __init__(self, *predicates):
+        self.predicates = predicates
+
+    def columns(self):
+        return [column for p in self.predicates for column in p.columns()]
+
+    def evaluate(self, column_data, num_records):
+        result = np.ones(num_records, dtype=bool)
+        for predicate in self.predicates:
+            result &= predicate.evaluate(column_data, num_records)
+        return result
+
+    def may_match(self, column_data):
+        return all(p.may_match(column_data) for p in self.predicates)
+
+
+class Or(Predicate):
+    def __init__(self, *predicates):
+        self.predicates = predicates
+
+    def columns(self):
+        return [column for p in self.predicates for column in p.columns()]
+
+    def evaluate(self, column_data, num_records):
+        result = np.zeros(num_records, dtype=bool)
+        for predicate in self.predicates:
+            result |= predicate.evaluate(column_data, num_records)
+        return result
+
+    def may_match(self, column_data):
+        return any(p.may_match(column_data) for p in self.predicates)
+
+
+class Not(Predicate):
+    def __init__(self, predicate):
+        self.predicate = predicate
+
+    def columns(self):
+        return self.predicate.columns()
+
+    def evaluate(self, column_data, num_records):
+        return ~self.predicate.evaluate(column_data, num_records)
+
+
+def matching_record_ids(column_data, predicate):
+    """
+    Returns the ids of the records matching @predicate as a NumPy array, only
+    reading the columns of the predicate.
+    """
+    columns = predicate.columns()
+    if not columns:
+        raise ValueError("The predicate does not read any column")
+    num_records = _num_records(as_column(columns[0], column_data[columns[0]]))
+    return np.flatnonzero(predicate.evaluate(column_data, num_records))
+
+
+def iter_filter_records(
+    root_descriptor,
+    column_data,
+    predicate,
+    assembler_factory=JsonColumnAssembler,
+    columns=None,
+):
+    """
+    Lazily assembles the records matching @predicate. The predicate is
+    evaluated on the columns first, and the non-matching records are then
+    skipped by the column readers without being assembled.
+
+    The columns of the predicate do not need to be part of @columns.
+    """
+    record_ids = matching_record_ids(column_data, predicate)
+    return iter_assemble_records(
+        root_descriptor,
+        column_data,
+        assembler_factory,
+        columns=columns,
+        record_ids=record_ids.tolist(),
+    )
+
+
+def filter_records(
+    root_descriptor,
+    column_data,
+    predicate,
+    assembler_factory=JsonColumnAssembler,
+    columns=None,
+):
+    """
+    Same as assemble_records, but only assembles the records matching
+    @predicate, see iter_filter_records.
+    """
+    return list(
+        iter_filter_records(
+            root_descriptor, column_data, predicate, assembler_factory, columns
+        )
+    )
+
+
+def iter_filter_chunks(
+    root_descriptor,
+    chunks,
+    predicate,
+    assembler_factory=JsonColumnAssembler,
+    columns=None,
+):
+    """
+    Lazily assembles the records matching @predicate from @chunks, e.g. as
+    yielded by shred_chunks with statistics. Chunks whose statistics
+    rule out the predicate (see Predicate.may_match) are skipped without
+    reading their columns.
+    """
+    for chunk in chunks:
+        if predicate.may_match(chunk):
+            yield from iter_filter_records(
+                root_descriptor, chunk, predicate, assembler_factory, columns
+            )
@@ -0,0 +1,188 @@
+import os
+import tempfile
+import unittest
+
+from assembly import assemble_records
+from paper_schema import PaperSchema
+from predicate import (
+    And,
+    Comparison,
+    Not,
+    Or,
+    filter_records,
+    iter_filter_chunks,
+    matching_record_ids,
+)
+from schema import parse_schema
+from shred import shred_chunks, shred_records
+from storage import ColumnFile, write_columns
+from test_utils import get_desc
+
+
+class TestPredicate(unittest.TestCase):
+    def setUp(self):
+        self.s = PaperSchema()
+        self.records = [{"DocId": 30, "Name": [{"Url": "http://D"}]}, {}]
+        self.records = self.s.records + self.records
+
+    def shred(self, **kwargs):
+        return shred_records(self.s.root, self.records, **kwargs)
+
+    def test_comparison(self):
+        s = self.s
+        shredded = self.shred()
+
+        def ids(predicate):
+            return matching_record_ids(shredded, predicate).tolist()
+
+        self.assertEqual(ids(Comparison(s.doc_id, ">", 10)), [1, 2])
+        self.assertEqual(ids(Comparison(s.doc_id, "==", 20)), [1])
+        self.assertEqual(ids(Comparison(s.doc_id, "!=", 20)), [0, 2])
+        # Repeated fields match if any of their values does
+        self.assertEqual(ids(Comparison(s.links_forward, ">=", 80)), [1])
+        self.assertEqual(ids(Comparison(s.name_url, "<", "http://C")), [0])
+        self.assertEqual(ids(Comparison(s.name_language_code, "==", "en-gb")), [0])
+        self.assertEqual(ids(Comparison(s.name_language_code, "==", "fr")), [])
+        # Comparing to a value of another type does not match
+        self.assertEqual(ids(Comparison(s.doc_id, "==", "10")), [])
+
+    def test_dictionary_encoded_columns(self):
+        s = self.s
+        plain = self.shred()
+        encoded = self.shred(dictionary_encoding=True)
+
+        for predicate in [
+            Comparison(s.name_language_country, "==", "gb"),
+            Comparison(s.name_language_code, ">=", "en-"),
+            Comparison(s.doc_id, "<=", 20),
+        ]:
+            self.assertEqual(
+                matching_record_ids(encoded, predicate).tolist(),
+                matching_record_ids(plain, predicate).tolist(),
+            )
+
+    def test_combinations(self):
+        s = self.s
+        shredded = self.shred()
+        has_country = Comparison(s.name_language_country, "!=", "")
+        high_doc_id = Comparison(s.doc_id, ">", 10)
+
+        def ids(predicate):
+            return matching_record_ids(shredded, predicate).tolist()
+
+        self.assertEqual(ids(And(has_country, high_doc_id)), [])
+        self.assertEqual(ids(Or(has_country, high_doc_id)), [0, 1, 2])
+        self.assertEqual(ids(Not(high_doc_id)), [0, 3])
+
+    def test_unknown_operator(self):
+        with self.assertRaises(ValueError):
+            Comparison(self.s.doc_id, "=", 10)
+
+    def test_filter_records(self):
+        s = self.s
+        shredded = self.shred()
+        assembled = assemble_records(s.root, shredded)
+
+        self.assertEqual(
+            filter_records(s.root, shredded, Comparison(s.doc_id, ">", 10)),
+            assembled[1:3],
+        )
+        self.assertEqual(
+            filter_records(
+                s.root,
+                shredded,
+                Comparison(s.name_language_code, "==", "en"),
+                columns=[s.name_url],
+            ),
+            assemble_records(s.root, shredded, columns=[s.name_url])[:1],
+        )
+
+    def test_filter_records_skips_non_matching(self):
+        schema = parse_schema(["a", "b[*]"])
+        records = [{"a": i, "b": [i] * (i % 3)} for i in range(1000)]
+        shredded = shred_records(schema, records, record_index_interval=16)
+        predicate = Comparison(get_desc(schema, "a"), "<", 20)
+
+        self.assertEqual(
+            filter_records(schema, shredded, Or(predicate, Not(predicate))),
+            assemble_records(schema, shredded),
+        )
+        self.assertEqual(
+            [
+                record["a"]
+                for record in filter_records(
+                    schema, shredded, Comparison(get_desc(schema, "b[*]"), ">=", 995)
+                )
+            ],
+            [995, 997, 998],
+        )
+
+    def test_may_match(self):
+        s = self.s
+        with_statistics = self.shred(statistics=True)
+        without_statistics = self.shred()
+        cases = [
+            (Comparison(s.doc_id, ">", 30), False),
+            (Comparison(s.doc_id, ">=", 30), True),
+            (Comparison(s.doc_id, "<", 10), False),
+            (Comparison(s.doc_id, "==", 25), True),
+            (Comparison(s.doc_id, "==", 31), False),
+            (Comparison(s.doc_id, "!=", 10), True),
+            (Comparison(s.name_language_code, "==", "fr"), False),
+            # Incomparable values may match
+            (Comparison(s.doc_id, "==", "10"), True),
+            (And(Comparison(s.doc_id, ">", 30), Comparison(s.doc_id, ">", 0)), False),
+            (Or(Comparison(s.doc_id, ">", 30), Comparison(s.doc_id, ">", 0)), True),
+            (Not(Comparison(s.doc_id, ">", 0)), True),
+        ]
+        for predicate, may_match in cases:
+            self.assertEqual(predicate.may_match(with_statistics), may_match, predicate)
+            self.assertTrue(predicate.may_match(without_statistics))
+
+    def test_may_match_nan(self):
+        schema = parse_schema(["a"])
+        a = get_desc(schema, "a")
+        for records in [[{"a": float("nan")}, {"a": 1.0}], [{"a": 1.0}, {"a": 1.0}]]:
+            for dictionary_encoding in [False, True]:
+                shredded = shred_records(
+                    schema,
+                    records + records[::-1],
+                    dictionary_encoding=dictionary_encoding,
+                    statistics=True,
+                )
+                statistics = shredded[a].statistics
+                self.assertEqual((statistics.min_value, statistics.max_value), (1, 1))
+                for op, operand in [("==", 1.0), ("<", 2.0), ("!=", 1.0), (">", 0)]:
+                    predicate = Comparison(a, op, operand)
+                    self.assertEqual(
+                        predicate.may_match(shredded),
+                        bool(matching_record_ids(shredded, predicate).size),
+                        (records, predicate),
+                    )
+
+    def test_may_match_column_file(self):
+        s = self.s
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "columns.drml")
+            write_columns(path, s.root, self.shred(statistics=True))
+            with ColumnFile(path) as f:
+                doc_id = get_desc(f.root_descriptor, "DocId")
+                self.assertFalse(Comparison(doc_id, ">", 30).may_match(f))
+                self.assertTrue(Comparison(doc_id, ">", 20).may_match(f))
+                self.assertEqual(f._columns, {})
+
+    def test_iter_filter_chunks(self):
+        schema = parse_schema(["a", "b"])
+        a = get_desc(schema, "a")
+        records = [{"a": i, "b": i % 7} for i in range(100)]
+        chunks = list(shred_chunks(schema, records, chunk_records=10, statistics=True))
+        predicate = And(Comparison(a, ">=", 35), Comparison(a, "<", 52))
+
+        self.assertEqual(sum(predicate.may_match(chunk) for chunk in chunks), 3)
+        self.assertEqual(
+            list(iter_filter_chunks(schema, chunks, predicate)), records[35:52]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
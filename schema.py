@@ -1,5 +1,8 @@
 import collections
 
+# Maximum number of values cached per schema, see SchemaIndex.cached
+SCHEMA_CACHE_SIZE = 32
+
 
 def get_all_nodes(root):
     yield root
@@ -21,16 +24,151 @@ def get_ancestors(node):
 
 
 def common_ancestor(a, b):
-    a_ancestors = list(get_ancestors(a))[::-1]
-    b_ancestors = list(get_ancestors(b))[::-1]
+    """
+    Returns the lowest common ancestor of @a and @b, or None if they belong to
+    different schemas.
+    """
+    index = get_schema_index(a)
+    if get_schema_index(b) is not index:
+        return None
+    return index.common_ancestor(a, b)
+
+
+class SchemaIndex:
+    """
+    Lookup tables over a schema tree, built once per root so that the questions
+    asked for every value during assembly are answered in O(1):
+
+    - the path from the root to every node
+    - the mapping from repetition level to definition level of every node
+    - the lowest common ancestor of any two nodes, through range minimum
+      queries over an Euler tour of the tree
+
+    It also caches what is derived from the schema (FSMs, assembly plans,
+    generated code), which is dropped along with the index when the schema is
+    modified.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.nodes = []
+        # Computed on first use
+        self.structural_hashes = None
+        self.root_paths = []
+        self.repetition_to_definition = []
+        # See cached
+        self._cache = {}
+
+        # Euler tour of node ids and the first position of each node in it
+        euler = []
+        self.first_visit = []
+
+        def visit(node, root_path, repetition_to_definition):
+            node_id = len(self.nodes)
+            node._index = self
+            node._node_id = node_id
+
+            root_path = root_path + (node,)
+            if node.max_repetition_level not in repetition_to_definition:
+                repetition_to_definition = {
+                    **repetition_to_definition,
+                    node.max_repetition_level: node.max_definition_level,
+                }
+
+            self.nodes.append(node)
+            self.root_paths.append(root_path)
+            self.repetition_to_definition.append(repetition_to_definition)
+            self.first_visit.append(len(euler))
+            euler.append(node_id)
+
+            for child in node.children.values():
+                visit(child, root_path, repetition_to_definition)
+                euler.append(node_id)
+
+        visit(root, (), {})
+
+        # sparse_table[k][i] is the shallowest node id in euler[i:i + 2**k]
+        self.sparse_table = [euler]
+        k = 1
+        while (1 << k) <= len(euler):
+            previous = self.sparse_table[-1]
+            half = 1 << (k - 1)
+            self.sparse_table.append(
+                [
+                    self._shallowest(previous[i], previous[i + half])
+                    for i in range(len(euler) - (1 << k) + 1)
+                ]
+            )
+            k += 1
+
+    def _shallowest(self, a, b):
+        return a if len(self.root_paths[a]) <= len(self.root_paths[b]) else b
+
+    def common_ancestor(self, a, b):
+        i = self.first_visit[a._node_id]
+        j = self.first_visit[b._node_id]
+        if i > j:
+            i, j = j, i
+        k = (j - i + 1).bit_length() - 1
+        row = self.sparse_table[k]
+        return self.nodes[self._shallowest(row[i], row[j - (1 << k) + 1])]
+
+    def structural_hash(self, node):
+        if self.structural_hashes is None:
+            hashes = [None] * len(self.nodes)
+            # Children come after their parent in pre-order
+            for node_id in reversed(range(len(self.nodes))):
+                n = self.nodes[node_id]
+                hashes[node_id] = hash(
+                    (
+                        n.path,
+                        n.max_repetition_level,
+                        n.max_definition_level,
+                        n.is_repeated,
+                        tuple(
+                            (name, hashes[child._node_id])
+                            for name, child in n.children.items()
+                        ),
+                    )
+                )
+            self.structural_hashes = hashes
+        return self.structural_hashes[node._node_id]
+
+    def cached(self, key, compute):
+        """
+        Returns the value cached for @key, computing it with @compute() on the
+        first call. Only the SCHEMA_CACHE_SIZE most recently computed values
+        are kept.
+        """
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        value = compute()
+        if len(self._cache) >= SCHEMA_CACHE_SIZE:
+            del self._cache[next(iter(self._cache))]
+        self._cache[key] = value
+        return value
 
-    common_ancestor = None
-    for a_ancestor, b_ancestor in zip(a_ancestors, b_ancestors):
-        if a_ancestor == b_ancestor:
-            common_ancestor = a_ancestor
-            continue
-        break
-    return common_ancestor
+    def invalidate(self):
+        for node in self.nodes:
+            node._index = None
+            node._node_id = None
+        self._cache.clear()
+
+
+def get_schema_index(node):
+    """
+    Returns the SchemaIndex of the schema @node belongs to, building it if the
+    schema has not been indexed yet (e.g. when built by hand rather than by
+    parse_schema).
+    """
+    if node._index is None:
+        root = node
+        while root.parent:
+            root = root.parent
+        SchemaIndex(root)
+    return node._index
 
 
 class ColumnDescriptor:
@@ -43,6 +181,9 @@ class ColumnDescriptor:
         self.max_definition_level = max_definition_level
         self.children = collections.OrderedDict()
         self.is_repeated = False
+        # Set by SchemaIndex
+        self._index = None
+        self._node_id = None
 
     @property
     def is_leaf(self):
@@ -59,6 +200,24 @@ class ColumnDescriptor:
             path.append(curr.path)
         return ".".join(reversed(path))
 
+    @property
+    def schema_path(self):
+        """
+        Returns the path of this in the syntax accepted by parse_schema, i.e.
+        with repeated fields suffixed by `[*]`.
+        """
+        nodes = self.root_path
+        if nodes[0].path == "$":
+            nodes = nodes[1:]
+        return ".".join(n.path + ("[*]" if n.is_repeated else "") for n in nodes)
+
+    @property
+    def root_path(self):
+        """
+        Returns the tuple of nodes from the root to this.
+        """
+        return get_schema_index(self).root_paths[self._node_id]
+
     def full_repetition_level(self, repetition_level):
         """
         Returns the definition level of the field @repetition_level from root to this.
@@ -66,21 +225,27 @@ class ColumnDescriptor:
         This is the level that we need to return to when finishing a record and
         repeating to a previous field.
         """
-        for ancestor in reversed(list(v for v in get_ancestors(self))):
-            if ancestor.max_repetition_level == repetition_level:
-                return ancestor.max_definition_level
-        raise ValueError(
-            f"Repetition level {repetition_level} not found in ancestors of {self}"
-        )
+        index = get_schema_index(self)
+        try:
+            return index.repetition_to_definition[self._node_id][repetition_level]
+        except KeyError:
+            raise ValueError(
+                f"Repetition level {repetition_level} not found in ancestors of {self}"
+            ) from None
 
     def add_child(self, path, is_repeated=False):
         if path not in self.children:
+            if self._index is not None:
+                self._index.invalidate()
             child = ColumnDescriptor(path, parent=self)
             child.is_repeated = is_repeated
             self.children[path] = child
         return self.children[path]
 
     def compute_levels(self, current_rep_level=0, current_def_level=0):
+        if self._index is not None:
+            self._index.invalidate()
+
         new_def_level = current_def_level + (1 if self.parent is not None else 0)
         new_rep_level = current_rep_level
         if self.is_repeated:
@@ -92,27 +257,46 @@ class ColumnDescriptor:
         for child in self.children.values():
             child.compute_levels(new_rep_level, new_def_level)
 
-    def __eq__(self, other):
+        if self.parent is None:
+            SchemaIndex(self)
+
+    # NOTE: descriptors compare and hash by identity so that the dicts keyed
+    # by them (columns, FSM states, readers) cost O(1) per lookup and two
+    # distinct fields with the same name and levels never collide. Use
+    # structurally_equal() to compare schemas.
+
+    @property
+    def node_id(self):
+        """
+        Returns the pre-order position of this node in its schema.
+        """
+        get_schema_index(self)
+        return self._node_id
+
+    def structural_hash(self):
+        return get_schema_index(self).structural_hash(self)
+
+    def structurally_equal(self, other):
+        """
+        Returns whether @other describes the same schema as this, i.e. the same
+        paths, levels and repetitions, recursively.
+        """
         if not isinstance(other, ColumnDescriptor):
             return False
+        if self is other:
+            return True
+        if self.structural_hash() != other.structural_hash():
+            return False
         # NOTE we ignore the parent pointer intentionally
         return (
             self.path == other.path
             and self.max_repetition_level == other.max_repetition_level
             and self.max_definition_level == other.max_definition_level
             and self.is_repeated == other.is_repeated
-            and self.children == other.children
-        )
-
-    def __hash__(self):
-        # NOTE we ignore the parent pointer intentionally
-        return hash(
-            (
-                self.path,
-                self.max_repetition_level,
-                self.max_definition_level,
-                self.is_repeated,
-                tuple(self.children.items()),
+            and list(self.children) == list(other.children)
+            and all(
+                child.structurally_equal(other.children[name])
+                for name, child in self.children.items()
             )
         )
 
@@ -126,6 +310,37 @@ class ColumnDescriptor:
         )
 
 
+def project_schema(root, leaves):
+    """
+    Returns a copy of the schema rooted at @root that only contains @leaves and
+    their ancestors. Leaves of the copy keep the schema order of @root.
+
+    Levels are copied rather than recomputed so that the repetition and
+    definition levels stored in the original columns keep their meaning.
+    """
+    selected = set(leaves)
+
+    def copy(node, parent):
+        projected = ColumnDescriptor(
+            node.path,
+            parent=parent,
+            max_repetition_level=node.max_repetition_level,
+            max_definition_level=node.max_definition_level,
+        )
+        projected.is_repeated = node.is_repeated
+        for name, child in node.children.items():
+            if child.is_leaf and child not in selected:
+                continue
+            projected_child = copy(child, projected)
+            if not child.is_leaf and projected_child.is_leaf:
+                # None of the leaves under this group were selected
+                continue
+            projected.children[name] = projected_child
+        return projected
+
+    return copy(root, None)
+
+
 def parse_schema(schema_paths):
     root = ColumnDescriptor("$")
     for path in schema_paths:
@@ -1,10 +1,23 @@
 import unittest
 
-from schema import parse_schema
-from test_utils import mk_desc
+from paper_schema import PaperSchema
+from schema import (
+    SCHEMA_CACHE_SIZE,
+    ColumnDescriptor,
+    common_ancestor,
+    get_all_nodes,
+    get_ancestors,
+    get_schema_index,
+    parse_schema,
+    project_schema,
+)
+from test_utils import assert_structurally_equal, get_desc, mk_desc
 
 
 class TestParseSchema(unittest.TestCase):
+    def setUp(self):
+        self.addTypeEqualityFunc(ColumnDescriptor, assert_structurally_equal)
+
     def test_simple_schema(self):
         schema = ["a", "b"]
         root = parse_schema(schema)
@@ -96,5 +109,149 @@ class TestParseSchema(unittest.TestCase):
         self.assertEqual(root, expected)
 
 
+class TestProjectSchema(unittest.TestCase):
+    def setUp(self):
+        self.addTypeEqualityFunc(ColumnDescriptor, assert_structurally_equal)
+
+    def test_project_schema(self):
+        root = parse_schema(["a", "b[*].c", "b[*].d[*].e", "f.g"])
+        projected = project_schema(root, [get_desc(root, "b[*].d[*].e")])
+
+        expected = mk_desc(
+            "$",
+            0,
+            0,
+            children=[
+                mk_desc(
+                    "b",
+                    1,
+                    1,
+                    is_repeated=True,
+                    children=[
+                        mk_desc(
+                            "d",
+                            2,
+                            2,
+                            is_repeated=True,
+                            children=[mk_desc("e", 2, 3)],
+                        )
+                    ],
+                )
+            ],
+        )
+        self.assertEqual(projected, expected)
+        self.assertIsNot(projected, root)
+
+
+class TestSchemaIndex(unittest.TestCase):
+    def test_common_ancestor(self):
+        s = PaperSchema()
+        name = s.name_url.parent
+        name_language = s.name_language_code.parent
+
+        self.assertIs(common_ancestor(s.doc_id, s.name_url), s.root)
+        self.assertIs(common_ancestor(s.name_language_code, s.name_url), name)
+        self.assertIs(
+            common_ancestor(s.name_language_code, s.name_language_country),
+            name_language,
+        )
+        self.assertIs(common_ancestor(s.name_url, s.name_url), s.name_url)
+        self.assertIs(common_ancestor(name, s.name_language_country), name)
+
+    def test_common_ancestor_matches_ancestor_walk(self):
+        root = parse_schema(
+            ["a", "b[*].c", "b[*].d[*].e[*]", "b[*].d[*].f", "b[*].g.h", "i.j.k"]
+        )
+        nodes = list(get_all_nodes(root))
+        for a in nodes:
+            for b in nodes:
+                a_ancestors = set(map(id, get_ancestors(a)))
+                expected = next(n for n in get_ancestors(b) if id(n) in a_ancestors)
+                self.assertIs(common_ancestor(a, b), expected)
+
+    def test_common_ancestor_different_schemas(self):
+        self.assertIsNone(common_ancestor(parse_schema(["a"]), parse_schema(["a"])))
+
+    def test_full_repetition_level(self):
+        s = PaperSchema()
+
+        self.assertEqual(s.name_language_code.full_repetition_level(0), 0)
+        self.assertEqual(s.name_language_code.full_repetition_level(1), 1)
+        self.assertEqual(s.name_language_code.full_repetition_level(2), 2)
+        self.assertEqual(s.links_forward.full_repetition_level(1), 2)
+        with self.assertRaises(ValueError):
+            s.name_url.full_repetition_level(2)
+
+    def test_root_path(self):
+        s = PaperSchema()
+        name = s.name_url.parent
+        name_language = s.name_language_code.parent
+
+        self.assertEqual(
+            s.name_language_code.root_path,
+            (s.root, name, name_language, s.name_language_code),
+        )
+        self.assertEqual(s.root.root_path, (s.root,))
+
+    def test_schema_path(self):
+        paths = ["a", "b[*].c", "b[*].d[*].e[*]"]
+        root = parse_schema(paths)
+
+        self.assertEqual([get_desc(root, p).schema_path for p in paths], paths)
+        self.assertEqual(get_desc(root, "b[*].d[*]").schema_path, "b[*].d[*]")
+
+    def test_identity(self):
+        root = parse_schema(["a.x", "b.x"])
+        a_x = get_desc(root, "a.x")
+        b_x = get_desc(root, "b.x")
+
+        self.assertNotEqual(a_x, b_x)
+        self.assertEqual(len({a_x, b_x}), 2)
+        self.assertTrue(a_x.structurally_equal(b_x))
+        self.assertEqual(a_x.structural_hash(), b_x.structural_hash())
+        self.assertEqual([n.node_id for n in get_all_nodes(root)], list(range(5)))
+
+    def test_structurally_equal(self):
+        self.assertTrue(
+            parse_schema(["a[*].b", "c"]).structurally_equal(
+                parse_schema(["a[*].b", "c"])
+            )
+        )
+        self.assertFalse(
+            parse_schema(["a[*].b", "c"]).structurally_equal(parse_schema(["a.b", "c"]))
+        )
+        self.assertFalse(
+            parse_schema(["a", "c"]).structurally_equal(parse_schema(["c", "a"]))
+        )
+
+    def test_add_child_invalidates_index(self):
+        root = parse_schema(["a.b"])
+        a = root.children["a"]
+        self.assertEqual(a.children["b"].root_path, (root, a, a.children["b"]))
+
+        c = a.add_child("c")
+        root.compute_levels()
+        self.assertEqual(c.root_path, (root, a, c))
+        self.assertIs(common_ancestor(c, a.children["b"]), a)
+
+    def test_cached(self):
+        root = parse_schema(["a.b"])
+        index = get_schema_index(root)
+        for key in range(SCHEMA_CACHE_SIZE + 1):
+            self.assertEqual(index.cached(key, lambda: [key]), [key])
+        value = index.cached("key", list)
+        self.assertIs(index.cached("key", list), value)
+        # The oldest values are evicted
+        self.assertIsNone(index.cached(0, lambda: None))
+        self.assertEqual(
+            index.cached(SCHEMA_CACHE_SIZE, lambda: None), [SCHEMA_CACHE_SIZE]
+        )
+
+        # Modifying the schema drops the cache along with the index
+        root.children["a"].add_child("c")
+        root.compute_levels()
+        self.assertIsNot(get_schema_index(root).cached("key", list), value)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,14 +1,52 @@
 import collections
+import functools
+import itertools
+import multiprocessing
+
+import numpy as np
+
+from assembly import JsonColumnAssembler, iter_assemble_records
+from column import Column, ValueBuffer
+from encoding import EncodedLevels
+from schema import get_all_nodes, get_leaves, get_schema_index
+from stats import timed
+
+# Records shredded by a worker of shred_records_parallel per task
+DEFAULT_BATCH_RECORDS = 1024
+# Records per sealed chunk of a ColumnStore
+DEFAULT_CHUNK_RECORDS = 2**16
 
 
 class FieldWriter:
-    def __init__(self, descriptor):
+    def __init__(self, descriptor, dictionary_encoding=False):
         self.descriptor = descriptor
         self.children = collections.OrderedDict()
-        self.data = []  # List of (value, r, d)
+        # Either a bool applying to all leaves or a collection of the leaves
+        # whose values are dictionary encoded
+        self.dictionary_encoding = (
+            dictionary_encoding
+            if isinstance(dictionary_encoding, bool)
+            else descriptor in dictionary_encoding
+        )
+        # Column of (value, r, d), only used by leaves
+        self.data = self.new_column() if descriptor.is_leaf else None
 
         for name, child_desc in descriptor.children.items():
-            self.children[name] = FieldWriter(child_desc)
+            self.children[name] = FieldWriter(child_desc, dictionary_encoding)
+
+        # Writers of the leaves of the subtree in schema order, which all get a
+        # null when the field is missing
+        if self.is_leaf():
+            self.leaf_writers = (self,)
+        else:
+            self.leaf_writers = tuple(
+                leaf for child in self.children.values() for leaf in child.leaf_writers
+            )
+
+    def new_column(self):
+        return Column.for_descriptor(
+            self.descriptor, dictionary_encoding=self.dictionary_encoding
+        )
 
     @property
     def name(self):
@@ -33,7 +71,19 @@ class FieldWriter:
         return len(self.children) == 0
 
     def write(self, value, r, d):
-        self.data.append((value, r, d))
+        self.data.append(value, r, d)
+
+    def reset(self):
+        """
+        Returns a dict mapping the leaf ColumnDescriptors of the subtree to the
+        Columns written so far, and starts new empty ones, so that the tree can
+        be reused to shred the next batch of records.
+        """
+        columns = {}
+        for leaf in self.leaf_writers:
+            columns[leaf.descriptor] = leaf.data
+            leaf.data = leaf.new_column()
+        return columns
 
 
 class RecordDecoder:
@@ -41,34 +91,32 @@ class RecordDecoder:
         self.record = record
         self.definition_level = definition_level
         self.iterator = None
+        # Item read ahead by has_next(), if any
+        self._next_item = _NO_ITEM
         self._prepare_iterator()
 
     def _prepare_iterator(self):
-        if self.record is None:
-            self.iterator = iter([])
-            return
-
         if isinstance(self.record, dict):
             # Generator to yield (key, value)
             self.iterator = iter(self.record.items())
         else:
-            self.iterator = iter([])
+            self.iterator = _EMPTY_ITERATOR
 
     def has_next(self):
-        if hasattr(self, "_next_item"):
-            return True
-        try:
-            self._next_item = next(self.iterator)
-            return True
-        except StopIteration:
-            return False
+        if self._next_item is _NO_ITEM:
+            self._next_item = next(self.iterator, _NO_ITEM)
+        return self._next_item is not _NO_ITEM
 
     def next(self):
-        if hasattr(self, "_next_item"):
-            item = self._next_item
-            del self._next_item
-            return item
-        return next(self.iterator)
+        item = self._next_item
+        if item is _NO_ITEM:
+            return next(self.iterator)
+        self._next_item = _NO_ITEM
+        return item
+
+
+_NO_ITEM = object()
+_EMPTY_ITERATOR = iter(())
 
 
 def dissect_record(decoder, writer, repetition_level):
@@ -161,22 +209,739 @@ def dissect_record(decoder, writer, repetition_level):
                 dissect_record(new_dec, child_writer, repetition_level)
 
 
-def shred_records(root_descriptor, records):
-    root = FieldWriter(root_descriptor)
+def write_record(writer, record, repetition_level=0, definition_level=0):
+    """
+    Same as dissect_record, but reads the fields of the dict @record in schema
+    order (i.e. in the order of the children of @writer) rather than in record
+    order, so that no RecordDecoder nor set of seen fields is allocated, and
+    writes the nulls of missing fields from the leaf writers of their subtree
+    rather than recursing into them.
+
+    @record is at @definition_level, and anything but a dict is treated as an
+    empty record.
+    """
+    if not isinstance(record, dict):
+        record = _EMPTY
+    child_definition_level = definition_level + 1
+
+    for name, child_writer in writer.children.items():
+        value = record.get(name, _MISSING)
+
+        if child_writer.is_repeated:
+            # Empty lists are treated as missing fields
+            if value is _MISSING or (isinstance(value, list) and not value):
+                for leaf in child_writer.leaf_writers:
+                    leaf.data.append(None, repetition_level, definition_level)
+                continue
+            if not isinstance(value, list):
+                raise _repeated_field_error(name, value)
+
+            max_repetition_level = child_writer.max_repetition_level
+            if child_writer.is_leaf():
+                append = child_writer.data.append
+                append(value[0], repetition_level, child_definition_level)
+                for item in value[1:]:
+                    append(item, max_repetition_level, child_definition_level)
+            else:
+                child_repetition_level = repetition_level
+                for item in value:
+                    write_record(
+                        child_writer,
+                        item,
+                        child_repetition_level,
+                        child_definition_level,
+                    )
+                    child_repetition_level = max_repetition_level
+
+        elif value is _MISSING or value is None:
+            for leaf in child_writer.leaf_writers:
+                leaf.data.append(None, repetition_level, definition_level)
+        elif isinstance(value, list):
+            raise _not_repeated_field_error(name, value)
+        elif child_writer.is_leaf():
+            child_writer.data.append(value, repetition_level, child_definition_level)
+        elif not isinstance(value, dict):
+            raise _nested_group_error(name, value)
+        else:
+            write_record(child_writer, value, repetition_level, child_definition_level)
+
+
+def _repeated_field_error(field, value):
+    return ValueError(
+        f"Field '{field}' is repeated, expected list, found {type(value).__name__}: {
+            value
+        }"
+    )
+
+
+def _not_repeated_field_error(field, value):
+    return ValueError(
+        f"Field '{field}' is not repeated, expected single value, found list: {value}"
+    )
+
+
+def _nested_group_error(field, value):
+    return ValueError(
+        f"Field '{field}' is a nested group, expected dict, found {
+            type(value).__name__
+        }: {value}"
+    )
+
+
+class _ShredderCompiler:
+    """
+    Generates the source of a function shredding one record of a schema, see
+    compile_shredder.
+    """
+
+    def __init__(self, root_descriptor):
+        self.lines = []
+        leaves = [
+            leaf for leaf in get_leaves(root_descriptor) if leaf is not root_descriptor
+        ]
+        # NOTE: index by id() to avoid hashing descriptors
+        self.leaf_ids = {id(leaf): i for i, leaf in enumerate(leaves)}
+
+        self.emit(0, "def shred_record(record, writes):")
+        if leaves:
+            self.emit(
+                1, f"({', '.join(f'w{i}' for i in range(len(leaves)))},) = writes"
+            )
+        self.emit(1, "if not isinstance(record, dict):")
+        self.emit(2, "record = _EMPTY")
+        self.emit_children(root_descriptor, "record", "0", 0, 1)
+
+    def emit(self, indent, line):
+        self.lines.append("    " * indent + line)
+
+    def emit_nulls(self, node, r, d, indent):
+        for leaf in get_leaves(node):
+            self.emit(indent, f"w{self.leaf_ids[id(leaf)]}(None, {r}, {d})")
+
+    def emit_children(self, node, record, r, d, indent):
+        """
+        Emits the code shredding the children of @node out of the dict in the
+        variable @record, at repetition level @r (an expression) and definition
+        level @d.
+        """
+        for child in node.children.values():
+            name = repr(child.path)
+            value = f"v{child.node_id}"
+            self.emit(indent, f"{value} = {record}.get({name}, _MISSING)")
+
+            if child.is_repeated:
+                self.emit(
+                    indent,
+                    f"if {value} is _MISSING or (isinstance({value}, list) and not {value}):",
+                )
+                self.emit_nulls(child, r, d, indent + 1)
+                self.emit(indent, f"elif not isinstance({value}, list):")
+                self.emit(indent + 1, f"raise _repeated_field_error({name}, {value})")
+                self.emit(indent, "else:")
+                if child.is_leaf:
+                    write = f"w{self.leaf_ids[id(child)]}"
+                    self.emit(indent + 1, f"{write}({value}[0], {r}, {d + 1})")
+                    self.emit(indent + 1, f"for item in {value}[1:]:")
+                    self.emit(
+                        indent + 2,
+                        f"{write}(item, {child.max_repetition_level}, {d + 1})",
+                    )
+                else:
+                    index = f"i{child.node_id}"
+                    item = f"item{child.node_id}"
+                    child_r = f"r{child.node_id}"
+                    self.emit(indent + 1, f"for {index}, {item} in enumerate({value}):")
+                    self.emit(
+                        indent + 2,
+                        f"{child_r} = {r} if {index} == 0 else {child.max_repetition_level}",
+                    )
+                    self.emit(indent + 2, f"if not isinstance({item}, dict):")
+                    self.emit(indent + 3, f"{item} = _EMPTY")
+                    self.emit_children(child, item, child_r, d + 1, indent + 2)
+            else:
+                self.emit(indent, f"if {value} is _MISSING or {value} is None:")
+                self.emit_nulls(child, r, d, indent + 1)
+                self.emit(indent, f"elif isinstance({value}, list):")
+                self.emit(
+                    indent + 1, f"raise _not_repeated_field_error({name}, {value})"
+                )
+                if child.is_leaf:
+                    self.emit(indent, "else:")
+                    self.emit(
+                        indent + 1,
+                        f"w{self.leaf_ids[id(child)]}({value}, {r}, {d + 1})",
+                    )
+                else:
+                    self.emit(indent, f"elif not isinstance({value}, dict):")
+                    self.emit(indent + 1, f"raise _nested_group_error({name}, {value})")
+                    self.emit(indent, "else:")
+                    self.emit_children(child, value, r, d + 1, indent + 1)
+
+    def source(self):
+        return "\n".join(self.lines) + "\n"
+
+
+def compile_shredder(root_descriptor):
+    """
+    Returns a function shredding one record of the schema rooted at
+    @root_descriptor, like dissect_record, but generated for the schema so
+    that it does not dispatch on FieldWriters: fields are read in schema order
+    by nested ifs and loops, and nulls written by straight-line code.
+
+    The function is called as shred_record(record, writes), where @writes
+    holds the append method of the Column of each leaf, in schema order.
+    Returns None if the schema is too deeply nested to be compiled. Shredders
+    are cached until the schema is modified (see SchemaIndex.cached).
+    """
+    return get_schema_index(root_descriptor).cached(
+        ("shredder", root_descriptor),
+        lambda: _compile_shredder(root_descriptor),
+    )
+
+
+def _compile_shredder(root_descriptor):
+    source = _ShredderCompiler(root_descriptor).source()
+    namespace = {
+        "_MISSING": _MISSING,
+        "_EMPTY": _EMPTY,
+        "_repeated_field_error": _repeated_field_error,
+        "_not_repeated_field_error": _not_repeated_field_error,
+        "_nested_group_error": _nested_group_error,
+    }
+    try:
+        exec(
+            compile(source, f"<shredder {root_descriptor.full_path}>", "exec"),
+            namespace,
+        )
+    except (SyntaxError, RecursionError):
+        # e.g. "too many statically nested blocks"
+        return None
+    shred_record = namespace["shred_record"]
+    shred_record.source = source
+    return shred_record
+
+
+def _get_record_shredder(root, compiled):
+    """
+    Returns a function shredding one record into the columns of the
+    FieldWriter tree @root, with the shredder compiled for the schema if
+    @compiled, and write_record otherwise. It writes to the current columns of
+    the tree, so it must be got again once the tree is reset.
+    """
+    shred_record = compile_shredder(root.descriptor) if compiled else None
+    if shred_record is None:
+        return functools.partial(write_record, root)
+    writes = tuple(writer.data.append for writer in root.leaf_writers)
+    return functools.partial(shred_record, writes=writes)
+
+
+def _shred_into(root, records, compiled):
+    """
+    Shreds @records into the columns of the FieldWriter tree @root, see
+    _get_record_shredder.
+    """
+    shred_record = _get_record_shredder(root, compiled)
     for record in records:
-        decoder = RecordDecoder(record, definition_level=0)
-        dissect_record(decoder, root, repetition_level=0)
+        shred_record(record)
 
-    output = {}
 
+def _get_leaf_writers(root):
     def collect(node):
         if node.is_leaf():
-            output[node.descriptor] = node.data
+            yield node
 
         for child in node.children.values():
-            collect(child)
+            yield from collect(child)
 
     for child in root.children.values():
-        collect(child)
+        yield from collect(child)
+
+
+_MISSING = object()
+# Stands for records and group items that are not dicts
+_EMPTY = {}
+
+
+class _UnsupportedRecord(Exception):
+    """
+    Raised by the vectorized shredding path on records it does not handle, in
+    which case they are shredded by the general path instead.
+    """
+
+
+def _is_shallow(root_descriptor):
+    """
+    Whether only leaves of the schema are repeated, i.e. whether it can be
+    shredded by the vectorized path.
+    """
+    return all(
+        node.is_leaf or not node.is_repeated for node in get_all_nodes(root_descriptor)
+    )
+
+
+def _shred_leaf_vectorized(writer, records):
+    """
+    Shreds the column of the leaf of @writer, which must not have any repeated
+    ancestor, out of @records.
+
+    Records are only walked down the path of the leaf to find its values and
+    the definition level of each record: the number of fields present along the
+    path. Levels are then computed with NumPy: r is always 0 unless the leaf is
+    repeated, in which case the record's values get r = 0 and then 1.
+    """
+    leaf = writer.descriptor
+    group_names = [node.path for node in leaf.root_path[1:-1]]
+    name = leaf.path
+    is_repeated = leaf.is_repeated
+    max_definition_level = leaf.max_definition_level
+
+    # Definition level and number of values of each record
+    definition_levels = []
+    lengths = []
+    values = []
+    for record in records:
+        if not isinstance(record, dict):
+            raise _UnsupportedRecord()
+        value = record
+        definition_level = 0
+        length = 0
+        for group_name in group_names:
+            value = value.get(group_name)
+            if value is None:
+                break
+            if not isinstance(value, dict):
+                raise _UnsupportedRecord()
+            definition_level += 1
+        else:
+            value = value.get(name, _MISSING)
+            if is_repeated:
+                if value is not _MISSING:
+                    if not isinstance(value, list) or None in value:
+                        raise _UnsupportedRecord()
+                    length = len(value)
+                    values.extend(value)
+            elif value is not None and value is not _MISSING:
+                if isinstance(value, list):
+                    raise _UnsupportedRecord()
+                length = 1
+                values.append(value)
+        definition_levels.append(definition_level + (length > 0))
+        lengths.append(length)
+
+    definition_levels = np.array(definition_levels, dtype=np.uint16)
+    if is_repeated:
+        # Records without values still take one (null) triple
+        lengths = np.maximum(np.array(lengths, dtype=np.int64), 1)
+        record_starts = np.cumsum(lengths) - lengths
+        repetition_levels = np.ones(lengths.sum(), dtype=np.uint16)
+        repetition_levels[record_starts] = 0
+        definition_levels = np.repeat(definition_levels, lengths)
+    else:
+        repetition_levels = np.zeros(len(definition_levels), dtype=np.uint16)
+
+    column = writer.new_column()
+    column.repetition_levels = EncodedLevels.from_numpy(
+        leaf.max_repetition_level, repetition_levels
+    )
+    column.definition_levels = EncodedLevels.from_numpy(
+        max_definition_level, definition_levels
+    )
+    if column.values.encoding == "dictionary":
+        for i, value in enumerate(values):
+            column._append_dictionary_value(value)
+            if column.values.encoding != "dictionary":
+                # The dictionary outgrew its maximum size
+                column.values.extend(ValueBuffer.from_list(values[i + 1 :]))
+                break
+    else:
+        column.values = ValueBuffer.from_list(values)
+    return column
+
+
+def _shred_records_vectorized(root, records):
+    """
+    Returns the columns of @records shredded by the vectorized path, or None if
+    some of them are not supported by it.
+    """
+    try:
+        return {
+            writer.descriptor: _shred_leaf_vectorized(writer, records)
+            for writer in _get_leaf_writers(root)
+        }
+    except _UnsupportedRecord:
+        return None
+
+
+def _finish_columns(columns, record_index_interval, statistics):
+    for column in columns.values():
+        if record_index_interval is not None:
+            column.build_record_index(record_index_interval)
+        if statistics:
+            column.compute_statistics()
+    return columns
+
+
+def shred_records(
+    root_descriptor,
+    records,
+    dictionary_encoding=False,
+    record_index_interval=None,
+    statistics=False,
+    vectorized=True,
+    compiled=True,
+    stats=None,
+):
+    """
+    Shreds @records into a dict mapping each leaf ColumnDescriptor to a Column.
+
+    When only leaves of the schema are repeated (e.g. flat schemas), and unless
+    @vectorized is False, the columns are shredded one at a time with their
+    levels computed in bulk with NumPy rather than record by record. Records
+    this path does not support (e.g. invalid ones, or with null items in
+    lists) fall back to the general path.
+
+    The general path shreds records one at a time with the shredder compiled
+    for the schema (see compile_shredder), or with write_record if @compiled
+    is False.
+
+    @dictionary_encoding enables dictionary encoding of the values of either
+    all columns (True) or of the given collection of leaf ColumnDescriptors.
+    Columns fall back to plain encoding when they hold too many distinct values.
+
+    @record_index_interval, if set, builds the RecordIndex of every column,
+    indexing every @record_index_interval-th record.
+
+    @statistics computes the ColumnStatistics of every column, which let
+    queries skip the chunks they rule out (see predicate.iter_filter_chunks).
+
+    @stats, if set, is a Stats object to which the number of records, values
+    and nulls written per column, and the time spent shredding ("shred") and
+    building indexes and statistics ("finish") are added.
+    """
+    root = FieldWriter(root_descriptor, dictionary_encoding)
+    with timed(stats, "shred"):
+        columns = _shred_columns(root, records, vectorized, compiled)
+    with timed(stats, "finish"):
+        columns = _finish_columns(columns, record_index_interval, statistics)
+    if stats is not None:
+        stats.count_shredded(columns)
+    return columns
+
+
+def _shred_columns(root, records, vectorized, compiled):
+    """
+    Shreds @records with the FieldWriter tree @root, see shred_records, and
+    returns their columns. The tree is reset so that it can be reused.
+    """
+    if vectorized and _is_shallow(root.descriptor):
+        records = list(records)
+        columns = _shred_records_vectorized(root, records)
+        if columns is not None:
+            return columns
+
+    _shred_into(root, records, compiled)
+    return root.reset()
+
+
+def shred_chunks(
+    root_descriptor,
+    records,
+    chunk_records=None,
+    chunk_bytes=None,
+    dictionary_encoding=False,
+    record_index_interval=None,
+    statistics=False,
+    compiled=True,
+):
+    """
+    Shreds @records lazily, yielding a dict mapping each leaf ColumnDescriptor
+    to a Column (i.e. a row group) as soon as @chunk_records records have been
+    shredded or the columns hold @chunk_bytes bytes, whichever comes first.
+
+    Chunks always start at a record boundary, so each one can be assembled on
+    its own. Only the chunk being filled is held in memory. The size of the
+    columns is checked at intervals shrinking as they fill up, based on the
+    bytes per record so far, so a chunk can exceed @chunk_bytes by a few
+    records when record sizes vary. See shred_records
+    for @dictionary_encoding, @record_index_interval and @statistics, which
+    are computed per chunk, and for @compiled.
+    """
+    if chunk_records is None and chunk_bytes is None:
+        raise ValueError("One of chunk_records or chunk_bytes must be set")
+
+    root = FieldWriter(root_descriptor, dictionary_encoding)
+    leaf_writers = root.leaf_writers
+    shred_record = _get_record_shredder(root, compiled)
+
+    def flush():
+        nonlocal shred_record
+        columns = _finish_columns(root.reset(), record_index_interval, statistics)
+        shred_record = _get_record_shredder(root, compiled)
+        return columns
+
+    num_records = 0
+    # Number of records at which to check the size of the columns next
+    next_size_check = 1
+    for record in records:
+        shred_record(record)
+        num_records += 1
+
+        if chunk_records is not None and num_records >= chunk_records:
+            full = True
+        elif chunk_bytes is not None and num_records >= next_size_check:
+            nbytes = sum(writer.data.nbytes for writer in leaf_writers)
+            full = nbytes >= chunk_bytes
+            # Check again about halfway to @chunk_bytes at the current size per
+            # record, so only O(log(chunk_records)) times per chunk
+            next_size_check = num_records + max(
+                1, (chunk_bytes - nbytes) * num_records // (2 * max(nbytes, 1))
+            )
+        else:
+            full = False
 
-    return output
+        if full:
+            yield flush()
+            num_records = 0
+            next_size_check = 1
+
+    if num_records:
+        yield flush()
+
+
+# FieldWriter tree of a shred_records_parallel worker process, reused across
+# batches
+_worker_root = None
+
+
+def _init_worker(root_descriptor, dictionary_encoding):
+    global _worker_root
+    _worker_root = FieldWriter(root_descriptor, dictionary_encoding)
+
+
+def _shred_batch(records):
+    columns = _shred_columns(_worker_root, records, vectorized=True, compiled=True)
+    # Columns are sent back in leaf order, as the descriptors of the worker are
+    # copies of the ones of the caller
+    return list(columns.values())
+
+
+def _iter_batches(records, batch_records):
+    records = iter(records)
+    while batch := list(itertools.islice(records, batch_records)):
+        yield batch
+
+
+def shred_records_parallel(
+    root_descriptor,
+    records,
+    processes=None,
+    batch_records=DEFAULT_BATCH_RECORDS,
+    dictionary_encoding=False,
+    record_index_interval=None,
+    statistics=False,
+):
+    """
+    Same as shred_records, but shreds batches of @batch_records records in a
+    pool of @processes worker processes (defaults to the number of CPUs).
+
+    Records are independent of each other, so each worker shreds its batches
+    on its own with shred_records, and the columns of all batches are then
+    concatenated in record order. Records and values must be picklable.
+    """
+    if batch_records < 1:
+        raise ValueError("batch_records must be at least 1")
+
+    leaves = list(get_leaves(root_descriptor))
+    if not isinstance(dictionary_encoding, bool):
+        dictionary_encoding = list(dictionary_encoding)
+
+    with multiprocessing.Pool(
+        processes,
+        initializer=_init_worker,
+        initargs=(root_descriptor, dictionary_encoding),
+    ) as pool:
+        batches = list(pool.imap(_shred_batch, _iter_batches(records, batch_records)))
+
+    if not batches:
+        return shred_records(
+            root_descriptor, [], dictionary_encoding, record_index_interval, statistics
+        )
+    return _finish_columns(
+        {
+            leaf: Column.concat([batch[i] for batch in batches])
+            for i, leaf in enumerate(leaves)
+        },
+        record_index_interval,
+        statistics,
+    )
+
+
+class ColumnStore:
+    """
+    Shredded columns that records can be appended to over time, e.g. for
+    log-style ingestion, in O(new records) per append.
+
+    Appended records are shredded with a FieldWriter tree reused across
+    appends, and added to the columns of a tail chunk. The tail is sealed once
+    it holds @chunk_records records, and sealed chunks are never modified
+    afterwards: snapshots share them with the store rather than copying them,
+    and can be read while records are appended. Snapshots see the tail through
+    views bounded to its current length (see Column.view), as its buffers are
+    only ever appended to, so that taking them is O(1) and does not split the
+    store into small chunks. See shred_records for @dictionary_encoding,
+    @record_index_interval and @statistics, which apply to each sealed chunk.
+    """
+
+    def __init__(
+        self,
+        root_descriptor,
+        chunk_records=DEFAULT_CHUNK_RECORDS,
+        dictionary_encoding=False,
+        record_index_interval=None,
+        statistics=False,
+    ):
+        if chunk_records < 1:
+            raise ValueError("chunk_records must be at least 1")
+        self.root_descriptor = root_descriptor
+        self.chunk_records = chunk_records
+        self.record_index_interval = record_index_interval
+        self.statistics = statistics
+        self.num_records = 0
+        self._root = FieldWriter(root_descriptor, dictionary_encoding)
+        # Sealed chunks, as (number of records, columns) pairs
+        self._chunks = []
+        self._tail = None
+        self._tail_records = 0
+        # View of the tail given to snapshots, until the next append
+        self._tail_view = None
+
+    def append(self, records):
+        """
+        Shreds and appends @records. If one of them is invalid, ValueError is
+        raised and none of the records of its batch of up to @chunk_records
+        records are appended.
+        """
+        records = iter(records)
+        while batch := list(
+            itertools.islice(records, self.chunk_records - self._tail_records)
+        ):
+            try:
+                columns = _shred_columns(
+                    self._root, batch, vectorized=True, compiled=True
+                )
+            except Exception:
+                # Drop what was written of the batch
+                self._root.reset()
+                raise
+
+            if self._tail is None:
+                self._tail = columns
+            else:
+                for descriptor, column in columns.items():
+                    self._tail[descriptor].extend(column)
+            self._tail_records += len(batch)
+            self._tail_view = None
+            self.num_records += len(batch)
+            if self._tail_records >= self.chunk_records:
+                self._seal()
+
+    def _seal(self):
+        if self._tail is None:
+            return
+        columns = _finish_columns(
+            self._tail, self.record_index_interval, self.statistics
+        )
+        self._chunks.append((self._tail_records, columns))
+        self._tail = None
+        self._tail_records = 0
+        self._tail_view = None
+
+    def snapshot(self):
+        """
+        Returns a Snapshot of the records appended so far, made of the sealed
+        chunks and a view of the tail, in O(chunks + columns) time. The view
+        has neither statistics nor record index, as they would take O(tail)
+        to build. Snapshots must not be taken concurrently with append.
+        """
+        chunks = tuple(self._chunks)
+        if self._tail is not None:
+            if self._tail_view is None:
+                self._tail_view = (
+                    self._tail_records,
+                    {
+                        descriptor: column.view()
+                        for descriptor, column in self._tail.items()
+                    },
+                )
+            chunks += (self._tail_view,)
+        return Snapshot(self.root_descriptor, chunks)
+
+
+class Snapshot:
+    """
+    Read-only view of the records of a ColumnStore at the time it was taken,
+    sharing its sealed chunks. Their Columns must not be appended to.
+    """
+
+    def __init__(self, root_descriptor, chunks):
+        self.root_descriptor = root_descriptor
+        self._chunks = chunks
+        self.num_records = sum(num_records for num_records, _ in chunks)
+
+    @property
+    def chunks(self):
+        """
+        The chunks of the snapshot, as dicts mapping each leaf ColumnDescriptor
+        to a Column, e.g. for predicate.iter_filter_chunks.
+        """
+        return [columns for _, columns in self._chunks]
+
+    def iter_assemble_records(
+        self,
+        assembler_factory=JsonColumnAssembler,
+        columns=None,
+        offset=0,
+        limit=None,
+    ):
+        """
+        Lazily assembles the records of the snapshot, chunk by chunk, see
+        assembly.iter_assemble_records. Chunks before @offset are skipped
+        without being read.
+        """
+        for num_records, column_data in self._chunks:
+            if limit is not None and limit <= 0:
+                return
+            if offset >= num_records:
+                offset -= num_records
+                continue
+            records = iter_assemble_records(
+                self.root_descriptor,
+                column_data,
+                assembler_factory,
+                columns=columns,
+                offset=offset,
+                limit=limit,
+            )
+            for record in records:
+                yield record
+                if limit is not None:
+                    limit -= 1
+            offset = 0
+
+    def assemble_records(self, assembler_factory=JsonColumnAssembler, columns=None):
+        """
+        Assembles all the records of the snapshot, see iter_assemble_records.
+        """
+        return list(self.iter_assemble_records(assembler_factory, columns))
+
+    def to_columns(self):
+        """
+        Returns a dict mapping each leaf ColumnDescriptor to a new Column
+        holding the triples of all the chunks, e.g. to write them to a file.
+        """
+        return {
+            leaf: Column.concat([columns[leaf] for columns in self.chunks])
+            if self._chunks
+            else Column.for_descriptor(leaf)
+            for leaf in get_leaves(self.root_descriptor)
+        }
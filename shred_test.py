@@ -1,8 +1,21 @@
+import functools
 import unittest
 
+from assembly import assemble_records
+from column import Column
 from paper_schema import PaperSchema
 from schema import parse_schema
-from shred import shred_records
+from shred import (
+    ColumnStore,
+    FieldWriter,
+    RecordDecoder,
+    compile_shredder,
+    dissect_record,
+    shred_chunks,
+    shred_records,
+    shred_records_parallel,
+    write_record,
+)
 from test_utils import get_desc
 
 
@@ -118,6 +131,31 @@ class TestDremelShred(unittest.TestCase):
             [("m1", 0, 2), ("m2", 0, 2), (None, 0, 1), (None, 0, 0)],
         )
 
+    def test_same_name_and_levels_in_different_groups(self):
+        schema = parse_schema(["a.x", "b.x"])
+        records = [{"a": {"x": 1}, "b": {"x": 2}}]
+        result = shred_records(schema, records)
+
+        self.assertEqual(len(result), 2)
+        self.assertEqual(result[get_desc(schema, "a.x")], [(1, 0, 2)])
+        self.assertEqual(result[get_desc(schema, "b.x")], [(2, 0, 2)])
+
+    def test_dictionary_encoding(self):
+        s = PaperSchema()
+        plain = shred_records(s.root, s.records)
+        encoded = shred_records(s.root, s.records, dictionary_encoding=True)
+        only_code = shred_records(
+            s.root, s.records, dictionary_encoding=[s.name_language_code]
+        )
+
+        for desc in plain:
+            self.assertEqual(encoded[desc], plain[desc].to_tuples())
+            self.assertEqual(encoded[desc].values.encoding, "dictionary")
+            self.assertEqual(
+                only_code[desc].values.encoding,
+                "dictionary" if desc is s.name_language_code else "plain",
+            )
+
     def test_validation_repeated_field_must_be_list(self):
         schema = parse_schema(["r[*]"])
         records = [{"r": 1}]
@@ -168,5 +206,393 @@ class TestDremelShred(unittest.TestCase):
         )
 
 
+def dissect_records(schema, records, dictionary_encoding=False):
+    root = FieldWriter(schema, dictionary_encoding)
+    for record in records:
+        dissect_record(RecordDecoder(record, 0), root, 0)
+    return root.reset()
+
+
+def write_records(schema, records, dictionary_encoding=False):
+    root = FieldWriter(schema, dictionary_encoding)
+    for record in records:
+        write_record(root, record)
+    return root.reset()
+
+
+def shred_chunks_and_concat(schema, records, dictionary_encoding=False):
+    chunks = list(
+        shred_chunks(
+            schema, records, chunk_records=2, dictionary_encoding=dictionary_encoding
+        )
+    )
+    return {
+        desc: Column.concat([chunk[desc] for chunk in chunks]) for desc in chunks[0]
+    }
+
+
+# Every path shredding records, checked against dissect_record
+SHREDDERS = {
+    "write_record": write_records,
+    "interpreted": functools.partial(shred_records, vectorized=False, compiled=False),
+    "compiled": functools.partial(shred_records, vectorized=False),
+    "vectorized": shred_records,
+    "shred_chunks": shred_chunks_and_concat,
+}
+
+
+def assert_same_as_dissect_record(test, schema, records, dictionary_encoding=False):
+    """
+    Checks that every path of SHREDDERS shreds @records into the same triples
+    as dissect_record, and returns their columns by path.
+    """
+    expected = dissect_records(schema, records, dictionary_encoding)
+    results = {}
+    for name, shred in SHREDDERS.items():
+        result = shred(schema, records, dictionary_encoding=dictionary_encoding)
+        test.assertEqual(list(result), list(expected), name)
+        for desc, column in expected.items():
+            test.assertEqual(
+                result[desc], column.to_tuples(), f"{name}: {desc.full_path}"
+            )
+        results[name] = result
+    return results
+
+
+def assert_same_errors_as_dissect_record(test, schema, records):
+    """
+    Checks that every path of SHREDDERS raises the same error as
+    dissect_record for each of the invalid @records.
+    """
+    for record in records:
+        with test.assertRaises(ValueError) as expected:
+            dissect_records(schema, [record])
+        for name, shred in SHREDDERS.items():
+            with test.assertRaises(ValueError, msg=name) as result:
+                shred(schema, [record])
+            test.assertEqual(str(result.exception), str(expected.exception), name)
+
+
+class TestShreddingPaths(unittest.TestCase):
+    def test_same_as_dissect_record(self):
+        s = PaperSchema()
+        assert_same_as_dissect_record(self, s.root, s.records + [{}, None, 1])
+
+        schema = parse_schema(["a[*].b[*].c", "a[*].b[*].d[*]", "a[*].e", "f.g[*]"])
+        assert_same_as_dissect_record(
+            self,
+            schema,
+            [
+                {"a": [{"b": [{"c": 1, "d": [1, 2]}, {}, None]}, {"e": "x"}]},
+                {"a": [None, {"b": []}, {"b": [{"d": []}]}], "f": {"g": [None]}},
+                {"f": {"g": [1]}, "a": [], "other": 1},
+                {"a": [1, "x"], "f": None},
+                {"a": [], "f": {}},
+            ],
+        )
+
+    def test_same_errors_as_dissect_record(self):
+        schema = parse_schema(["a[*].b[*].c", "a[*].e", "f.g[*]"])
+        assert_same_errors_as_dissect_record(
+            self,
+            schema,
+            [
+                {"a": 1},
+                {"a": [{"b": {"c": 1}}]},
+                {"a": [{"b": [{"c": [1]}]}]},
+                {"a": [{"e": [1]}]},
+                {"f": []},
+                {"f": 1},
+                {"f": {"g": "x"}},
+            ],
+        )
+
+
+class TestWriteRecord(unittest.TestCase):
+    def test_reset(self):
+        s = PaperSchema()
+        root = FieldWriter(s.root, dictionary_encoding=[s.name_language_country])
+        self.assertEqual(
+            [leaf.descriptor for leaf in root.leaf_writers],
+            list(shred_records(s.root, [])),
+        )
+
+        for record in s.records:
+            write_record(root, record)
+        first = root.reset()
+        write_record(root, s.records[1])
+        second = root.reset()
+
+        self.assertEqual(first, dissect_records(s.root, s.records))
+        self.assertEqual(second, dissect_records(s.root, s.records[1:]))
+        self.assertEqual(second[s.name_language_country].values.encoding, "dictionary")
+        self.assertEqual(root.reset()[s.doc_id], [])
+
+
+class TestShredRecordsVectorized(unittest.TestCase):
+    def assert_same_as_dissect_record(self, schema, records, **kwargs):
+        results = assert_same_as_dissect_record(self, schema, records, **kwargs)
+        result = results["vectorized"]
+        for desc, column in results["interpreted"].items():
+            self.assertEqual(result[desc].values.kind, column.values.kind)
+            self.assertEqual(result[desc].values.encoding, column.values.encoding)
+        return result
+
+    def test_flat_and_shallow_schemas(self):
+        schema = parse_schema(["id", "user.name", "user.address.city", "tags[*]"])
+        records = [
+            {"id": 1, "user": {"name": "a", "address": {"city": "x"}}, "tags": ["t"]},
+            {"id": 2, "user": {"address": {}}, "tags": []},
+            {"user": None, "tags": ["t", "u", "v"]},
+            {"id": None, "user": {"name": "b", "address": None}, "extra": 1},
+            {},
+        ]
+        result = self.assert_same_as_dissect_record(schema, records)
+        self.assert_same_as_dissect_record(schema, records, dictionary_encoding=True)
+
+        self.assertEqual(
+            result[get_desc(schema, "tags[*]")],
+            [("t", 0, 1), (None, 0, 0), ("t", 0, 1), ("u", 1, 1), ("v", 1, 1)]
+            + [(None, 0, 0)] * 2,
+        )
+        # Columns stay appendable
+        column = result[get_desc(schema, "id")]
+        column.append(3, 0, 1)
+        self.assertEqual(column[-2:], [(None, 0, 0), (3, 0, 1)])
+
+    def test_falls_back_on_unsupported_records(self):
+        schema = parse_schema(["a.b", "c[*]"])
+        self.assert_same_as_dissect_record(schema, [{"c": [1, None]}, {"c": [2]}])
+        self.assert_same_as_dissect_record(schema, [None, {"a": {"b": 1}}])
+        assert_same_errors_as_dissect_record(
+            self, schema, [{"c": 1}, {"c": None}, {"a": 1}, {"a": {"b": [1]}}]
+        )
+
+    def test_dictionary_fallback(self):
+        schema = parse_schema(["a"])
+        records = [{"a": i} for i in range(2000)]
+        result = self.assert_same_as_dissect_record(
+            schema, records, dictionary_encoding=True
+        )
+        self.assertEqual(result[get_desc(schema, "a")].values.kind, "int")
+
+
+class TestCompiledShredder(unittest.TestCase):
+    def test_cached_per_schema(self):
+        schema = parse_schema(["a[*].b", "c"])
+        shred_record = compile_shredder(schema)
+        self.assertIs(compile_shredder(schema), shred_record)
+        self.assertIn("def shred_record(", shred_record.source)
+        self.assertIsNot(compile_shredder(parse_schema(["a[*].b", "c"])), shred_record)
+
+
+class TestShredChunks(unittest.TestCase):
+    def test_chunk_records(self):
+        s = PaperSchema()
+        records = s.records + [{}]
+        chunks = list(shred_chunks(s.root, records, chunk_records=2))
+
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(chunks[0][s.doc_id], [(10, 0, 1), (20, 0, 1)])
+        self.assertEqual(chunks[1][s.doc_id], [(None, 0, 0)])
+
+        expected = shred_records(s.root, records)
+        for desc, column in expected.items():
+            self.assertEqual(
+                [v for chunk in chunks for v in chunk[desc]], column.to_tuples()
+            )
+
+    def test_chunk_bytes(self):
+        schema = parse_schema(["a[*]"])
+        records = [{"a": [1, 2, 3, 4]}] * 10
+        a = get_desc(schema, "a[*]")
+
+        # Each record takes 4 * 8 bytes of values and 4 bits of each level
+        chunks = list(shred_chunks(schema, records, chunk_bytes=100))
+
+        self.assertEqual([len(chunk[a]) for chunk in chunks], [12, 12, 12, 4])
+        self.assertEqual(chunks[1][a][:4], [(1, 0, 1), (2, 1, 1), (3, 1, 1), (4, 1, 1)])
+
+    def test_statistics(self):
+        schema = parse_schema(["a[*]"])
+        records = [{"a": [i, i + 1]} for i in range(10)] + [{}]
+        a = get_desc(schema, "a[*]")
+
+        chunks = list(shred_chunks(schema, records, chunk_records=4, statistics=True))
+
+        self.assertEqual(
+            [(c[a].statistics.min_value, c[a].statistics.max_value) for c in chunks],
+            [(0, 4), (4, 8), (8, 10)],
+        )
+        self.assertEqual(chunks[2][a].statistics.null_count, 1)
+        self.assertIsNone(
+            next(shred_chunks(schema, records, chunk_records=4))[a].statistics
+        )
+
+    def test_is_lazy(self):
+        schema = parse_schema(["a"])
+
+        def records():
+            yield {"a": 1}
+            raise AssertionError("Should not read past the first chunk")
+
+        chunks = shred_chunks(schema, records(), chunk_records=1)
+        self.assertEqual(next(chunks)[get_desc(schema, "a")], [(1, 0, 1)])
+
+    def test_requires_chunk_size(self):
+        with self.assertRaises(ValueError):
+            list(shred_chunks(parse_schema(["a"]), [{}]))
+
+
+class TestShredRecordsParallel(unittest.TestCase):
+    def test_same_as_shred_records(self):
+        s = PaperSchema()
+        records = s.records * 5
+        expected = shred_records(s.root, records)
+
+        for batch_records in [1, 3, 100]:
+            result = shred_records_parallel(
+                s.root, records, processes=2, batch_records=batch_records
+            )
+            self.assertEqual(list(result), list(expected))
+            for desc, column in expected.items():
+                self.assertEqual(result[desc], column.to_tuples())
+
+    def test_dictionary_encoding(self):
+        s = PaperSchema()
+        result = shred_records_parallel(
+            s.root,
+            s.records * 3,
+            processes=2,
+            batch_records=1,
+            dictionary_encoding=[s.name_language_country],
+        )
+
+        values = result[s.name_language_country].values
+        self.assertEqual(values.encoding, "dictionary")
+        self.assertEqual(list(values.dictionary), ["us", "gb"])
+        self.assertEqual(list(values), ["us", "gb"] * 3)
+        self.assertEqual(result[s.name_language_code].values.encoding, "plain")
+
+    def test_no_records(self):
+        schema = parse_schema(["a"])
+        result = shred_records_parallel(schema, [], processes=1)
+        self.assertEqual(result[get_desc(schema, "a")], [])
+
+
+class TestColumnStore(unittest.TestCase):
+    def test_append_and_snapshot(self):
+        s = PaperSchema()
+        records = s.records * 10
+        store = ColumnStore(s.root, chunk_records=3)
+        for start in range(0, len(records), 4):
+            store.append(records[start : start + 4])
+        self.assertEqual(store.num_records, 20)
+
+        snapshot = store.snapshot()
+        self.assertEqual(snapshot.num_records, 20)
+        self.assertEqual(
+            [len(chunk[s.doc_id]) for chunk in snapshot.chunks], [3] * 6 + [2]
+        )
+        expected = shred_records(s.root, records)
+        self.assertEqual(
+            snapshot.assemble_records(), assemble_records(s.root, expected)
+        )
+        for desc, column in snapshot.to_columns().items():
+            self.assertEqual(column, expected[desc].to_tuples())
+
+    def test_snapshots_are_not_modified(self):
+        schema = parse_schema(["a", "b[*]"])
+        store = ColumnStore(schema, chunk_records=4)
+        store.append([{"a": i, "b": [i] * (i % 3)} for i in range(6)])
+
+        snapshot = store.snapshot()
+        chunks = snapshot.chunks
+        store.append([{"a": 6}])
+        store.append([{"a": 7}])
+
+        self.assertEqual([r["a"] for r in snapshot.assemble_records()], list(range(6)))
+        # The sealed chunk is shared with the new snapshot, not copied
+        new_snapshot = store.snapshot()
+        self.assertEqual(new_snapshot.num_records, 8)
+        self.assertIs(new_snapshot.chunks[0], chunks[0])
+        self.assertEqual(
+            [r["a"] for r in new_snapshot.assemble_records()], list(range(8))
+        )
+
+    def test_frequent_snapshots(self):
+        schema = parse_schema(["a"])
+        a = get_desc(schema, "a")
+        store = ColumnStore(schema, chunk_records=4)
+        snapshots = []
+        for i in range(10):
+            store.append([{"a": i}])
+            snapshots.append(store.snapshot())
+
+        # Snapshots do not seal the tail
+        self.assertEqual([len(chunk[a]) for chunk in snapshots[-1].chunks], [4, 4, 2])
+        for i, snapshot in enumerate(snapshots):
+            self.assertEqual(
+                [r["a"] for r in snapshot.assemble_records()], list(range(i + 1))
+            )
+        # The view of the tail is shared until the next append
+        self.assertIs(store.snapshot().chunks[-1], snapshots[-1].chunks[-1])
+
+    def test_iter_assemble_records(self):
+        schema = parse_schema(["a"])
+        store = ColumnStore(schema, chunk_records=3)
+        store.append({"a": i} for i in range(10))
+        snapshot = store.snapshot()
+
+        def ids(**kwargs):
+            return [r["a"] for r in snapshot.iter_assemble_records(**kwargs)]
+
+        self.assertEqual(ids(offset=4), list(range(4, 10)))
+        self.assertEqual(ids(offset=2, limit=5), list(range(2, 7)))
+        self.assertEqual(ids(offset=9, limit=5), [9])
+        self.assertEqual(ids(limit=0), [])
+        self.assertEqual(ids(offset=10), [])
+
+    def test_invalid_records(self):
+        schema = parse_schema(["a.b", "c[*]"])
+        store = ColumnStore(schema)
+        store.append([{"c": [1]}])
+        with self.assertRaises(ValueError):
+            store.append([{"c": [2]}, {"c": 3}])
+        store.append([{"a": {"b": 4}}])
+
+        self.assertEqual(store.num_records, 2)
+        valid = [{"c": [1]}, {"a": {"b": 4}}]
+        self.assertEqual(
+            store.snapshot().assemble_records(),
+            assemble_records(schema, shred_records(schema, valid)),
+        )
+
+    def test_chunk_options(self):
+        s = PaperSchema()
+        store = ColumnStore(
+            s.root,
+            chunk_records=2,
+            dictionary_encoding=[s.name_language_country],
+            record_index_interval=1,
+            statistics=True,
+        )
+        store.append(s.records * 2)
+        store.append(s.records[:1])
+
+        *sealed, tail = store.snapshot().chunks
+        for chunk in sealed:
+            column = chunk[s.name_language_country]
+            self.assertEqual(column.values.encoding, "dictionary")
+            self.assertIsNotNone(column.record_index)
+            self.assertEqual(column.statistics.max_value, "us")
+        # The tail is only finished once sealed
+        column = tail[s.name_language_country]
+        self.assertEqual(column.values.encoding, "dictionary")
+        self.assertIsNone(column.record_index)
+        self.assertIsNone(column.statistics)
+        self.assertEqual(ColumnStore(s.root).snapshot().assemble_records(), [])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,93 @@
+import collections
+import contextlib
+import time
+
+
+class Stats:
+    """
+    Counters and wall times collected by shred_records and assemble_records
+    when they are given a Stats object, e.g.:
+
+        stats = Stats()
+        records = assemble_records(root, column_data, stats=stats)
+        print(stats.to_dict())
+
+    Collecting them is opt-in: without a Stats object nothing is counted nor
+    timed. Counters are keyed by the full path of columns and schema nodes,
+    and accumulate over all the calls the object is given to.
+    """
+
+    def __init__(self):
+        # Shredding
+        self.records_shredded = 0
+        # (value, r, d) triples written per column
+        self.values_written = collections.Counter()
+        # Nulls written per column for missing fields
+        self.nulls_emitted = collections.Counter()
+
+        # Assembly
+        self.records_assembled = 0
+        # (value, r, d) triples read per column
+        self.values_read = collections.Counter()
+        # FSM transitions taken per (from column, to column, repetition
+        # level), where the column is None at the end of a record
+        self.transitions = collections.Counter()
+        # Calls to ColumnAssembler.begin() and end() per schema node
+        self.begins = collections.Counter()
+        self.ends = collections.Counter()
+
+        # Wall time in seconds per phase, e.g. "shred" or "assemble"
+        self.phase_times = collections.defaultdict(float)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Adds the wall time spent in the with block to phase @name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_times[name] += time.perf_counter() - start
+
+    def count_shredded(self, column_data):
+        """
+        Counts the records, values and nulls of the shredded @column_data.
+        """
+        for i, (descriptor, column) in enumerate(column_data.items()):
+            repetition_levels, definition_levels = column.levels_to_numpy()
+            if i == 0:
+                self.records_shredded += int((repetition_levels == 0).sum())
+            self.values_written[descriptor.full_path] += len(definition_levels)
+            self.nulls_emitted[descriptor.full_path] += int(
+                (definition_levels < column.max_definition_level).sum()
+            )
+
+    def to_dict(self):
+        """
+        Returns the stats as a JSON serializable dict.
+        """
+        return {
+            "records_shredded": self.records_shredded,
+            "values_written": dict(self.values_written),
+            "nulls_emitted": dict(self.nulls_emitted),
+            "records_assembled": self.records_assembled,
+            "values_read": dict(self.values_read),
+            "transitions": [
+                {"from": source, "to": target, "level": level, "count": count}
+                for (source, target, level), count in self.transitions.items()
+            ],
+            "begins": dict(self.begins),
+            "ends": dict(self.ends),
+            "phase_times": dict(self.phase_times),
+        }
+
+
+def timed(stats, name):
+    """
+    Returns a context manager timing phase @name into @stats, which does
+    nothing if @stats is None.
+    """
+    if stats is None:
+        return contextlib.nullcontext()
+    return stats.phase(name)
@@ -0,0 +1,93 @@
+import json
+import unittest
+
+from assembly import assemble_records
+from paper_schema import PaperSchema
+from shred import shred_records
+from stats import Stats, timed
+
+
+class TestStats(unittest.TestCase):
+    def test_shred_records(self):
+        s = PaperSchema()
+        stats = Stats()
+        shredded = shred_records(s.root, s.records, stats=stats)
+
+        self.assertEqual(stats.records_shredded, 2)
+        self.assertEqual(stats.values_written["Name.Language.Country"], 5)
+        self.assertEqual(
+            stats.nulls_emitted,
+            {
+                "DocId": 0,
+                "Links.Backward": 1,
+                "Links.Forward": 0,
+                "Name.Language.Code": 2,
+                "Name.Language.Country": 3,
+                "Name.Url": 1,
+            },
+        )
+        self.assertEqual(set(stats.phase_times), {"shred", "finish"})
+        self.assertEqual(shredded, shred_records(s.root, s.records))
+
+        shred_records(s.root, s.records, stats=stats)
+        self.assertEqual(stats.records_shredded, 4)
+
+    def test_assemble_records(self):
+        s = PaperSchema()
+        shredded = shred_records(s.root, s.records)
+        stats = Stats()
+        records = assemble_records(s.root, shredded, stats=stats)
+
+        self.assertEqual(records, assemble_records(s.root, shredded))
+        self.assertEqual(stats.records_assembled, 2)
+        self.assertEqual(
+            stats.values_read,
+            {desc.full_path: len(column) for desc, column in shredded.items()},
+        )
+        # Each triple read is followed by a transition
+        self.assertEqual(
+            sum(stats.transitions.values()), sum(stats.values_read.values())
+        )
+        self.assertEqual(stats.transitions[("Name.Url", None, 0)], 2)
+        self.assertEqual(
+            stats.transitions[("Name.Language.Country", "Name.Language.Code", 2)], 1
+        )
+        self.assertEqual(stats.begins, stats.ends)
+        self.assertEqual(stats.begins["Name.Language"], 4)
+        self.assertEqual(set(stats.phase_times), {"plan", "assemble"})
+
+    def test_record_ids(self):
+        s = PaperSchema()
+        shredded = shred_records(s.root, s.records * 10)
+        stats = Stats()
+        assemble_records(s.root, shredded, record_ids=[3], stats=stats)
+
+        self.assertEqual(stats.records_assembled, 1)
+        self.assertEqual(stats.values_read["DocId"], 1)
+        self.assertIn("seek", stats.phase_times)
+
+    def test_to_dict(self):
+        s = PaperSchema()
+        stats = Stats()
+        assemble_records(
+            s.root, shred_records(s.root, s.records, stats=stats), stats=stats
+        )
+
+        result = json.loads(json.dumps(stats.to_dict()))
+        self.assertEqual(result["records_assembled"], 2)
+        self.assertIn(
+            {"from": "Name.Url", "to": None, "level": 0, "count": 2},
+            result["transitions"],
+        )
+
+    def test_timed(self):
+        stats = Stats()
+        with timed(stats, "phase"):
+            pass
+        with timed(None, "phase"):
+            pass
+        self.assertEqual(list(stats.phase_times), ["phase"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,256 @@
+import collections.abc
+import json
+import mmap
+import struct
+
+from column import Column, ColumnStatistics, DictionaryValueBuffer, ValueBuffer
+from encoding import EncodedLevels
+from schema import get_leaves, parse_schema
+
+# File layout:
+#
+#   MAGIC
+#   column chunk for each leaf, in schema order, each made of 8-byte aligned
+#   sections: RLE / bit-packing encoded repetition and definition levels (see
+#   encoding.LevelEncoder), values (and offsets for strings), or for dictionary
+#   encoded columns, the dictionary values (and offsets) and the codes
+#   footer: JSON with the schema paths and levels of the leaves, the offsets of
+#   their sections and their statistics if computed
+#   footer length (uint64, little endian)
+#   MAGIC
+MAGIC = b"DRML"
+VERSION = 3
+
+_FOOTER_LENGTH = struct.Struct("<Q")
+_ALIGNMENT = 8
+
+
+def _is_json_value(value):
+    # Only values that json.loads hands back as they were can be stored, e.g.
+    # not tuples (loaded as lists) nor dicts with int keys
+    value_type = type(value)
+    if value is None or value_type in (bool, int, float, str):
+        return True
+    if value_type is list:
+        return all(map(_is_json_value, value))
+    if value_type is dict:
+        return all(type(key) is str and _is_json_value(v) for key, v in value.items())
+    return False
+
+
+def _value_sections(values, path, prefix=""):
+    if values.encoding == "dictionary":
+        sections = _value_sections(values.dictionary, path, prefix="dictionary_")
+        sections["codes"] = values.buffers()
+        return sections
+    if values.kind in ("int", "float"):
+        data, _ = values.buffers()
+        return {f"{prefix}values": data}
+    if values.kind == "str":
+        data, offsets = values.buffers()
+        return {f"{prefix}offsets": offsets, f"{prefix}values": data}
+    if values.kind == "object":
+        for value in values:
+            if not _is_json_value(value):
+                raise ValueError(
+                    f"Cannot store value {value!r} of column {path}: values must be"
+                    " ints, floats, strings or JSON values (None, bools, lists and"
+                    " dicts with string keys)"
+                )
+        return {f"{prefix}values": json.dumps(list(values)).encode("utf-8")}
+    return {}
+
+
+def write_columns(path, root_descriptor, column_data):
+    """
+    Writes the columns of the schema rooted at @root_descriptor to the file at
+    @path. @column_data maps each leaf ColumnDescriptor to a Column (or a list)
+    of (value, r, d) tuples, as returned by shred_records.
+
+    Values that are not ints, floats or strings are stored as JSON, and
+    ValueError is raised for those that would not be read back as they were.
+    """
+    entries = []
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+
+        def write_section(buffer):
+            padding = -f.tell() % _ALIGNMENT
+            f.write(b"\0" * padding)
+            offset = f.tell()
+            f.write(buffer)
+            return [offset, f.tell() - offset]
+
+        for leaf in get_leaves(root_descriptor):
+            column = column_data[leaf]
+            if not isinstance(column, Column):
+                column = Column.from_tuples(leaf, column)
+
+            entry = {
+                "path": leaf.schema_path,
+                "max_repetition_level": leaf.max_repetition_level,
+                "max_definition_level": leaf.max_definition_level,
+                "num_levels": len(column),
+                "value_kind": column.values.kind,
+                "value_encoding": column.values.encoding,
+                "repetition_levels": write_section(column.repetition_levels.data),
+                "definition_levels": write_section(column.definition_levels.data),
+            }
+            if column.values.encoding == "dictionary":
+                entry["codes_typecode"] = column.values.codes.typecode
+            if column.statistics is not None:
+                entry["statistics"] = column.statistics.to_dict()
+            for name, buffer in _value_sections(
+                column.values, leaf.schema_path
+            ).items():
+                entry[name] = write_section(buffer)
+            entries.append(entry)
+
+        footer = json.dumps({"version": VERSION, "columns": entries}).encode("utf-8")
+        f.write(footer)
+        f.write(_FOOTER_LENGTH.pack(len(footer)))
+        f.write(MAGIC)
+
+
+class ColumnFile(collections.abc.Mapping):
+    """
+    A file written by write_columns, read through mmap.
+
+    The schema is rebuilt from the footer as root_descriptor, and the file maps
+    each of its leaves to a Column viewing the mapped file. Nothing but the
+    footer is read upfront: a column's pages are only touched when it is read,
+    e.g. when it is projected by assemble_records.
+
+    Columns read from the file remain valid once it is closed: the mapping is
+    only closed when the last of them is garbage collected.
+    """
+
+    def __init__(self, path):
+        self._columns = {}
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path} is not a column file") from None
+        self._buffer = memoryview(self._mmap)
+
+        trailer_size = _FOOTER_LENGTH.size + len(MAGIC)
+        if (
+            len(self._buffer) < len(MAGIC) + trailer_size
+            or self._buffer[: len(MAGIC)] != MAGIC
+            or self._buffer[-len(MAGIC) :] != MAGIC
+        ):
+            self.close()
+            raise ValueError(f"{path} is not a column file")
+
+        (footer_length,) = _FOOTER_LENGTH.unpack(
+            self._buffer[-trailer_size : -len(MAGIC)]
+        )
+        footer_start = len(self._buffer) - trailer_size - footer_length
+        footer = json.loads(bytes(self._buffer[footer_start:-trailer_size]))
+        if footer["version"] != VERSION:
+            self.close()
+            raise ValueError(f"Unsupported column file version {footer['version']}")
+
+        entries = footer["columns"]
+        self.root_descriptor = parse_schema([entry["path"] for entry in entries])
+        self._entries = dict(zip(get_leaves(self.root_descriptor), entries))
+        for leaf, entry in self._entries.items():
+            if (
+                leaf.max_repetition_level != entry["max_repetition_level"]
+                or leaf.max_definition_level != entry["max_definition_level"]
+            ):
+                self.close()
+                raise ValueError(f"Levels of column {entry['path']} do not match")
+
+    def _section(self, entry, name, typecode="B"):
+        offset, length = entry[name]
+        return self._buffer[offset : offset + length].cast(typecode)
+
+    def _read_values(self, entry, kind, prefix=""):
+        if kind in ("int", "float"):
+            return ValueBuffer.from_buffers(
+                kind,
+                self._section(entry, f"{prefix}values", "q" if kind == "int" else "d"),
+            )
+        if kind == "str":
+            return ValueBuffer.from_buffers(
+                kind,
+                self._section(entry, f"{prefix}values"),
+                offsets=self._section(entry, f"{prefix}offsets", "q"),
+            )
+        if kind == "object":
+            return ValueBuffer.from_buffers(
+                kind, json.loads(bytes(self._section(entry, f"{prefix}values")))
+            )
+        return ValueBuffer()
+
+    def _read_column(self, entry):
+        kind = entry["value_kind"]
+        if entry["value_encoding"] == "dictionary":
+            values = DictionaryValueBuffer.from_buffers(
+                self._read_values(entry, kind, prefix="dictionary_"),
+                self._section(entry, "codes", entry["codes_typecode"]),
+            )
+        else:
+            values = self._read_values(entry, kind)
+
+        max_repetition_level = entry["max_repetition_level"]
+        max_definition_level = entry["max_definition_level"]
+        column = Column.from_buffers(
+            max_repetition_level,
+            max_definition_level,
+            EncodedLevels.from_buffer(
+                max_repetition_level,
+                self._section(entry, "repetition_levels"),
+                entry["num_levels"],
+            ),
+            EncodedLevels.from_buffer(
+                max_definition_level,
+                self._section(entry, "definition_levels"),
+                entry["num_levels"],
+            ),
+            values,
+        )
+        if "statistics" in entry:
+            column.statistics = ColumnStatistics.from_dict(entry["statistics"])
+        return column
+
+    def __getitem__(self, descriptor):
+        if descriptor not in self._columns:
+            self._columns[descriptor] = self._read_column(self._entries[descriptor])
+        return self._columns[descriptor]
+
+    def get_statistics(self, descriptor):
+        """
+        Returns the ColumnStatistics of the column of @descriptor stored in the
+        footer, or None, without reading the column.
+        """
+        entry = self._entries[descriptor]
+        if "statistics" not in entry:
+            return None
+        return ColumnStatistics.from_dict(entry["statistics"])
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def close(self):
+        self._columns.clear()
+        self._file.close()
+        self._buffer.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Views of the mapping are still exported: mmap unmaps it when the
+            # last of them is released
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
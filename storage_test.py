@@ -0,0 +1,155 @@
+import os
+import tempfile
+import unittest
+
+from assembly import (
+    assemble_records,
+    assemble_records_parallel,
+    iter_assemble_records,
+)
+from paper_schema import PaperSchema
+from schema import get_leaves, parse_schema
+from shred import shred_records
+from storage import ColumnFile, write_columns
+from test_utils import get_desc
+
+
+class TestColumnFile(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "columns.drml")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_round_trip(self):
+        s = PaperSchema()
+        shredded = shred_records(s.root, s.records)
+        write_columns(self.path, s.root, shredded)
+
+        with ColumnFile(self.path) as f:
+            self.assertTrue(f.root_descriptor.structurally_equal(s.root))
+            for leaf, source in zip(get_leaves(f.root_descriptor), get_leaves(s.root)):
+                self.assertEqual(f[leaf], shredded[source].to_tuples())
+
+            self.assertEqual(
+                assemble_records(f.root_descriptor, f),
+                assemble_records(s.root, shredded),
+            )
+
+    def test_value_kinds(self):
+        schema = parse_schema(["i", "f", "s", "o[*]", "n"])
+        records = [
+            {"i": 1, "f": 1.5, "s": "en-us", "o": [True, "a"]},
+            {"i": -(2**40), "f": 2.5, "s": "日本", "o": [None, 1]},
+        ]
+        shredded = shred_records(schema, records)
+        write_columns(self.path, schema, shredded)
+
+        with ColumnFile(self.path) as f:
+            for path in ["i", "f", "s", "o[*]", "n"]:
+                self.assertEqual(
+                    f[get_desc(f.root_descriptor, path)],
+                    shredded[get_desc(schema, path)].to_tuples(),
+                )
+
+    def test_assemble_records_parallel(self):
+        s = PaperSchema()
+        shredded = shred_records(s.root, s.records * 3, dictionary_encoding=True)
+        shredded[s.doc_id] = shred_records(s.root, s.records * 3)[s.doc_id]
+        write_columns(self.path, s.root, shredded)
+
+        with ColumnFile(self.path) as f:
+            self.assertEqual(
+                assemble_records_parallel(
+                    f.root_descriptor, f, processes=2, slice_records=2
+                ),
+                assemble_records(s.root, shredded),
+            )
+
+    def test_statistics(self):
+        s = PaperSchema()
+        shredded = shred_records(s.root, s.records, statistics=True)
+        write_columns(self.path, s.root, shredded)
+
+        with ColumnFile(self.path) as f:
+            for leaf, source in zip(get_leaves(f.root_descriptor), get_leaves(s.root)):
+                self.assertEqual(
+                    f[leaf].statistics.to_dict(), shredded[source].statistics.to_dict()
+                )
+
+    def test_dictionary_encoding(self):
+        s = PaperSchema()
+        shredded = shred_records(s.root, s.records, dictionary_encoding=True)
+        write_columns(self.path, s.root, shredded)
+
+        with ColumnFile(self.path) as f:
+            for leaf, source in zip(get_leaves(f.root_descriptor), get_leaves(s.root)):
+                self.assertEqual(f[leaf].values.encoding, "dictionary")
+                self.assertEqual(f[leaf], shredded[source].to_tuples())
+
+    def test_views(self):
+        schema = parse_schema(["i", "s", "o", "d"])
+        columns = shred_records(
+            schema,
+            [{"i": 1, "s": "a", "o": True, "d": "x"}],
+            dictionary_encoding=[get_desc(schema, "d")],
+        )
+        views = {leaf: column.view() for leaf, column in columns.items()}
+        expected = {leaf: column.to_tuples() for leaf, column in columns.items()}
+        for column in columns.values():
+            column.append(None, 0, 0)
+        write_columns(self.path, schema, views)
+
+        with ColumnFile(self.path) as f:
+            for leaf, source in zip(get_leaves(f.root_descriptor), get_leaves(schema)):
+                self.assertEqual(f[leaf], expected[source])
+
+    def test_projection_only_reads_projected_columns(self):
+        s = PaperSchema()
+        write_columns(self.path, s.root, shred_records(s.root, s.records))
+
+        with ColumnFile(self.path) as f:
+            doc_id = get_desc(f.root_descriptor, "DocId")
+            assembled = assemble_records(f.root_descriptor, f, columns=[doc_id])
+
+            self.assertEqual(assembled, [{"DocId": 10}, {"DocId": 20}])
+            self.assertEqual(list(f._columns), [doc_id])
+
+    def test_close_with_live_columns(self):
+        s = PaperSchema()
+        shredded = shred_records(s.root, s.records)
+        write_columns(self.path, s.root, shredded)
+
+        with ColumnFile(self.path) as f:
+            columns = {leaf: f[leaf] for leaf in f}
+            records = iter_assemble_records(f.root_descriptor, f)
+            next(records)
+        self.assertTrue(f._file.closed)
+        for leaf, source in zip(columns, get_leaves(s.root)):
+            self.assertEqual(columns[leaf], shredded[source].to_tuples())
+
+    def test_object_values(self):
+        schema = parse_schema(["o"])
+        write_columns(
+            self.path, schema, shred_records(schema, [{"o": {"a": [None, 1]}}])
+        )
+        with ColumnFile(self.path) as f:
+            self.assertEqual(
+                f[get_desc(f.root_descriptor, "o")], [({"a": [None, 1]}, 0, 1)]
+            )
+
+        for value in [(1, 2), {1: "a"}, {"a": object()}]:
+            with self.assertRaises(ValueError):
+                write_columns(self.path, schema, shred_records(schema, [{"o": value}]))
+
+    def test_not_a_column_file(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a column file")
+
+        with self.assertRaises(ValueError):
+            ColumnFile(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
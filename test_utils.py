@@ -22,3 +22,8 @@ def get_desc(schema, path):
         assert part in curr.children
         curr = curr.children[part]
     return curr
+
+
+def assert_structurally_equal(first, second, msg=None):
+    if not first.structurally_equal(second):
+        raise AssertionError(msg or f"{first} != {second}")